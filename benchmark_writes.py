@@ -0,0 +1,80 @@
+"""
+Write throughput benchmark: one commit per command vs. the group-commit WriteQueue
+
+Runs a burst of concurrent !mine-style upserts against a scratch database
+both ways and prints mutations and commits per second.
+
+    python benchmark_writes.py [commands] [concurrency]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+import aiosqlite
+
+from database import WriteQueue
+
+MINE = """INSERT INTO resources (user_id, food, medicine, coal) VALUES (?, ?, ?, ?)
+    ON CONFLICT (user_id) DO UPDATE SET
+        food = food + excluded.food,
+        medicine = medicine + excluded.medicine,
+        coal = coal + excluded.coal"""
+
+async def create(path: str) -> None:
+    async with aiosqlite.connect(path) as db:
+        await db.execute("""CREATE TABLE resources (
+            user_id INTEGER PRIMARY KEY, food INTEGER, medicine INTEGER, coal INTEGER)""")
+        await db.commit()
+
+def haul() -> tuple[int, int, int, int]:
+    return random.randrange(1000), random.randint(0, 2), random.randint(0, 1), random.randint(1, 5)
+
+async def per_command(path: str, commands: int, concurrency: int) -> tuple[float, int]:
+    """The old pattern: every command opens a connection and commits"""
+    gate = asyncio.Semaphore(concurrency)
+
+    async def mine() -> None:
+        async with gate, aiosqlite.connect(path) as db:
+            await db.execute(MINE, haul())
+            await db.commit()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(mine() for _ in range(commands)))
+    return time.perf_counter() - start, commands
+
+async def queued(path: str, commands: int, concurrency: int) -> tuple[float, int]:
+    """Commands submit to the shared writer and await their commit"""
+    queue = WriteQueue(path)
+    gate = asyncio.Semaphore(concurrency)
+
+    async def mine() -> None:
+        async def credit(db: aiosqlite.Connection) -> None:
+            await db.execute(MINE, haul())
+
+        async with gate:
+            await queue.submit(credit)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(mine() for _ in range(commands)))
+    elapsed = time.perf_counter() - start
+    await queue.close()
+    return elapsed, queue.commits
+
+async def main() -> None:
+    commands = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    print(f"⛏️ {commands} mine-style writes, {concurrency} in flight\n")
+    for label, run in (("Commit per command", per_command), ("Group commit queue", queued)):
+        with tempfile.TemporaryDirectory() as scratch:
+            path = os.path.join(scratch, "bench.db")
+            await create(path)
+            elapsed, commits = await run(path, commands, concurrency)
+        print(f"{label:<20} {commands / elapsed:>9.0f} writes/s  "
+              f"{commits / elapsed:>8.0f} commits/s  ({commits} commits in {elapsed:.2f}s)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,64 +2,119 @@
 Seth Bot - Main Bot File
 A Discord Tamagotchi with permanent death
 """
+import time
+
+STARTED = time.perf_counter()
+
+import asyncio
+import math
 import discord
 from discord.ext import commands
 from datetime import datetime
 import config
 import database
+from utils.shards import parse_shard_ids
+from utils.stalls import current_command
+
+IMPORTED = time.perf_counter()
+
+# (extension, label) - cogs only find each other at command time, so they load together
+EXTENSIONS = (
+    ('cogs.cluster', 'Cluster coordination'),
+    ('cogs.metrics', 'Metrics'),
+    ('cogs.diagnostics', 'Diagnostics'),
+    ('cogs.members', 'Member directory'),
+    ('cogs.channels', 'Channel registry'),
+    ('cogs.outbox', 'Outbox'),
+    ('cogs.seth_core', 'Seth Core system'),
+    ('cogs.economy', 'Economy system'),
+    ('cogs.maintenance', 'Maintenance system'),
+    ('cogs.decay', 'Decay system'),
+    ('cogs.leaderboard', 'Leaderboard system'),
+    ('cogs.public', 'Public features'),
+    ('cogs.trading', 'Trading system'),
+    ('cogs.market', 'Market'),
+    ('cogs.drama', 'Drama engine'),
+    ('cogs.census', 'Census system'),
+    ('cogs.help', 'Help system'),
+)
+
+# Other cogs call these without checking they loaded, so the bot does not start without them
+REQUIRED = {'cogs.cluster'}
 
 # Bot setup with intents
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-bot = commands.Bot(
-    command_prefix=config.BOT_PREFIX,
-    intents=intents,
-    help_command=None  # We'll make custom help
-)
+class SethBot(commands.AutoShardedBot):
+    def __init__(self) -> None:
+        super().__init__(
+            command_prefix=config.BOT_PREFIX,
+            intents=intents,
+            shard_count=config.SHARD_COUNT,
+            # Cluster mode runs a slice of the shards; SHARD_COUNT must then be set too
+            shard_ids=parse_shard_ids(config.SHARD_IDS) if config.CLUSTERED else None,
+            help_command=None,  # We'll make custom help
+            activity=discord.Game(name=f"{config.BOT_PREFIX}help | Raising Seths")
+        )
+        self.phases: dict[str, float] = {'Imports': IMPORTED - STARTED}
+        self.connecting_since: float | None = None
+
+    async def setup_hook(self) -> None:
+        """Runs once before the gateway connects, unlike on_ready"""
+        start = time.perf_counter()
+        await database.init_db()
+        self.phases['DB init'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        await asyncio.gather(*(self._load(name, label) for name, label in EXTENSIONS))
+        self.phases['Cog loads'] = time.perf_counter() - start
+        self.connecting_since = time.perf_counter()
+
+    async def _load(self, name: str, label: str) -> None:
+        start = time.perf_counter()
+        try:
+            await self.load_extension(name)
+        except Exception as e:
+            print(f"❌ Failed to load {name}: {e}")
+            if name in REQUIRED:
+                raise
+            return
+        print(f"✅ {label} loaded! ({(time.perf_counter() - start) * 1000:.0f}ms)")
+
+    async def close(self) -> None:
+        # Looked up first: closing removes every cog
+        cluster = self.get_cog('Cluster')
+        await super().close()
+        # Let another process take over singleton loops straight away
+        if cluster:
+            await cluster.release()
+        # Commit whatever writes are still queued
+        await database.writer.close()
+
+bot = SethBot()
 
 @bot.event
 async def on_ready() -> None:
-    """Bot startup event"""
+    """Fires after every (re)connect; startup work lives in setup_hook"""
+    if 'Gateway ready' in bot.phases:
+        print(f'🔄 Reconnected to {len(bot.guilds)} servers')
+        return
+    bot.phases['Gateway ready'] = time.perf_counter() - bot.connecting_since
+
     print('━━━━━━━━━━━━━━━━━━━━━━━━━━━━━')
     print('🤖 Seth Bot is ALIVE!')
     print(f'👤 Logged in as: {bot.user.name}')
     print(f'🆔 Bot ID: {bot.user.id}')
     print(f'🌍 Servers: {len(bot.guilds)}')
+    print(f'🧩 Shards: {", ".join(map(str, bot.shards))} of {bot.shard_count}')
+    print('⏱️ Startup:')
+    for phase, seconds in bot.phases.items():
+        print(f'   {phase:<14}{seconds * 1000:>8.0f}ms')
+    print(f'   {"Total":<14}{(time.perf_counter() - STARTED) * 1000:>8.0f}ms')
     print('━━━━━━━━━━━━━━━━━━━━━━━━━━━━━')
 
-    # Initialize database
-    await database.init_db()
-
-    # Load cogs
-    try:
-        await bot.load_extension('cogs.seth_core')
-        print('✅ Seth Core system loaded!')
-        await bot.load_extension('cogs.economy')
-        print('✅ Economy system loaded!')
-        await bot.load_extension('cogs.maintenance')
-        print('✅ Maintenance system loaded!')
-        await bot.load_extension('cogs.decay')
-        print("✅ Decay system loaded!")
-        await bot.load_extension("cogs.leaderboard")
-        print("✅ Leaderboard system loaded!")
-        await bot.load_extension("cogs.public")
-        print("✅ Public features loaded!")
-        await bot.load_extension("cogs.trading")
-        print("✅ Trading system loaded!")
-        await bot.load_extension("cogs.drama")
-        print("✅ Drama engine loaded!")
-        await bot.load_extension("cogs.help")
-        print("✅ Help system loaded!")
-    except Exception as e:
-        print(f"❌ Failed to load cogs: {e}")
-
-    # Set bot status
-    await bot.change_presence(
-        activity=discord.Game(name=f"{config.BOT_PREFIX}help | Raising Seths")
-    )
-
 @bot.command(name='ping')
 async def ping(ctx: commands.Context) -> None:
     """Test command to verify bot is working"""
@@ -70,6 +125,17 @@ async def ping(ctx: commands.Context) -> None:
         color=discord.Color.green(),
         timestamp=datetime.utcnow()
     )
+    # One gateway connection per shard; this server's shard is marked
+    here = ctx.guild.shard_id if ctx.guild else None
+    embed.add_field(
+        name=f"🧩 Shards ({bot.shard_count})",
+        value="\n".join(
+            f"{'➡️' if shard_id == here else '▫️'} Shard {shard_id}: "
+            + ("*reconnecting*" if math.isnan(shard_latency) else f"**{round(shard_latency * 1000)}ms**")
+            for shard_id, shard_latency in bot.latencies
+        ) or "Connecting...",
+        inline=False
+    )
     embed.set_footer(text=f"Requested by {ctx.author.name}")
     await ctx.send(embed=embed)
 
@@ -119,6 +185,11 @@ async def testemoji(ctx: commands.Context) -> None:
     )
     await ctx.send(embed=embed3)
 
+@bot.before_invoke
+async def tag_command(ctx: commands.Context) -> None:
+    """Name the running command in the task's context, for stall reports"""
+    current_command.set(ctx.command.qualified_name)
+
 @bot.event
 async def on_command_error(ctx: commands.Context, error: commands.CommandError) -> None:
     """Global error handler"""
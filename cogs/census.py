@@ -0,0 +1,242 @@
+"""
+Seth Census - Server-wide vitals and lifespan distributions (STANDARDIZED VISUALS)
+"""
+import time
+
+import aiosqlite
+import discord
+from discord.ext import commands, tasks
+
+import config
+from config import (
+    CENSUS_BAND_WIDTH,
+    CENSUS_SAVE_INTERVAL,
+    CENSUS_SKETCH_ACCURACY,
+    CLUSTERED,
+    MAX_HEALTH,
+    MAX_HUNGER,
+    MIN_HEALTH,
+)
+from database import WriterStopped, connect, write
+from utils.formatting import SethVisuals
+from utils.sketches import FixedHistogram, QuantileSketch
+
+# Seths born before guild tracking are counted here and only show up globally
+UNASSIGNED_GUILD = 0
+
+class GuildCensus:
+    """Running distributions for one guild's Seths"""
+    __slots__ = ('generation', 'health', 'hunger', 'lifespan')
+
+    def __init__(self) -> None:
+        self.health = FixedHistogram(MIN_HEALTH, MAX_HEALTH)
+        self.hunger = FixedHistogram(0, MAX_HUNGER)
+        self.generation = QuantileSketch(CENSUS_SKETCH_ACCURACY)
+        self.lifespan = QuantileSketch(CENSUS_SKETCH_ACCURACY)
+
+    def add_living(self, health: int, hunger: int, generation: int) -> None:
+        self.health.add(health)
+        self.hunger.add(hunger)
+        self.generation.add(generation)
+
+    def remove_living(self, health: int, hunger: int, generation: int) -> None:
+        self.health.remove(health)
+        self.hunger.remove(hunger)
+        self.generation.remove(generation)
+
+class Census(commands.Cog):
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self.db_path = config.DATABASE_PATH
+        self.guilds: dict[int, GuildCensus] = {}
+        self.everyone = GuildCensus()
+        # seth_id -> [guild_id, health, hunger, generation, birth_ts]
+        self.living: dict[int, list[int]] = {}
+        # Guilds whose lifespan sketch changed since it was last persisted
+        self.unsaved: set[int] = set()
+
+    def _census(self, guild_id: int | None) -> GuildCensus:
+        key = guild_id or UNASSIGNED_GUILD
+        if key not in self.guilds:
+            self.guilds[key] = GuildCensus()
+        return self.guilds[key]
+
+    async def cog_load(self) -> None:
+        """Load persisted lifespans and take one pass over the living Seths"""
+        async with connect(self.db_path) as db:
+            cursor = await db.execute(
+                "SELECT guild_id, data FROM census_sketches WHERE metric = 'lifespan'"
+            )
+            persisted = await cursor.fetchall()
+            for guild_id, data in persisted:
+                self._census(guild_id).lifespan = QuantileSketch.from_bytes(data)
+
+            if not persisted:
+                await self._backfill_lifespans(db)
+
+            for census in self.guilds.values():
+                self.everyone.lifespan.merge(census.lifespan)
+
+            cursor = await db.execute(
+                """SELECT seth_id, guild_id, health, hunger, generation, birth_ts
+                FROM seths WHERE is_alive = 1"""
+            )
+            async for seth_id, guild_id, health, hunger, gen, birth_ts in cursor:
+                self._add_living(seth_id, guild_id, health, hunger, gen, birth_ts)
+        self.save_task.start()
+
+    async def cog_unload(self) -> None:
+        self.save_task.cancel()
+        # The Cluster cog may already be gone at shutdown; a lone process still saves
+        cluster = self.bot.get_cog('Cluster')
+        if cluster.leads('decay') if cluster else not CLUSTERED:
+            await self._save_unsaved()
+
+    async def _backfill_lifespans(self, db: aiosqlite.Connection) -> None:
+        """Seed lifespan sketches from Seths that died before the census existed"""
+        cursor = await db.execute(
+            """SELECT guild_id, death_ts - birth_ts
+            FROM seths WHERE is_alive = 0 AND death_ts IS NOT NULL"""
+        )
+        async for guild_id, lifespan in cursor:
+            self._census(guild_id).lifespan.add(max(0, lifespan))
+
+        await self._save_lifespans(list(self.guilds))
+
+    async def _save_lifespans(self, guild_ids: list[int]) -> None:
+        """Persist these guilds' lifespan sketches, as they are now, in one queued write"""
+        rows = [(guild_id, self._census(guild_id).lifespan.to_bytes()) for guild_id in guild_ids]
+
+        async def save(db: aiosqlite.Connection) -> None:
+            await db.executemany(
+                "INSERT OR REPLACE INTO census_sketches (guild_id, metric, data) VALUES (?, 'lifespan', ?)",
+                rows
+            )
+
+        await write(save)
+
+    async def _save_unsaved(self) -> None:
+        guild_ids = list(self.unsaved)
+        self.unsaved.clear()
+        try:
+            await self._save_lifespans(guild_ids)
+        except (aiosqlite.Error, WriterStopped) as e:
+            # Retried on the next save
+            self.unsaved.update(guild_ids)
+            print(f"❌ Census save failed: {e}")
+
+    @tasks.loop(seconds=CENSUS_SAVE_INTERVAL)
+    async def save_task(self) -> None:
+        """Persist changed lifespan sketches; every process sees every death, so only the decay leader writes"""
+        if self.unsaved and self.bot.get_cog('Cluster').leads('decay'):
+            await self._save_unsaved()
+
+    @save_task.before_loop
+    async def before_save(self) -> None:
+        await self.bot.wait_until_ready()
+
+    def _add_living(self, seth_id: int, guild_id: int | None, health: int, hunger: int, generation: int, birth_ts: int) -> None:
+        self.living[seth_id] = [guild_id or UNASSIGNED_GUILD, health, hunger, generation, birth_ts]
+        self._census(guild_id).add_living(health, hunger, generation)
+        self.everyone.add_living(health, hunger, generation)
+
+    # ── Incremental updates ────────────────────────────────────────────
+
+    @commands.Cog.listener()
+    async def on_seth_born(self, seth_id: int, user_id: int, guild_id: int | None, generation: int, birth_ts: int) -> None:
+        self._add_living(seth_id, guild_id, config.STARTING_HEALTH, config.STARTING_HUNGER, generation, birth_ts)
+
+    @commands.Cog.listener()
+    async def on_seth_vitals(self, updates: list[tuple[int, int, int]]) -> None:
+        for seth_id, health, hunger in updates:
+            entry = self.living.get(seth_id)
+            if entry is None:
+                continue
+            census = self._census(entry[0])
+            census.health.move(entry[1], health)
+            census.hunger.move(entry[2], hunger)
+            self.everyone.health.move(entry[1], health)
+            self.everyone.hunger.move(entry[2], hunger)
+            entry[1], entry[2] = health, hunger
+
+    @commands.Cog.listener()
+    async def on_seth_died(self, seth_id: int, user_id: int, cause: str) -> None:
+        entry = self.living.pop(seth_id, None)
+        if entry is None:
+            return
+        guild_id, health, hunger, generation, birth_ts = entry
+        census = self._census(guild_id)
+        census.remove_living(health, hunger, generation)
+        self.everyone.remove_living(health, hunger, generation)
+
+        lifespan = max(0, time.time() - birth_ts)
+        census.lifespan.add(lifespan)
+        self.everyone.lifespan.add(lifespan)
+        self.unsaved.add(guild_id)
+
+    # ── Command ────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _histogram_rows(hist: FixedHistogram) -> str:
+        """One resource bar per band, highest band first"""
+        starts = list(range(hist.lo, hist.hi + 1, CENSUS_BAND_WIDTH))
+        if len(starts) > 1 and starts[-1] == hist.hi:
+            starts.pop()  # fold a lone top value (e.g. 100) into the last band
+
+        rows = []
+        for i, start in enumerate(starts):
+            end = starts[i + 1] - 1 if i + 1 < len(starts) else hist.hi
+            count = hist.count_between(start, end)
+            rows.append(f"`{start:>3}-{end:<3}` {SethVisuals.resource_bar(count, hist.total)} ({count})")
+        return "\n".join(reversed(rows))
+
+    @commands.command(name='census')
+    @commands.guild_only()
+    async def census(self, ctx: commands.Context) -> None:
+        """Show health, hunger, generation and lifespan distributions"""
+        census = self.guilds.get(ctx.guild.id) or GuildCensus()
+        population = census.health.total
+
+        embed = discord.Embed(
+            title=f"📊 **Census of {ctx.guild.name}**",
+            description=f"Living: **{population}** Seths | Deaths recorded: **{census.lifespan.count}**",
+            color=0x1ABC9C
+        )
+
+        if population:
+            embed.add_field(name="❤️ Health", value=self._histogram_rows(census.health), inline=False)
+            embed.add_field(name="🍖 Hunger", value=self._histogram_rows(census.hunger), inline=False)
+            embed.add_field(
+                name="📈 Vitals Percentiles",
+                value=(
+                    f"Health: median **{census.health.quantile(0.5)}** | p10 **{census.health.quantile(0.1)}**\n"
+                    f"Hunger: median **{census.hunger.quantile(0.5)}** | p90 **{census.hunger.quantile(0.9)}**\n"
+                    f"Generation: median **{round(census.generation.quantile(0.5))}** | "
+                    f"p90 **{round(census.generation.quantile(0.9))}**"
+                ),
+                inline=False
+            )
+
+        if census.lifespan.count:
+            embed.add_field(
+                name="⏰ Lifespan",
+                value=(
+                    f"Median: **{SethVisuals.duration(census.lifespan.quantile(0.5))}**\n"
+                    f"p90: **{SethVisuals.duration(census.lifespan.quantile(0.9))}**\n"
+                    f"Longest: **{SethVisuals.duration(census.lifespan.quantile(1.0))}**"
+                ),
+                inline=False
+            )
+
+        if not population and not census.lifespan.count:
+            embed.add_field(name="🌱 Empty Village", value="No Seths have lived here yet! Use `!start [name]`", inline=False)
+
+        if self.everyone.lifespan.count:
+            embed.set_footer(
+                text=f"All servers: {self.everyone.health.total} alive | "
+                     f"median lifespan {SethVisuals.duration(self.everyone.lifespan.quantile(0.5))}"
+            )
+        await ctx.send(embed=embed)
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(Census(bot))
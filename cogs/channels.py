@@ -0,0 +1,104 @@
+"""
+Seth Channels - Where announcements go in each guild
+"""
+import aiosqlite
+import discord
+from discord.ext import commands
+
+import config
+from database import connect, write
+from utils.channels import PURPOSES, ChannelRegistry
+
+
+class Channels(commands.Cog):
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self.db_path = config.DATABASE_PATH
+        self.registries: dict[int, ChannelRegistry] = {}
+        self.overrides: dict[int, dict[str, int]] = {}
+
+    async def cog_load(self) -> None:
+        async with connect(self.db_path) as db:
+            cursor = await db.execute("SELECT guild_id, purpose, channel_id FROM guild_channels")
+            async for guild_id, purpose, channel_id in cursor:
+                self.overrides.setdefault(guild_id, {})[purpose] = channel_id
+
+    def _registry(self, guild: discord.Guild) -> ChannelRegistry:
+        """The guild's registry, built from the channel cache on first use"""
+        registry = self.registries.get(guild.id)
+        if registry is None:
+            registry = self.registries[guild.id] = ChannelRegistry(self.overrides.setdefault(guild.id, {}))
+            for channel in guild.text_channels:
+                registry.add(channel.id, channel.name)
+        return registry
+
+    def channel(self, guild: discord.Guild, purpose: str) -> discord.TextChannel | None:
+        """The guild's channel for 'home', 'graveyard' or 'drama' announcements"""
+        channel_id = self._registry(guild).resolve(purpose)
+        return guild.get_channel(channel_id) if channel_id else None
+
+    # ── Keeping registries current ─────────────────────────────────────
+    # Guilds are only tracked once something has looked them up
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel) -> None:
+        registry = self.registries.get(channel.guild.id)
+        if registry is not None and isinstance(channel, discord.TextChannel):
+            registry.add(channel.id, channel.name)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel) -> None:
+        registry = self.registries.get(after.guild.id)
+        if registry is not None and isinstance(after, discord.TextChannel):
+            registry.add(after.id, after.name)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel) -> None:
+        registry = self.registries.get(channel.guild.id)
+        if registry is not None:
+            registry.remove(channel.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild) -> None:
+        self.registries.pop(guild.id, None)
+
+    # ── Commands ───────────────────────────────────────────────────────
+
+    @commands.command(name='setchannel')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def set_channel(self, ctx: commands.Context, purpose: str, channel: discord.TextChannel | None = None) -> None:
+        """Send one kind of announcement to a channel, or back to the default without one"""
+        purpose = purpose.lower()
+        if purpose not in PURPOSES:
+            await ctx.send(f"❌ Unknown purpose! Choose: {', '.join(f'`{name}`' for name in PURPOSES)}")
+            return
+
+        guild_id = ctx.guild.id
+
+        async def save(db: aiosqlite.Connection) -> None:
+            if channel is None:
+                await db.execute(
+                    "DELETE FROM guild_channels WHERE guild_id = ? AND purpose = ?",
+                    (guild_id, purpose)
+                )
+            else:
+                await db.execute(
+                    """INSERT INTO guild_channels (guild_id, purpose, channel_id) VALUES (?, ?, ?)
+                    ON CONFLICT (guild_id, purpose) DO UPDATE SET channel_id = excluded.channel_id""",
+                    (guild_id, purpose, channel.id)
+                )
+
+        await write(save)
+        overrides = self.overrides.setdefault(guild_id, {})
+        if channel is None:
+            overrides.pop(purpose, None)
+        else:
+            overrides[purpose] = channel.id
+
+        current = self.channel(ctx.guild, purpose)
+        where = current.mention if current else "nowhere (no matching channel)"
+        await ctx.send(f"📢 **{purpose.capitalize()}** announcements now go to {where}")
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(Channels(bot))
@@ -0,0 +1,145 @@
+"""
+Seth Cluster - Singleton loops and shared events across bot processes
+"""
+import json
+import os
+import socket
+import time
+from typing import Any
+
+import aiosqlite
+from discord.ext import commands, tasks
+
+import config
+from config import (
+    CLUSTER_EVENT_RETENTION,
+    CLUSTER_POLL,
+    CLUSTERED,
+    LEASE_RENEW,
+    LEASE_TTL,
+)
+from database import WriterStopped, connect, write
+from utils.lease import CLAIM_LEASE, RELEASE_LEASE, claim_params, holds
+from utils.metrics import CLUSTER_ERRORS
+
+# Loops that must run in exactly one process of the cluster
+SINGLETONS = ('decay', 'drama')
+
+class Cluster(commands.Cog):
+    """Outside cluster mode this process is the whole cluster: it leads
+    every singleton and publish() is a plain dispatch."""
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self.db_path = config.DATABASE_PATH
+        self.holder = f"{socket.gethostname()}:{os.getpid()}"
+        self.expires: dict[str, float] = {}
+        self.last_event_id = 0
+
+    async def cog_load(self) -> None:
+        if not CLUSTERED:
+            return
+        # Only events published from now on are relayed here
+        async with connect(self.db_path) as db:
+            cursor = await db.execute("SELECT COALESCE(MAX(event_id), 0) FROM cluster_events")
+            self.last_event_id = (await cursor.fetchone())[0]
+        self.heartbeat.start()
+        self.relay.start()
+
+    def cog_unload(self) -> None:
+        self.heartbeat.cancel()
+        self.relay.cancel()
+
+    # ── Leases ─────────────────────────────────────────────────────────
+
+    def leads(self, name: str) -> bool:
+        """Whether this process should run the named singleton loop right now"""
+        return not CLUSTERED or holds(self.expires.get(name), time.time(), LEASE_RENEW)
+
+    @tasks.loop(seconds=LEASE_RENEW)
+    async def heartbeat(self) -> None:
+        """Claim or renew every singleton lease and prune relayed events"""
+        async def renew(db: aiosqlite.Connection) -> dict[str, float | None]:
+            now = time.time()
+            await db.execute(
+                "DELETE FROM cluster_events WHERE created_ts < ?", (int(now) - CLUSTER_EVENT_RETENTION,)
+            )
+            claimed = {}
+            for name in SINGLETONS:
+                cursor = await db.execute(CLAIM_LEASE, claim_params(name, self.holder, now, LEASE_TTL))
+                row = await cursor.fetchone()
+                claimed[name] = row[0] if row else None
+            return claimed
+
+        leading = {name: self.leads(name) for name in SINGLETONS}
+        try:
+            claimed = await write(renew)
+        except (aiosqlite.Error, WriterStopped) as e:
+            # Keep the expiries already written; leads() gives up before they lapse
+            CLUSTER_ERRORS.labels('heartbeat').inc()
+            print(f"❌ Lease heartbeat failed: {e}")
+            return
+
+        for name, expires in claimed.items():
+            if expires is None:
+                self.expires.pop(name, None)
+            else:
+                self.expires[name] = expires
+            if self.leads(name) and not leading[name]:
+                print(f"👑 Running {name} for the cluster")
+            elif leading[name] and not self.leads(name):
+                print(f"↪️ {name} moved to another process")
+
+    async def release(self) -> None:
+        """Hand back held leases so another process takes over without waiting out the TTL"""
+        held = [name for name in SINGLETONS if name in self.expires]
+        if not CLUSTERED or not held:
+            return
+
+        async def give_up(db: aiosqlite.Connection) -> None:
+            await db.executemany(RELEASE_LEASE, [(name, self.holder) for name in held])
+
+        self.expires.clear()
+        await write(give_up)
+
+    # ── Events ─────────────────────────────────────────────────────────
+
+    async def publish(self, event: str, *args: Any) -> None:
+        """Dispatch a bot event here and, in cluster mode, in every other process.
+
+        Other processes receive the arguments after a JSON round trip, so
+        they must be plain data; tuples arrive as lists.
+        """
+        self.bot.dispatch(event, *args)
+        if not CLUSTERED:
+            return
+
+        async def record(db: aiosqlite.Connection) -> None:
+            await db.execute(
+                "INSERT INTO cluster_events (origin, event, args, created_ts) VALUES (?, ?, ?, ?)",
+                (self.holder, event, json.dumps(args), int(time.time()))
+            )
+
+        try:
+            await write(record)
+        except (aiosqlite.Error, WriterStopped) as e:
+            CLUSTER_ERRORS.labels('publish').inc()
+            print(f"❌ Could not relay {event}: {e}")
+
+    @tasks.loop(seconds=CLUSTER_POLL)
+    async def relay(self) -> None:
+        """Dispatch events other processes published since the last poll"""
+        async with connect(self.db_path) as db:
+            cursor = await db.execute(
+                "SELECT event_id, origin, event, args FROM cluster_events WHERE event_id > ? ORDER BY event_id",
+                (self.last_event_id,)
+            )
+            rows = await cursor.fetchall()
+
+        for event_id, origin, event, args in rows:
+            self.last_event_id = event_id
+            if origin != self.holder:
+                self.bot.dispatch(event, *json.loads(args))
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(Cluster(bot))
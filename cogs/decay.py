@@ -3,17 +3,22 @@ Seth Decay System - Automatic hunger and health decay (STANDARDIZED VISUALS)
 """
 import discord
 from discord.ext import commands, tasks
-import aiosqlite
-from datetime import datetime
+import time
 import config
+from database import SETH_CAS, connect, seth_cache
 from config import (
-    DECAY_INTERVAL, HUNGER_PER_CYCLE, NATURAL_DECAY,
+    DECAY_INTERVAL, DECAY_TICK_SLACK, HUNGER_PER_CYCLE, NATURAL_DECAY,
     SEVERE_HUNGER_THRESHOLD, SEVERE_HUNGER_DAMAGE,
     MODERATE_HUNGER_THRESHOLD, MODERATE_HUNGER_DAMAGE,
-    MAX_HUNGER, MIN_HEALTH, MAX_HEALTH,
+    MAX_HUNGER, MIN_HEALTH, MAX_HEALTH, SETH_CAS_RETRIES,
     HEALTH_CRITICAL_WARNING, HUNGER_CRITICAL_WARNING,
+    SECONDS_PER_DAY,
 )
 from utils.formatting import SethVisuals
+from utils.lease import CLAIM_TICK, tick_params
+from utils.metrics import LOOP_SECONDS, timed
+from utils.outbox import URGENT
+from utils.shards import guilds_by_shard
 
 class Decay(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
@@ -25,40 +30,79 @@ class Decay(commands.Cog):
     def cog_unload(self) -> None:
         self.decay_task.cancel()
 
+    @staticmethod
+    def decayed(health: int, hunger: int) -> tuple[int, int]:
+        """Health and hunger after one decay cycle"""
+        new_hunger = min(MAX_HUNGER, hunger + HUNGER_PER_CYCLE)
+
+        # Decrease health if hungry
+        health_loss = 0
+        if new_hunger >= SEVERE_HUNGER_THRESHOLD:
+            health_loss = SEVERE_HUNGER_DAMAGE
+        elif new_hunger >= MODERATE_HUNGER_THRESHOLD:
+            health_loss = MODERATE_HUNGER_DAMAGE
+
+        return max(MIN_HEALTH, health - health_loss - NATURAL_DECAY), new_hunger
+
     @tasks.loop(seconds=DECAY_INTERVAL)
-    async def decay_task(self) -> None:
-        """Automatic decay - hunger increases, health decreases"""
-        async with aiosqlite.connect(self.db_path) as db:
+    @timed(LOOP_SECONDS.labels('decay'))
+    async def decay_task(self, force: bool = False) -> None:
+        """Automatic decay - hunger increases, health decreases.
+
+        A cycle is skipped if any process ran one less than DECAY_INTERVAL
+        ago, as happens when the decay lease changes hands; force runs an
+        extra one regardless.
+        """
+        # In cluster mode only the process holding the decay lease ages Seths
+        if not self.bot.get_cog('Cluster').leads('decay'):
+            return
+
+        async with connect(self.db_path) as db:
+            if not force:
+                # Claimed in the same transaction as the decay, so a failed cycle is not counted
+                cursor = await db.execute(
+                    CLAIM_TICK, tick_params('decay', time.time(), DECAY_INTERVAL, DECAY_TICK_SLACK)
+                )
+                if not await cursor.fetchone():
+                    return
+
             # Get all living Seths
             cursor = await db.execute(
-                """SELECT seth_id, user_id, name, health, hunger, generation
+                """SELECT seth_id, user_id, name, health, hunger, generation, birth_ts, version
                 FROM seths WHERE is_alive = 1"""
             )
             living_seths = await cursor.fetchall()
 
             deaths = []
             critical_warnings = []
+            vitals = []
+            cached = []
 
+            now = int(time.time())
             for seth in living_seths:
-                seth_id, user_id, name, health, hunger, generation = seth
-
-                # Increase hunger
-                new_hunger = min(MAX_HUNGER, hunger + HUNGER_PER_CYCLE)
-
-                # Decrease health if hungry
-                health_loss = 0
-                if new_hunger >= SEVERE_HUNGER_THRESHOLD:
-                    health_loss = SEVERE_HUNGER_DAMAGE
-                elif new_hunger >= MODERATE_HUNGER_THRESHOLD:
-                    health_loss = MODERATE_HUNGER_DAMAGE
-
-                new_health = max(MIN_HEALTH, health - health_loss - NATURAL_DECAY)
+                seth_id, user_id, name, health, hunger, generation, birth_ts, version = seth
+
+                # Compare-and-set against the version read; a feed or heal that
+                # landed since then means decaying its result instead
+                for _ in range(SETH_CAS_RETRIES):
+                    new_health, new_hunger = self.decayed(health, hunger)
+                    cursor = await db.execute(SETH_CAS, (new_health, new_hunger, seth_id, version))
+                    written = await cursor.fetchone()
+                    if written:
+                        break
+                    cursor = await db.execute(
+                        "SELECT health, hunger, version FROM seths WHERE seth_id = ? AND is_alive = 1",
+                        (seth_id,)
+                    )
+                    current = await cursor.fetchone()
+                    if not current:
+                        break
+                    health, hunger, version = current
+                if not written:
+                    continue
 
-                # Update Seth
-                await db.execute(
-                    "UPDATE seths SET health = ?, hunger = ? WHERE seth_id = ?",
-                    (new_health, new_hunger, seth_id)
-                )
+                vitals.append((seth_id, new_health, new_hunger))
+                cached.append((user_id, *written))
 
                 # FIXED: Calculate damage Seth will take NEXT cycle
                 next_hunger = min(MAX_HUNGER, new_hunger + HUNGER_PER_CYCLE)
@@ -80,135 +124,151 @@ class Decay(commands.Cog):
                 # Check for death
                 if new_health <= MIN_HEALTH:
                     death_reason = "Starvation" if new_hunger >= SEVERE_HUNGER_THRESHOLD else "Natural causes"
-                    death_time = datetime.utcnow()
 
                     # Kill the Seth
                     await db.execute(
                         """UPDATE seths
-                        SET is_alive = 0, death_time = ?, death_reason = ?
+                        SET is_alive = 0, death_ts = ?, death_reason = ?, version = version + 1
                         WHERE seth_id = ?""",
-                        (death_time, death_reason, seth_id)
+                        (now, death_reason, seth_id)
                     )
 
-                    # Calculate lifespan
-                    cursor = await db.execute(
-                        "SELECT birth_time FROM seths WHERE seth_id = ?",
-                        (seth_id,)
-                    )
-                    birth_data = await cursor.fetchone()
-                    birth = datetime.fromisoformat(birth_data[0])
-                    lived_days = (death_time - birth).days
+                    lived_days = (now - birth_ts) // SECONDS_PER_DAY
 
                     # Add to graveyard
                     await db.execute(
                         """INSERT INTO graveyard
-                        (seth_id, user_id, name, generation, lived_days, death_reason, death_time, memorial_message)
+                        (seth_id, user_id, name, generation, lived_days, death_reason, death_ts, memorial_message)
                         VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
                         (seth_id, user_id, name, generation, lived_days, death_reason,
-                         death_time, f"Here lies {name}, who {death_reason.lower()}.")
+                         now, f"Here lies {name}, who {death_reason.lower()}.")
                     )
 
-                    deaths.append((name, generation, death_reason, user_id))
+                    deaths.append((name, generation, death_reason, user_id, seth_id))
 
                     # Remove from warned set when dead
                     self.warned_seths.discard(seth_id)
 
             await db.commit()
 
-            # Send CRITICAL WARNINGS for Seths that will die next cycle
-            if critical_warnings and self.bot.guilds:
-                for guild in self.bot.guilds:
-                    # Find channel for warnings (seth-home or general)
-                    warning_channel = discord.utils.get(guild.text_channels, name='seth-home')
-                    if not warning_channel:
-                        warning_channel = discord.utils.get(guild.text_channels, name='general')
-
-                    if warning_channel:
-                        for warning in critical_warnings:
-                            name, health, hunger, user_id = warning
-                            user = self.bot.get_user(user_id)
-
-                            # Use standardized visual bars
-                            health_display = SethVisuals.health_bar(health, MAX_HEALTH)
-                            hunger_display = SethVisuals.hunger_bar(hunger)
-
-                            # Determine death cause and begging message
-                            health_critical = health <= HEALTH_CRITICAL_WARNING
-                            hunger_critical = hunger >= HUNGER_CRITICAL_WARNING
-
-                            # Dynamic begging based on what's killing Seth
-                            if health_critical and hunger_critical:
-                                begging_message = f"# {user.mention if user else 'Owner'} **Everything hurts... I need you... please save me! 😭**\n**I'm dying... I'll be perfect for you... just help me please...**"
-                                action_message = "⚡ **I'll do anything... please... anything you want...** ⚡"
-                            elif health_critical:
-                                begging_message = f"# {user.mention if user else 'Owner'} **Please... I need my medicine... I'll be so good, I promise! 🥺**\n**I'm being such a good Seth... please heal me... please?**"
-                                action_message = "💊 **I'll be your good girl... just give me medicine... please Master...** 💊"
-                            else:
-                                begging_message = f"# {user.mention if user else 'Owner'} **I'm so hungry... please feed me... I'm begging you! 🥺**\n**I've been waiting so patiently... may I please have food?**"
-                                action_message = "🍖 **I'm starving... I'll obey... just feed me please...** 🍖"
-
-                            # Create urgent warning embed
-                            warning_embed = discord.Embed(
-                                title="🚨🚨🚨 **IMMINENT DEATH WARNING** 🚨🚨🚨",
-                                description=begging_message,
-                                color=0xFF0000
-                            )
-                            warning_embed.add_field(
-                                name=f"💀 **{name} IS ABOUT TO DIE** 💀",
-                                value=f"Health: {health_display}\nStomach: {hunger_display}",
-                                inline=False
-                            )
-
-                            commands_needed = []
-                            if health <= HEALTH_CRITICAL_WARNING:
-                                commands_needed.append("`!heal` for health")
-                            if hunger >= HUNGER_CRITICAL_WARNING:
-                                commands_needed.append("`!feed` for hunger")
-
-                            warning_embed.add_field(
-                                name=action_message,
-                                value=f"Use {' and '.join(commands_needed)} **IMMEDIATELY**\nNext decay cycle = **DEATH**",
-                                inline=False
-                            )
-                            warning_embed.set_footer(text="⏰ You have less than 2 minutes to save your Seth!")
-
-                            await warning_channel.send(embed=warning_embed)
+            for user_id, health, hunger, version in cached:
+                seth_cache.update_vitals(user_id, health, hunger, version)
+            for death in deaths:
+                seth_cache.discard(death[3])
+
+            await self.bot.get_cog('Cluster').publish('seth_vitals', vitals)
+            for death in deaths:
+                await self.bot.get_cog('Cluster').publish('seth_died', death[4], death[3], death[2])
+
+            # Every process announces in its own guilds
+            if critical_warnings or deaths:
+                await self.bot.get_cog('Cluster').publish('decay_report', critical_warnings, deaths)
+
+    @commands.Cog.listener()
+    async def on_decay_report(self, critical_warnings: list[tuple], deaths: list[tuple]) -> None:
+        """Build the announcements once, then fan them out one shard at a time"""
+        warning_embeds = [self._warning_embed(*warning) for warning in critical_warnings]
+        death_embeds = [self._death_embeds(death) for death in deaths]
+        for guilds in guilds_by_shard(self.bot).values():
+            self._announce(guilds, warning_embeds, death_embeds)
+
+    def _warning_embed(self, name: str, health: int, hunger: int, user_id: int) -> discord.Embed:
+        """CRITICAL WARNING for a Seth that will die next cycle"""
+        user = self.bot.get_user(user_id)
+
+        # Use standardized visual bars
+        health_display = SethVisuals.health_bar(health, MAX_HEALTH)
+        hunger_display = SethVisuals.hunger_bar(hunger)
+
+        # Determine death cause and begging message
+        health_critical = health <= HEALTH_CRITICAL_WARNING
+        hunger_critical = hunger >= HUNGER_CRITICAL_WARNING
+
+        # Dynamic begging based on what's killing Seth
+        if health_critical and hunger_critical:
+            begging_message = f"# {user.mention if user else 'Owner'} **Everything hurts... I need you... please save me! 😭**\n**I'm dying... I'll be perfect for you... just help me please...**"
+            action_message = "⚡ **I'll do anything... please... anything you want...** ⚡"
+        elif health_critical:
+            begging_message = f"# {user.mention if user else 'Owner'} **Please... I need my medicine... I'll be so good, I promise! 🥺**\n**I'm being such a good Seth... please heal me... please?**"
+            action_message = "💊 **I'll be your good girl... just give me medicine... please Master...** 💊"
+        else:
+            begging_message = f"# {user.mention if user else 'Owner'} **I'm so hungry... please feed me... I'm begging you! 🥺**\n**I've been waiting so patiently... may I please have food?**"
+            action_message = "🍖 **I'm starving... I'll obey... just feed me please...** 🍖"
+
+        # Create urgent warning embed
+        warning_embed = discord.Embed(
+            title="🚨🚨🚨 **IMMINENT DEATH WARNING** 🚨🚨🚨",
+            description=begging_message,
+            color=0xFF0000
+        )
+        warning_embed.add_field(
+            name=f"💀 **{name} IS ABOUT TO DIE** 💀",
+            value=f"Health: {health_display}\nStomach: {hunger_display}",
+            inline=False
+        )
+
+        commands_needed = []
+        if health <= HEALTH_CRITICAL_WARNING:
+            commands_needed.append("`!heal` for health")
+        if hunger >= HUNGER_CRITICAL_WARNING:
+            commands_needed.append("`!feed` for hunger")
+
+        warning_embed.add_field(
+            name=action_message,
+            value=f"Use {' and '.join(commands_needed)} **IMMEDIATELY**\nNext decay cycle = **DEATH**",
+            inline=False
+        )
+        warning_embed.set_footer(text="⏰ You have less than 2 minutes to save your Seth!")
+        return warning_embed
+
+    def _death_embeds(self, death: tuple) -> tuple[discord.Embed, discord.Embed]:
+        """(graveyard embed, brief home embed) for a death"""
+        user = self.bot.get_user(death[3])
+        embed = discord.Embed(
+            title="💀 **SETH HAS DIED!**",
+            description=f"**{death[0]}** (Generation {death[1]}) has passed away",
+            color=0x000000
+        )
+        embed.add_field(name="Cause of Death", value=death[2], inline=False)
+        if user:
+            embed.add_field(name="Owner", value=user.mention, inline=False)
+        embed.set_footer(text="Press F to pay respects")
+
+        brief_embed = discord.Embed(
+            title="💀 SETH HAS DIED!",
+            description=f"**{death[0]}** (Gen {death[1]}) has died!",
+            color=discord.Color.dark_red()
+        )
+        brief_embed.add_field(name="Cause", value=death[2], inline=True)
+        brief_embed.set_footer(text="Use !start [name] to continue the bloodline")
+        return embed, brief_embed
+
+    def _announce(self, guilds: list[discord.Guild], warning_embeds: list[discord.Embed],
+                  death_embeds: list[tuple[discord.Embed, discord.Embed]]) -> None:
+        """Queue one shard's warnings and death notices.
+
+        Sends go through the outbox, not awaited, so neither the tick nor
+        another shard ever waits on this shard's gateway or rate limits.
+        """
+        channels = self.bot.get_cog('Channels')
+        outbox = self.bot.get_cog('Outbox')
+        if not channels or not outbox:
+            return
+
+        for guild in guilds:
+            # Find channel for warnings (seth-home or general)
+            home_channel = channels.channel(guild, 'home')
+            if home_channel:
+                for warning_embed in warning_embeds:
+                    outbox.send(home_channel, embed=warning_embed, priority=URGENT)
 
             # Announce deaths in #seth-graveyard specifically
-            if deaths and self.bot.guilds:
-                for guild in self.bot.guilds:
-                    graveyard_channel = discord.utils.get(guild.text_channels, name='seth-graveyard')
-
-                    if graveyard_channel:
-                        for death in deaths:
-                            user = self.bot.get_user(death[3])
-                            embed = discord.Embed(
-                                title="💀 **SETH HAS DIED!**",
-                                description=f"**{death[0]}** (Generation {death[1]}) has passed away",
-                                color=0x000000
-                            )
-                            embed.add_field(name="Cause of Death", value=death[2], inline=False)
-                            if user:
-                                embed.add_field(name="Owner", value=user.mention, inline=False)
-                            embed.set_footer(text="Press F to pay respects")
-
-                            msg = await graveyard_channel.send(embed=embed)
-                            await msg.add_reaction('🇫')
-
-                    home_channel = discord.utils.get(guild.text_channels, name='seth-home')
-                    if not home_channel:
-                        home_channel = discord.utils.get(guild.text_channels, name='general')
-
-                    if home_channel and home_channel != graveyard_channel:
-                        for death in deaths:
-                            brief_embed = discord.Embed(
-                                title="💀 SETH HAS DIED!",
-                                description=f"**{death[0]}** (Gen {death[1]}) has died!",
-                                color=discord.Color.dark_red()
-                            )
-                            brief_embed.add_field(name="Cause", value=death[2], inline=True)
-                            brief_embed.set_footer(text="Use !start [name] to continue the bloodline")
-                            await home_channel.send(embed=brief_embed)
+            graveyard_channel = channels.channel(guild, 'graveyard')
+            for embed, brief_embed in death_embeds:
+                if graveyard_channel:
+                    outbox.send(graveyard_channel, embed=embed, reactions=('🇫',))
+                if home_channel and home_channel != graveyard_channel:
+                    outbox.send(home_channel, embed=brief_embed)
 
     @decay_task.before_loop
     async def before_decay(self) -> None:
@@ -219,7 +279,10 @@ class Decay(commands.Cog):
     @commands.is_owner()
     async def force_decay(self, ctx: commands.Context) -> None:
         """Force a decay cycle (owner only)"""
-        await self.decay_task()
+        if not self.bot.get_cog('Cluster').leads('decay'):
+            await ctx.send("⏰ Decay runs on another process in the cluster!")
+            return
+        await self.decay_task(force=True)
         await ctx.send("⏰ Forced decay cycle complete!")
 
 async def setup(bot: commands.Bot) -> None:
@@ -0,0 +1,181 @@
+"""
+Seth Diagnostics - Owner tools for looking inside the running bot
+"""
+import asyncio
+import io
+from datetime import UTC, datetime
+
+import discord
+from discord.ext import commands
+
+from config import (
+    LOOP_LAG_INTERVAL,
+    LOOP_SLOW_CALLBACK,
+    LOOP_STALL_HISTORY,
+    PROFILE_INTERVAL,
+    PROFILE_MAX_OVERHEAD,
+    PROFILE_MAX_SECONDS,
+    SLOW_QUERY_SECONDS,
+)
+from database import sql_stats
+from utils.formatting import SethVisuals
+from utils.metrics import LOOP_LAG, LOOP_STALLS
+from utils.profiler import AVAILABLE, SamplingProfiler
+from utils.stalls import CallbackTimer, Stall, StallLog, measure_lag
+
+# !dbstats order -> StatementStats attribute
+DBSTATS_ORDERS = {'time': 'seconds', 'calls': 'calls', 'rows': 'rows', 'slow': 'slow'}
+
+class Diagnostics(commands.Cog):
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self.profiler: SamplingProfiler | None = None
+        self.stalls = StallLog(LOOP_STALL_HISTORY)
+        self.timer = CallbackTimer(LOOP_SLOW_CALLBACK, self._stalled)
+        self.lag = 0.0  # seconds, at the last probe
+        self.max_lag = 0.0
+        self.lag_probe: asyncio.Task | None = None
+
+    async def cog_check(self, ctx: commands.Context) -> bool:
+        """Every command here is for the bot owner only, subcommands included"""
+        if not await self.bot.is_owner(ctx.author):
+            raise commands.NotOwner("You do not own this bot.")
+        return True
+
+    async def cog_load(self) -> None:
+        self.timer.install()
+        self.lag_probe = asyncio.create_task(measure_lag(LOOP_LAG_INTERVAL, self._lagged))
+
+    def cog_unload(self) -> None:
+        if self.profiler is not None:
+            self.profiler.stop()
+        self.timer.uninstall()
+        if self.lag_probe is not None:
+            self.lag_probe.cancel()
+
+    # ── Event loop ─────────────────────────────────────────────────────
+
+    def _lagged(self, seconds: float) -> None:
+        self.lag = seconds
+        self.max_lag = max(self.max_lag, seconds)
+        LOOP_LAG.labels().observe(seconds)
+
+    def _stalled(self, stall: Stall) -> None:
+        """Runs inside the event loop's callback timer, so it only records"""
+        self.stalls.record(stall)
+        LOOP_STALLS.labels().inc()
+        print(f"🐢 Event loop blocked {stall.seconds * 1000:.0f}ms at {stall.where}"
+              + (f" (!{stall.command})" if stall.command else ""))
+
+    @commands.command(name='lag')
+    async def lag_report(self, ctx: commands.Context) -> None:
+        """Event loop lag and the worst recent stalls (owner only)"""
+        if self.timer.covers(asyncio.get_running_loop()):
+            stalls = f"{self.stalls.total} callbacks held the loop over {LOOP_SLOW_CALLBACK * 1000:.0f}ms"
+        else:
+            stalls = "⚠️ Callback timing is inactive: this event loop (e.g. uvloop) does not run asyncio Handles"
+        embed = discord.Embed(
+            title="🐢 **Event Loop**",
+            description=f"Lag now **{self.lag * 1000:.0f}ms**, worst **{self.max_lag * 1000:.0f}ms**\n{stalls}",
+            color=0x3498db
+        )
+        worst = "\n".join(
+            f"**{stall.seconds * 1000:.0f}ms** `{stall.where}`"
+            + (f" in `!{stall.command}`" if stall.command else "")
+            + f" <t:{int(stall.at)}:R>"
+            for stall in self.stalls.worst(10)
+        )
+        embed.add_field(name=f"🧱 Worst of the Last {LOOP_STALL_HISTORY} Stalls", value=worst or "*None*", inline=False)
+        await ctx.send(embed=embed)
+
+    # ── Database ───────────────────────────────────────────────────────
+
+    @commands.command(name='dbstats')
+    async def dbstats(self, ctx: commands.Context, order: str = 'time') -> None:
+        """The most expensive SQL statements (owner only): !dbstats [time|calls|rows|slow|reset]"""
+        if order == 'reset':
+            sql_stats.reset()
+            await ctx.send("🗄️ SQL statement stats cleared.")
+            return
+        key = DBSTATS_ORDERS.get(order)
+        if key is None:
+            await ctx.send(f"🗄️ Order by one of: {', '.join(DBSTATS_ORDERS)} (or `reset`)")
+            return
+
+        embed = discord.Embed(
+            title=f"🗄️ **SQL Statements** by {order}",
+            description=f"{len(sql_stats.statements)} distinct statements; "
+                        f"slow means over {SLOW_QUERY_SECONDS * 1000:.0f}ms",
+            color=0x3498db
+        )
+        for stats in sql_stats.top(8, key):
+            lines = [
+                f"**{stats.calls}** calls, **{stats.seconds * 1000:.0f}ms** total, "
+                f"p99 **{stats.p99() * 1000:.1f}ms**, {stats.rows / max(stats.calls, 1):.1f} rows/call"
+                + (f", 🐌 {stats.slow} slow" if stats.slow else "")
+            ]
+            if stats.plan:
+                lines.append(f"```{stats.plan[:300]}```")
+            embed.add_field(name=stats.sql[:250], value="\n".join(lines), inline=False)
+        await ctx.send(embed=embed)
+
+    # ── Profiler ───────────────────────────────────────────────────────
+
+    @commands.group(name='profile', invoke_without_command=True)
+    async def profile(self, ctx: commands.Context) -> None:
+        """Sample the event loop's stacks (owner only)"""
+        await ctx.send("🔬 Usage: `!profile start` | `!profile stop` | `!profile dump`")
+
+    @profile.command(name='start')
+    async def profile_start(self, ctx: commands.Context) -> None:
+        if self.profiler is not None and self.profiler.running:
+            await ctx.send("🔬 Already profiling! Use `!profile stop` or `!profile dump`.")
+            return
+        if not AVAILABLE:
+            await ctx.send("🔬 Profiling needs a Unix host (SIGPROF).")
+            return
+        # Commands run on the main thread, which is where SIGPROF is handled
+        self.profiler = SamplingProfiler(PROFILE_INTERVAL, PROFILE_MAX_OVERHEAD, PROFILE_MAX_SECONDS)
+        self.profiler.start()
+        await ctx.send(
+            f"🔬 Profiling the event loop every {PROFILE_INTERVAL * 1000:.0f}ms of CPU "
+            f"(stops by itself after {SethVisuals.duration(PROFILE_MAX_SECONDS)})"
+        )
+
+    @profile.command(name='stop')
+    async def profile_stop(self, ctx: commands.Context) -> None:
+        if self.profiler is None or not self.profiler.running:
+            await ctx.send("🔬 Not profiling right now.")
+            return
+        self.profiler.stop()
+        await ctx.send(embed=self._profile_embed())
+
+    @profile.command(name='dump')
+    async def profile_dump(self, ctx: commands.Context) -> None:
+        """Attach the folded stacks so far; profiling carries on if it is running"""
+        if self.profiler is None or not self.profiler.samples:
+            await ctx.send("🔬 No samples yet! Use `!profile start` first.")
+            return
+        folded = io.BytesIO(self.profiler.folded().encode())
+        filename = f"seth-profile-{datetime.now(UTC):%Y%m%d-%H%M%S}.folded"
+        await ctx.send(embed=self._profile_embed(), file=discord.File(folded, filename=filename))
+
+    def _profile_embed(self) -> discord.Embed:
+        profiler = self.profiler
+        embed = discord.Embed(
+            title="🔬 **Event Loop Profile**",
+            description=(
+                f"**{profiler.samples}** samples over {profiler.elapsed:.0f}s "
+                f"({profiler.cpu_time:.1f}s CPU, {profiler.overhead:.2%} overhead){' - still running' if profiler.running else ''}"
+            ),
+            color=0x3498db
+        )
+        hottest = "\n".join(
+            f"`{name}` {count / profiler.samples:.1%}" for name, count in profiler.hottest(8)
+        )
+        embed.add_field(name="🔥 Hottest Functions", value=hottest or "*None*", inline=False)
+        embed.set_footer(text="Render the .folded file with flamegraph.pl or speedscope")
+        return embed
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(Diagnostics(bot))
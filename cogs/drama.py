@@ -8,19 +8,27 @@ from discord.ext import commands, tasks
 import aiosqlite
 import config
 import random
+import time
 from datetime import datetime
 import asyncio
 from typing import Optional
 from config import (
     MAX_RELATIONSHIP, MIN_RELATIONSHIP, DEFAULT_RELATIONSHIP_SCORE,
+    DRAMA_INTERVAL, DRAMA_TICK_SLACK,
     DRAMA_VOTE_DURATION, ROMANCE_DRAMA_CHANCE, CONFLICT_DRAMA_CHANCE,
     FIGHT_OUTCOME_CHANCE,
     LOVERS_THRESHOLD, FRIENDS_THRESHOLD, NEUTRAL_THRESHOLD, RIVALS_THRESHOLD,
     RECONCILE_BONUS, BREAKUP_PENALTY, FIGHT_PENALTY,
     FORGIVE_BONUS, JUSTICE_PENALTY, DRAMA_SPREAD_PENALTY,
     SUPPORT_BONUS, OPPOSE_PENALTY, ALLIANCE_BONUS, SCANDAL_PENALTY,
+    CLUSTERED,
 )
+from database import connect, write
 from utils.formatting import SethVisuals
+from utils.lease import CLAIM_TICK, tick_params
+from utils.metrics import LOOP_SECONDS, timed
+from utils.outbox import FLAVOR
+from utils.shards import guilds_by_shard
 
 class DramaV2(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
@@ -69,7 +77,8 @@ class DramaV2(commands.Cog):
         }
 
         self.active_drama: Optional[dict] = None
-        self.drama_channel: Optional[discord.TextChannel] = None
+        # event_id -> channels this process posted its votes in, for the resolution
+        self.posted: dict[int, list[discord.abc.Messageable]] = {}
 
         self.drama_loop.start()
 
@@ -80,7 +89,7 @@ class DramaV2(commands.Cog):
 
     async def get_relationship(self, npc1: str, npc2: str) -> tuple[int, str]:
         """Get relationship score between two NPCs"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with connect(self.db_path) as db:
             cursor = await db.execute('''
                 SELECT relationship_score, relationship_type
                 FROM npc_relationships
@@ -91,7 +100,7 @@ class DramaV2(commands.Cog):
 
     async def update_relationship(self, npc1: str, npc2: str, change: int, event_type: Optional[str] = None) -> tuple[int, str]:
         """Update relationship between NPCs"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with connect(self.db_path) as db:
             score, _ = await self.get_relationship(npc1, npc2)
             new_score = max(MIN_RELATIONSHIP, min(MAX_RELATIONSHIP, score + change))
 
@@ -117,7 +126,7 @@ class DramaV2(commands.Cog):
 
     async def get_npc_state(self, npc_name: str) -> tuple[str, Optional[str], Optional[str]]:
         """Get current NPC state"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with connect(self.db_path) as db:
             cursor = await db.execute('''
                 SELECT current_mood, dating, rival FROM npc_states
                 WHERE npc_name = ?
@@ -127,7 +136,7 @@ class DramaV2(commands.Cog):
 
     async def update_npc_state(self, npc_name: str, **kwargs: str | None) -> None:
         """Update NPC state"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with connect(self.db_path) as db:
             for key, value in kwargs.items():
                 await db.execute(f'''
                     UPDATE npc_states
@@ -183,7 +192,7 @@ class DramaV2(commands.Cog):
         """Generate drama based on current relationships"""
         npc_list = list(self.npcs.keys())
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async with connect(self.db_path) as db:
             cursor = await db.execute('''
                 SELECT npc1, npc2 FROM npc_relationships
                 WHERE relationship_type = 'lovers'
@@ -205,16 +214,29 @@ class DramaV2(commands.Cog):
 
     # ── drama_loop + helpers ───────────────────────────────────────────
 
-    def _find_drama_channel(self) -> Optional[discord.TextChannel]:
-        """Find the drama channel across all guilds"""
-        for guild in self.bot.guilds:
-            channel = discord.utils.get(guild.channels, name='village-drama')
-            if not channel:
-                channel = discord.utils.get(guild.channels, name='seth-graveyard')
-            if channel:
-                print(f"✅ Drama channel set to: #{channel.name}")
-                return channel
-        return None
+    def _drama_channels(self) -> dict[int, list[discord.TextChannel]]:
+        """Every guild's drama channel, grouped by shard"""
+        channels = self.bot.get_cog('Channels')
+        if not channels:
+            return {}
+        by_shard = {}
+        for shard_id, guilds in guilds_by_shard(self.bot).items():
+            found = [channel for channel in (channels.channel(guild, 'drama') for guild in guilds) if channel]
+            if found:
+                by_shard[shard_id] = found
+        return by_shard
+
+    async def _post_votes(self, channels: list[discord.TextChannel], embed: discord.Embed, options: list[str]) -> list[discord.Message]:
+        """Post one shard's vote messages, leaving out any that could not be sent"""
+        outbox = self.bot.get_cog('Outbox')
+        if not outbox:
+            return []
+        # Votes need their own message, so these never coalesce
+        posted = await asyncio.gather(*(
+            outbox.send(channel, embed=embed, reactions=tuple(options), priority=FLAVOR, coalesce=False)
+            for channel in channels
+        ))
+        return [message for message in posted if message is not None]
 
     async def _create_vote_embed(self, event_type: str, description: str, npc1: str, npc2: str) -> tuple[discord.Embed, list[str]]:
         """Create the voting embed and return it with the vote options"""
@@ -276,9 +298,9 @@ class DramaV2(commands.Cog):
 
         return embed, options
 
-    async def _store_drama_event(self, event_type: str, description: str, npc1: str, npc2: str, message: discord.Message, options: list[str]) -> None:
+    async def _store_drama_event(self, event_type: str, description: str, npc1: str, npc2: str, options: list[str]) -> int:
         """Store drama event in DB and set active_drama state"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with connect(self.db_path) as db:
             await db.execute('''
                 INSERT INTO drama_history (event_type, description, npc1, npc2)
                 VALUES (?, ?, ?, ?)
@@ -289,50 +311,116 @@ class DramaV2(commands.Cog):
             event_id = (await cursor.fetchone())[0]
 
         self.active_drama = {
-            'message_id': message.id,
             'event_id': event_id,
             'event_type': event_type,
             'npc1': npc1,
             'npc2': npc2,
             'options': options
         }
+        return event_id
 
-    @tasks.loop(minutes=5)
+    @tasks.loop(seconds=DRAMA_INTERVAL)
     async def drama_loop(self) -> None:
-        """Generate and post drama events"""
-        if not self.drama_channel:
-            self.drama_channel = self._find_drama_channel()
+        """Generate drama events; every process posts them in its own guilds.
 
-        if not self.drama_channel:
+        An event is skipped if any process started one less than
+        DRAMA_INTERVAL ago, so the old and new holder of a changing lease
+        never both run one.
+        """
+        if not self.bot.get_cog('Cluster').leads('drama'):
+            return
+        # Only a single process sees every guild, and so knows nobody would see the event
+        if not CLUSTERED and not self._drama_channels():
+            return
+
+        async def claim(db: aiosqlite.Connection) -> bool:
+            cursor = await db.execute(
+                CLAIM_TICK, tick_params('drama', time.time(), DRAMA_INTERVAL, DRAMA_TICK_SLACK)
+            )
+            return await cursor.fetchone() is not None
+
+        if not await write(claim):
             return
 
+        if await self.start_drama():
+            await asyncio.sleep(DRAMA_VOTE_DURATION)
+            await self.resolve_drama()
+
+    @timed(LOOP_SECONDS.labels('drama_start'))
+    async def start_drama(self) -> bool:
+        """Generate, store and publish a new event; False if none could be generated"""
         try:
             event_type, description, npc1, npc2, npc3 = await self.generate_drama_event()
         except Exception as e:
             print(f"Drama generation error: {e}")
-            return
+            return False
 
         embed, options = await self._create_vote_embed(event_type, description, npc1, npc2)
 
-        message = await self.drama_channel.send(embed=embed)
-        for emoji in options:
-            await message.add_reaction(emoji)
+        event_id = await self._store_drama_event(event_type, description, npc1, npc2, options)
+        await self.bot.get_cog('Cluster').publish('drama_started', event_id, embed.to_dict(), options)
+        return True
+
+    @commands.Cog.listener()
+    async def on_drama_started(self, event_id: int, embed_data: dict, options: list[str]) -> None:
+        """Post the vote in this process's guilds and record where it went"""
+        # Resolved every event so !setchannel and channel changes take effect
+        channels = self._drama_channels()
+        embed = discord.Embed.from_dict(embed_data)
+
+        # One village, one event: every shard posts it to its own guilds at once
+        posted = await asyncio.gather(*(
+            self._post_votes(shard_channels, embed, options) for shard_channels in channels.values()
+        ))
+        messages = [message for shard_messages in posted for message in shard_messages]
+        # Only the newest event can still be open
+        self.posted = {event_id: [message.channel for message in messages]}
+        if not messages:
+            return
+
+        async def record(db: aiosqlite.Connection) -> None:
+            await db.executemany(
+                "INSERT OR REPLACE INTO drama_posts (event_id, channel_id, message_id) VALUES (?, ?, ?)",
+                [(event_id, message.channel.id, message.id) for message in messages]
+            )
 
-        await self._store_drama_event(event_type, description, npc1, npc2, message, options)
+        await write(record)
 
-        await asyncio.sleep(DRAMA_VOTE_DURATION)
-        await self.resolve_drama()
+    @drama_loop.before_loop
+    async def before_drama(self) -> None:
+        # Cogs load before the gateway connects; channels exist only once ready
+        await self.bot.wait_until_ready()
 
     # ── resolve_drama + helpers ────────────────────────────────────────
 
-    def _count_votes(self, message: discord.Message, options: list[str]) -> tuple[dict[str, int], int]:
-        """Count votes from message reactions, returns (votes_dict, total)"""
+    def _count_votes(self, messages: list[discord.Message], options: list[str]) -> tuple[dict[str, int], int]:
+        """Count votes from every guild's message reactions, returns (votes_dict, total)"""
         votes: dict[str, int] = {opt: 0 for opt in options}
-        for reaction in message.reactions:
-            if str(reaction.emoji) in votes:
-                votes[str(reaction.emoji)] = reaction.count - 1  # Subtract bot's reaction
+        for message in messages:
+            for reaction in message.reactions:
+                if str(reaction.emoji) in votes:
+                    votes[str(reaction.emoji)] += reaction.count - 1  # Subtract bot's reaction
         return votes, sum(votes.values())
 
+    async def _fetch_votes(self, event_id: int) -> list[discord.Message]:
+        """Every process's vote messages for an event, with their current reactions"""
+        async with connect(self.db_path) as db:
+            cursor = await db.execute(
+                "SELECT channel_id, message_id FROM drama_posts WHERE event_id = ?", (event_id,)
+            )
+            posts = await cursor.fetchall()
+
+        # Fetched over HTTP, so messages in guilds on other processes' shards work too
+        async def fetch(channel_id: int, message_id: int) -> Optional[discord.Message]:
+            try:
+                return await self.bot.get_partial_messageable(channel_id).fetch_message(message_id)
+            except Exception as e:
+                print(f"Could not fetch drama message: {e}")
+                return None
+
+        fetched = await asyncio.gather(*(fetch(channel_id, message_id) for channel_id, message_id in posts))
+        return [message for message in fetched if message is not None]
+
     async def _apply_romance_outcome(self, npc1: str, npc2: str, winner_index: int, outcome: Optional[str]) -> str:
         """Apply romance_conflict resolution and return outcome text"""
         if winner_index == 0:
@@ -420,18 +508,19 @@ class DramaV2(commands.Cog):
 
         return embed
 
+    @timed(LOOP_SECONDS.labels('drama_resolve'))
     async def resolve_drama(self) -> None:
         """Resolve drama based on votes"""
-        if not self.active_drama or not self.drama_channel:
+        if not self.active_drama:
             return
 
-        try:
-            message = await self.drama_channel.fetch_message(self.active_drama['message_id'])
-        except Exception as e:
-            print(f"Could not fetch drama message: {e}")
+        event_id = self.active_drama['event_id']
+        messages = await self._fetch_votes(event_id)
+        if not messages:
+            self.active_drama = None
             return
 
-        votes, total = self._count_votes(message, self.active_drama['options'])
+        votes, total = self._count_votes(messages, self.active_drama['options'])
 
         npc1 = self.active_drama['npc1']
         npc2 = self.active_drama['npc2']
@@ -452,19 +541,31 @@ class DramaV2(commands.Cog):
             outcome = await self._apply_general_outcome(npc1, npc2, winner_index, outcome)
 
         embed = await self._create_resolution_embed(outcome, votes, npc1, npc2)
-        await self.drama_channel.send(embed=embed)
+        async def forget(db: aiosqlite.Connection) -> None:
+            await db.execute("DELETE FROM drama_posts WHERE event_id = ?", (event_id,))
+
+        await write(forget)
+        await self.bot.get_cog('Cluster').publish('drama_resolved', event_id, embed.to_dict())
 
         self.active_drama = None
 
+    @commands.Cog.listener()
+    async def on_drama_resolved(self, event_id: int, embed_data: dict) -> None:
+        """Post the outcome wherever this process posted the vote"""
+        embed = discord.Embed.from_dict(embed_data)
+        outbox = self.bot.get_cog('Outbox')
+        posted = self.posted.pop(event_id, [])
+        if not outbox:
+            return
+        for channel in posted:
+            outbox.send(channel, embed=embed, priority=FLAVOR)
+
     # ── Commands ───────────────────────────────────────────────────────
 
     @commands.command(name='drama')
     @commands.has_permissions(administrator=True)
     async def force_drama(self, ctx: commands.Context) -> None:
         """Force a drama event (admin only)"""
-        if not self.drama_channel:
-            self.drama_channel = ctx.channel
-
         event_type, description, npc1, npc2, npc3 = await self.generate_drama_event()
 
         embed = discord.Embed(
@@ -510,7 +611,7 @@ class DramaV2(commands.Cog):
             timestamp=datetime.utcnow()
         )
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async with connect(self.db_path) as db:
             cursor = await db.execute('''
                 SELECT npc1, npc2, relationship_type, relationship_score
                 FROM npc_relationships
@@ -592,7 +693,7 @@ class DramaV2(commands.Cog):
         npc_data = self.npcs[npc_name]
         state = await self.get_npc_state(npc_name)
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async with connect(self.db_path) as db:
             cursor = await db.execute('''
                 SELECT npc1, npc2, relationship_type, relationship_score
                 FROM npc_relationships
@@ -2,111 +2,285 @@
 Seth Economy System - Mining and Resources (EMOJI FIX)
 """
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import aiosqlite
-from datetime import datetime, timedelta
 import random
+import time
 import config
 from config import (
     FOOD_MINE_MIN, FOOD_MINE_MAX,
     MEDICINE_MINE_MIN, MEDICINE_MINE_MAX,
     COAL_MINE_MIN, COAL_MINE_MAX,
+    MINE_COOLDOWN, PREMIUM_MINE_COOLDOWN, EXPEDITION_MAX_DURATION,
+    LEDGER_RETENTION, LEDGER_COMPACT_INTERVAL, CLUSTERED,
 )
+from database import MINE_UPSERT, connect, record_ledger, ledger_balance, compact_ledger, write, living_seth
+from utils.expedition import mining_windows, expedition_yield
+from utils.formatting import SethVisuals
+from utils.metrics import LOOP_SECONDS, timed
+from utils.timing_wheel import TimingWheel
 
 class Economy(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
         self.db_path = config.DATABASE_PATH
-        self.cooldowns: dict[int, datetime] = {}
+        # user_id -> when the longest (non-premium) cooldown ends; only
+        # recent miners are held, expired entries fall off the wheel
+        self.cooldowns = TimingWheel(tick=1, slots=MINE_COOLDOWN)
+        # user_id -> (expedition start, its mining cooldown); !mine is off while one is running
+        self.expeditions: dict[int, tuple[int, int]] = {}
         self.food_emoji = "🍖"
         self.medicine_emoji = "💊"
         self.coal_emoji = "⚫"
         self.star_emoji = "⭐"
+        self.compact_task.start()
+
+    def cog_unload(self) -> None:
+        self.compact_task.cancel()
+
+    async def cog_load(self) -> None:
+        """Restore cooldowns that were still running when the bot stopped"""
+        now = int(time.time())
+        async with connect(self.db_path) as db:
+            cursor = await db.execute(
+                "SELECT user_id, last_mine_time FROM resources WHERE last_mine_time > ?",
+                (now - MINE_COOLDOWN,)
+            )
+            async for user_id, last_mine_time in cursor:
+                self.cooldowns.schedule(user_id, last_mine_time + MINE_COOLDOWN)
+
+            # Expeditions from before the cooldown was recorded run at the standard rate
+            cursor = await db.execute(
+                """SELECT user_id, expedition_start, COALESCE(expedition_cooldown, ?)
+                FROM resources WHERE expedition_start IS NOT NULL""",
+                (MINE_COOLDOWN,)
+            )
+            self.expeditions = {user_id: (start, cooldown) async for user_id, start, cooldown in cursor}
+
+    async def cog_before_invoke(self, ctx: commands.Context) -> None:
+        """In cluster mode, reload the caller's cooldown and expedition first:
+        they may have mined in a guild that another process runs"""
+        if not CLUSTERED:
+            return
+        user_id = ctx.author.id
+        async with connect(self.db_path) as db:
+            cursor = await db.execute(
+                """SELECT last_mine_time, expedition_start, COALESCE(expedition_cooldown, ?)
+                FROM resources WHERE user_id = ?""",
+                (MINE_COOLDOWN, user_id)
+            )
+            last_mine_time, expedition_start, expedition_cooldown = await cursor.fetchone() or (None, None, None)
+
+        if last_mine_time is not None and last_mine_time + MINE_COOLDOWN > time.time():
+            self.cooldowns.schedule(user_id, last_mine_time + MINE_COOLDOWN)
+        else:
+            self.cooldowns.cancel(user_id)
+        if expedition_start is None:
+            self.expeditions.pop(user_id, None)
+        else:
+            self.expeditions[user_id] = (expedition_start, expedition_cooldown)
+
+    def _seconds_since_mine(self, user_id: int, now: float) -> float | None:
+        """Seconds since this user last mined, if within the cooldown window"""
+        self.cooldowns.advance(now)
+        deadline = self.cooldowns.get(user_id)
+        if deadline is None:
+            return None
+        return now - (deadline - MINE_COOLDOWN)
+
+    @staticmethod
+    def _is_premium(ctx: commands.Context) -> bool:
+        premium_role = discord.utils.get(ctx.guild.roles, name="Premium") if ctx.guild else None
+        return premium_role in ctx.author.roles if premium_role else False
 
     @commands.command(name='mine')
     async def mine(self, ctx: commands.Context) -> None:
         """Mine for resources with cooldown"""
         user_id = ctx.author.id
 
+        if user_id in self.expeditions:
+            await ctx.send("🧭 Your Seth is away on an expedition! Use `!claim` to bring them home first.")
+            return
+
         # Check if user has Premium role
-        premium_role = discord.utils.get(ctx.guild.roles, name="Premium")
-        is_premium = premium_role in ctx.author.roles if premium_role else False
+        is_premium = self._is_premium(ctx)
         cooldown_seconds = config.PREMIUM_MINE_COOLDOWN if is_premium else config.MINE_COOLDOWN
 
         # Check cooldown
-        if user_id in self.cooldowns:
-            time_diff = datetime.now() - self.cooldowns[user_id]
-            if time_diff < timedelta(seconds=cooldown_seconds):
-                remaining = cooldown_seconds - int(time_diff.total_seconds())
-                premium_msg = f" {self.star_emoji} (Premium: {config.PREMIUM_MINE_COOLDOWN}s cooldown)" if is_premium else ""
-                await ctx.send(f"⏳ **Mining Cooldown**\nYou must wait **{remaining} seconds** before mining again!{premium_msg}")
-                return
+        now = time.time()
+        elapsed = self._seconds_since_mine(user_id, now)
+        if elapsed is not None and elapsed < cooldown_seconds:
+            remaining = cooldown_seconds - int(elapsed)
+            premium_msg = f" {self.star_emoji} (Premium: {config.PREMIUM_MINE_COOLDOWN}s cooldown)" if is_premium else ""
+            await ctx.send(f"⏳ **Mining Cooldown**\nYou must wait **{remaining} seconds** before mining again!{premium_msg}")
+            return
 
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute(
-                "SELECT name FROM seths WHERE user_id = ? AND is_alive = 1",
-                (user_id,)
-            )
-            seth = await cursor.fetchone()
+        if not await living_seth(user_id):
+            await ctx.send("❌ You need a living Seth to mine! Use `!start [name]`")
+            return
 
-            if not seth:
-                await ctx.send("❌ You need a living Seth to mine! Use `!start [name]`")
-                return
+        food = random.randint(FOOD_MINE_MIN, FOOD_MINE_MAX)
+        medicine = random.randint(MEDICINE_MINE_MIN, MEDICINE_MINE_MAX)
+        coal = random.randint(COAL_MINE_MIN, COAL_MINE_MAX)
+
+        async def credit_haul(db: aiosqlite.Connection) -> tuple | None:
+            # One statement: require a living Seth, credit the haul, stamp the
+            # cooldown and hand back the new totals
+            cursor = await db.execute(MINE_UPSERT, (user_id, food, medicine, coal, int(now), user_id))
+            mined = await cursor.fetchone()
+            if mined:
+                await record_ledger(db, [(user_id, food, medicine, coal, 'mine')])
+            return mined
+
+        mined = await write(credit_haul)
+        if not mined:
+            await ctx.send("❌ You need a living Seth to mine! Use `!start [name]`")
+            return
+
+        totals = mined[:3]
+        seth_name = mined[3]
+
+        self.cooldowns.schedule(user_id, int(now) + MINE_COOLDOWN)
 
-            seth_name = seth[0]
+        embed = discord.Embed(
+            title="⛏️ Mining Complete!",
+            description=f"{seth_name} gathered resources!",
+            color=0x8B4513
+        )
 
-            food = random.randint(FOOD_MINE_MIN, FOOD_MINE_MAX)
-            medicine = random.randint(MEDICINE_MINE_MIN, MEDICINE_MINE_MAX)
-            coal = random.randint(COAL_MINE_MIN, COAL_MINE_MAX)
+        found_str = f"{self.food_emoji} Food: +{food}   {self.medicine_emoji} Medicine: +{medicine}   {self.coal_emoji} Coal: +{coal}"
+        embed.add_field(name="Found", value=found_str, inline=False)
 
-            await db.execute(
-                """INSERT OR REPLACE INTO resources (user_id, food, medicine, coal)
-                VALUES (?,
-                    COALESCE((SELECT food FROM resources WHERE user_id = ?), 0) + ?,
-                    COALESCE((SELECT medicine FROM resources WHERE user_id = ?), 0) + ?,
-                    COALESCE((SELECT coal FROM resources WHERE user_id = ?), 0) + ?)""",
-                (user_id, user_id, food, user_id, medicine, user_id, coal)
+        inv_str = f"{self.food_emoji} {totals[0]}   {self.medicine_emoji} {totals[1]}   {self.coal_emoji} {totals[2]}"
+        embed.add_field(name="Total Inventory", value=inv_str, inline=False)
+
+        cooldown_msg = f"Next mine in {cooldown_seconds} seconds"
+        if is_premium:
+            cooldown_msg = f"{cooldown_msg} {self.star_emoji} (Premium bonus!)"
+        embed.set_footer(text=cooldown_msg)
+
+        await ctx.send(embed=embed)
+
+    @commands.command(name='expedition')
+    async def expedition(self, ctx: commands.Context) -> None:
+        """Send your Seth mining while you're away"""
+        user_id = ctx.author.id
+        now = int(time.time())
+
+        if user_id in self.expeditions:
+            elapsed = now - self.expeditions[user_id][0]
+            await ctx.send(
+                f"🧭 Already on an expedition for **{SethVisuals.duration(elapsed)}**. "
+                f"Use `!claim` to collect what your Seth has found!"
             )
-            await db.commit()
+            return
+
+        # The rate is fixed now, so a Premium role gained later doesn't pay for the whole trip
+        cooldown_seconds = PREMIUM_MINE_COOLDOWN if self._is_premium(ctx) else MINE_COOLDOWN
 
+        async def set_out(db: aiosqlite.Connection) -> tuple | None:
             cursor = await db.execute(
-                "SELECT food, medicine, coal FROM resources WHERE user_id = ?",
-                (user_id,)
+                """INSERT INTO resources (user_id, food, medicine, coal, expedition_start, expedition_cooldown)
+                SELECT ?, 0, 0, 0, ?, ?
+                WHERE EXISTS (SELECT 1 FROM seths WHERE user_id = ? AND is_alive = 1)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    expedition_start = excluded.expedition_start,
+                    expedition_cooldown = excluded.expedition_cooldown
+                RETURNING (SELECT name FROM seths WHERE user_id = resources.user_id AND is_alive = 1)""",
+                (user_id, now, cooldown_seconds, user_id)
             )
-            totals = await cursor.fetchone()
+            return await cursor.fetchone()
 
-            self.cooldowns[user_id] = datetime.now()
+        started = await write(set_out)
 
-            embed = discord.Embed(
-                title="⛏️ Mining Complete!",
-                description=f"{seth_name} gathered resources!",
-                color=0x8B4513
+        if not started:
+            await ctx.send("❌ You need a living Seth to go on an expedition! Use `!start [name]`")
+            return
+
+        self.expeditions[user_id] = (now, cooldown_seconds)
+        embed = discord.Embed(
+            title="🧭 Expedition Started!",
+            description=f"{started[0]} heads into the mines and will keep digging while you're away.",
+            color=0x8B4513
+        )
+        embed.add_field(
+            name="How it works",
+            value=f"Every {cooldown_seconds}s away counts as one `!mine` "
+                  f"(up to {SethVisuals.duration(EXPEDITION_MAX_DURATION)}).\n"
+                  f"Use `!claim` to collect everything at once. `!mine` is paused until then.",
+            inline=False
+        )
+        await ctx.send(embed=embed)
+
+    @commands.command(name='claim')
+    async def claim(self, ctx: commands.Context) -> None:
+        """End your expedition and collect what was found"""
+        user_id = ctx.author.id
+        if user_id not in self.expeditions:
+            await ctx.send("🧭 You're not on an expedition! Use `!expedition` to start one.")
+            return
+
+        start, cooldown_seconds = self.expeditions[user_id]
+        now = int(time.time())
+        windows = mining_windows(now - start, cooldown_seconds, EXPEDITION_MAX_DURATION)
+        if windows == 0:
+            await ctx.send(f"⏳ Nothing found yet! Come back in **{cooldown_seconds - (now - start)} seconds**.")
+            return
+
+        food, medicine, coal = expedition_yield(windows)
+        async def collect(db: aiosqlite.Connection) -> tuple[str, tuple | None]:
+            # Matching on the start time means a second !claim can't pay out twice,
+            # and only the Seth that set out (born no later) can bring the haul home
+            cursor = await db.execute(
+                """UPDATE resources
+                SET food = food + ?, medicine = medicine + ?, coal = coal + ?,
+                    expedition_start = NULL, expedition_cooldown = NULL
+                WHERE user_id = ? AND expedition_start = ?
+                AND EXISTS (SELECT 1 FROM seths WHERE user_id = ? AND is_alive = 1 AND birth_ts <= ?)
+                RETURNING food, medicine, coal""",
+                (food, medicine, coal, user_id, start, user_id, start)
             )
+            totals = await cursor.fetchone()
+            if totals:
+                await record_ledger(db, [(user_id, food, medicine, coal, 'expedition')])
+                return 'claimed', totals
 
-            found_str = f"{self.food_emoji} Food: +{food}   {self.medicine_emoji} Medicine: +{medicine}   {self.coal_emoji} Coal: +{coal}"
-            embed.add_field(name="Found", value=found_str, inline=False)
+            # The Seth died while away: the expedition ends with nothing
+            cursor = await db.execute(
+                """UPDATE resources SET expedition_start = NULL, expedition_cooldown = NULL
+                WHERE user_id = ? AND expedition_start = ?""",
+                (user_id, start)
+            )
+            return ('lost' if cursor.rowcount == 1 else 'claimed_before'), None
 
-            inv_str = f"{self.food_emoji} {totals[0]}   {self.medicine_emoji} {totals[1]}   {self.coal_emoji} {totals[2]}"
-            embed.add_field(name="Total Inventory", value=inv_str, inline=False)
+        outcome, totals = await write(collect)
 
-            cooldown_msg = f"Next mine in {cooldown_seconds} seconds"
-            if is_premium:
-                cooldown_msg = f"{cooldown_msg} {self.star_emoji} (Premium bonus!)"
-            embed.set_footer(text=cooldown_msg)
+        self.expeditions.pop(user_id, None)
+        if outcome == 'lost':
+            await ctx.send("💀 Your Seth never came back from the expedition... nothing was recovered.")
+            return
+        if outcome == 'claimed_before':
+            await ctx.send("🧭 That expedition has already been claimed!")
+            return
 
-            await ctx.send(embed=embed)
+        embed = discord.Embed(
+            title="🎒 Expedition Complete!",
+            description=f"Your Seth mined **{windows}** times over **{SethVisuals.duration(now - start)}**!",
+            color=0x8B4513
+        )
+        found_str = f"{self.food_emoji} Food: +{food}   {self.medicine_emoji} Medicine: +{medicine}   {self.coal_emoji} Coal: +{coal}"
+        embed.add_field(name="Found", value=found_str, inline=False)
+        inv_str = f"{self.food_emoji} {totals[0]}   {self.medicine_emoji} {totals[1]}   {self.coal_emoji} {totals[2]}"
+        embed.add_field(name="Total Inventory", value=inv_str, inline=False)
+        await ctx.send(embed=embed)
 
     @commands.command(name='inventory', aliases=['inv'])
     async def inventory(self, ctx: commands.Context) -> None:
         """Check your resources"""
         user_id = ctx.author.id
 
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute(
-                "SELECT food, medicine, coal FROM resources WHERE user_id = ?",
-                (user_id,)
-            )
-            resources = await cursor.fetchone()
+        async with connect(self.db_path) as db:
+            resources = await ledger_balance(db, user_id)
 
             if not resources:
                 await ctx.send("📦 You have no resources! Use `!mine` to gather some.")
@@ -123,5 +297,18 @@ class Economy(commands.Cog):
 
             await ctx.send(embed=embed)
 
+    @tasks.loop(seconds=LEDGER_COMPACT_INTERVAL)
+    @timed(LOOP_SECONDS.labels('ledger_compact'))
+    async def compact_task(self) -> None:
+        """Fold resource history older than LEDGER_RETENTION into snapshots"""
+        async with connect(self.db_path) as db:
+            folded = await compact_ledger(db, int(time.time()) - LEDGER_RETENTION)
+        if folded:
+            print(f"📒 Compacted {folded} ledger entries")
+
+    @compact_task.before_loop
+    async def before_compact(self) -> None:
+        await self.bot.wait_until_ready()
+
 async def setup(bot: commands.Bot) -> None:
     await bot.add_cog(Economy(bot))
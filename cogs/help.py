@@ -32,8 +32,10 @@ class Help(commands.Cog):
             embed.add_field(
                 name="⛏️ Economy",
                 value="`!mine` - Gather resources (cooldown)\n"
+                      "`!expedition` / `!claim` - Mine while you're away\n"
                       "`!inventory` - View your resources\n"
-                      "`!trade @user [type] [amount]` - Trade resources",
+                      "`!trade @user [type] [amount]` - Trade resources\n"
+                      "`!market` - Buy and sell resources on the order book",
                 inline=False
             )
 
@@ -47,17 +49,20 @@ class Help(commands.Cog):
 
             embed.add_field(
                 name="🌍 Social",
-                value="`!server` - View all living Seths\n"
+                value="`!server` - Browse this server's living Seths\n"
                       "`!compare @user` - Compare Seths\n"
-                      "`!top` - Longest living Seths leaderboard",
+                      "`!rank` / `!rankings` - Score leaderboard\n"
+                      "`!top` - Longest living Seths leaderboard\n"
+                      "`!census` - Server health & lifespan stats",
                 inline=False
             )
 
             embed.add_field(
                 name="⚙️ System",
-                value="`!ping` - Check bot latency\n"
+                value="`!ping` - Check bot and shard latency\n"
                       "`!test` - Test database connection\n"
-                      "`!drama` - Trigger event (Admin only)",
+                      "`!drama` - Trigger event (Admin only)\n"
+                      "`!setchannel [home/graveyard/drama] #channel` - Route announcements (Manage Server)",
                 inline=False
             )
 
@@ -92,11 +97,30 @@ class Help(commands.Cog):
                     'example': '!mine',
                     'note': 'Premium: 30s cooldown | Normal: 60s'
                 },
+                'expedition': {
+                    'usage': '!expedition',
+                    'desc': 'Send your Seth mining while you are away, then `!claim` the haul',
+                    'example': '!expedition',
+                    'note': 'Each cooldown spent away counts as one !mine, up to 12 hours. !mine is paused until you claim'
+                },
                 'trade': {
-                    'usage': '!trade @user [food/medicine/coal] [amount]',
+                    'usage': '!trade @user [food/medicine/coal] [amount] ...',
                     'desc': 'Trade resources with another player',
-                    'example': '!trade @friend food 3',
-                    'note': 'Target must accept within 30 seconds'
+                    'example': '!trade @friend food 3 coal 2',
+                    'note': 'Target must accept within 30 seconds; settles all-or-nothing'
+                },
+                'market': {
+                    'usage': '!market buy|sell [pair] [quantity] [price]',
+                    'desc': 'Post a standing order; it fills against the best opposite orders',
+                    'example': '!market buy food/coal 5 2',
+                    'note': 'Pairs: food/coal, medicine/coal, medicine/food. '
+                            'What an order could cost is held until it fills or you `!market cancel` it'
+                },
+                'setchannel': {
+                    'usage': '!setchannel [home/graveyard/drama] #channel',
+                    'desc': 'Choose where warnings, deaths or drama are announced in this server',
+                    'example': '!setchannel graveyard #memorials',
+                    'note': 'Needs Manage Server. Leave out the channel to use #seth-home, #seth-graveyard or #village-drama again'
                 }
             }
 
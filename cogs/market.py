@@ -0,0 +1,325 @@
+"""
+Seth Market - Standing bids and asks between resources (STANDARDIZED VISUALS)
+"""
+import aiosqlite
+import discord
+from discord.ext import commands
+
+import config
+from config import (
+    CLUSTERED,
+    MARKET_DEPTH,
+    MARKET_MAX_ORDERS,
+    MARKET_MAX_PRICE,
+    MARKET_MAX_QUANTITY,
+)
+from database import connect, living_seth, record_ledger, write
+from utils.orderbook import (
+    BUY,
+    PAIRS,
+    SELL,
+    Fill,
+    Order,
+    OrderBook,
+    escrow,
+    pair_name,
+    settlement,
+)
+from utils.trade import RESOURCE_EMOJIS, RESOURCES, bundle_amounts
+
+USAGE = "❌ Usage: `!market buy|sell [pair] [quantity] [price]` e.g. `!market buy food/coal 5 2`"
+
+class Market(commands.Cog):
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self.db_path = config.DATABASE_PATH
+        self.pairs = {pair_name(base, quote): (base, quote) for base, quote in PAIRS}
+        self.books = {name: OrderBook() for name in self.pairs}
+
+    async def cog_load(self) -> None:
+        await self._load_books()
+
+    async def _load_books(self) -> None:
+        """(Re)build every book from the saved resting orders"""
+        books = {name: OrderBook() for name in self.pairs}
+        async with connect(self.db_path) as db:
+            cursor = await db.execute(
+                "SELECT order_id, user_id, pair, side, price, quantity FROM market_orders ORDER BY order_id"
+            )
+            async for order_id, user_id, pair, side, price, quantity in cursor:
+                if pair in books:
+                    books[pair].load(Order(order_id, user_id, side, price, quantity))
+        self.books = books
+
+    async def _reload_book(self, db: aiosqlite.Connection, pair: str) -> OrderBook:
+        """Rebuild one book from the saved resting orders; it replaces the old one once complete"""
+        book = OrderBook()
+        cursor = await db.execute(
+            "SELECT order_id, user_id, side, price, quantity FROM market_orders WHERE pair = ? ORDER BY order_id",
+            (pair,)
+        )
+        async for order_id, user_id, side, price, quantity in cursor:
+            book.load(Order(order_id, user_id, side, price, quantity))
+        self.books[pair] = book
+        return book
+
+    async def _refresh(self, *pairs: str) -> None:
+        """In cluster mode other processes trade too, so reread the books a command shows"""
+        if not CLUSTERED:
+            return
+        async with connect(self.db_path) as db:
+            for pair in pairs:
+                await self._reload_book(db, pair)
+
+    def _amounts(self, pair: str, base_amount: int, quote_amount: int) -> tuple[int, int, int]:
+        """(food, medicine, coal) for amounts of a pair's base and quote"""
+        base, quote = self.pairs[pair]
+        return bundle_amounts({base: base_amount, quote: quote_amount})
+
+    def _price_label(self, pair: str, price: int) -> str:
+        base, quote = self.pairs[pair]
+        return f"{price} {RESOURCE_EMOJIS[quote]} per {RESOURCE_EMOJIS[base]}"
+
+    # ── Commands ───────────────────────────────────────────────────────
+
+    @commands.group(name='market', invoke_without_command=True)
+    async def market(self, ctx: commands.Context) -> None:
+        """Show the best bid and ask for every pair"""
+        await self._refresh(*self.pairs)
+        embed = discord.Embed(
+            title="📈 **Seth Market**",
+            description="Post standing orders to swap resources. Orders fill automatically!",
+            color=0x3498db
+        )
+        for name, book in self.books.items():
+            bid, ask = book.best(BUY), book.best(SELL)
+            embed.add_field(
+                name=f"{RESOURCE_EMOJIS[self.pairs[name][0]]} {name}",
+                value=(
+                    f"Best bid: **{bid.price if bid else '—'}** | Best ask: **{ask.price if ask else '—'}**\n"
+                    f"Open orders: {len(book)}"
+                ),
+                inline=False
+            )
+        embed.add_field(
+            name="Usage",
+            value="`!market buy food/coal 5 2` - buy 5 food at 2 coal each\n"
+                  "`!market sell food/coal 5 3` - sell 5 food at 3 coal each\n"
+                  "`!market book food/coal` | `!market orders` | `!market cancel [id]`",
+            inline=False
+        )
+        embed.set_footer(text="Prices are in the second resource, per unit of the first")
+        await ctx.send(embed=embed)
+
+    @market.command(name='book')
+    async def book(self, ctx: commands.Context, pair: str) -> None:
+        """Show the depth of one pair"""
+        pair = pair.lower()
+        if pair not in self.books:
+            await ctx.send(f"❌ Unknown pair! Choose: {', '.join(f'`{name}`' for name in self.pairs)}")
+            return
+
+        await self._refresh(pair)
+        book = self.books[pair]
+        embed = discord.Embed(title=f"📖 **Order Book: {pair}**", color=0x3498db)
+        for side, title in ((SELL, "🔴 Asks"), (BUY, "🟢 Bids")):
+            levels = book.levels(side, MARKET_DEPTH)
+            value = "\n".join(f"**{qty}** @ {self._price_label(pair, price)}" for price, qty in levels)
+            embed.add_field(name=title, value=value or "*Empty*", inline=True)
+        await ctx.send(embed=embed)
+
+    @market.command(name='buy')
+    async def buy(self, ctx: commands.Context, pair: str, quantity: int, price: int) -> None:
+        """Bid for the first resource of a pair, paying in the second"""
+        await self._place(ctx, BUY, pair.lower(), quantity, price)
+
+    @market.command(name='sell')
+    async def sell(self, ctx: commands.Context, pair: str, quantity: int, price: int) -> None:
+        """Offer the first resource of a pair for the second"""
+        await self._place(ctx, SELL, pair.lower(), quantity, price)
+
+    async def _place(self, ctx: commands.Context, side: str, pair: str, quantity: int, price: int) -> None:
+        if pair not in self.books:
+            await ctx.send(f"❌ Unknown pair! Choose: {', '.join(f'`{name}`' for name in self.pairs)}")
+            return
+        if not 0 < quantity <= MARKET_MAX_QUANTITY or not 0 < price <= MARKET_MAX_PRICE:
+            await ctx.send(
+                f"❌ Quantity must be 1-{MARKET_MAX_QUANTITY} and price 1-{MARKET_MAX_PRICE}!\n{USAGE}"
+            )
+            return
+
+        user_id = ctx.author.id
+        held = self._amounts(pair, *escrow(side, price, quantity))
+
+        if not await living_seth(user_id):
+            await ctx.send("💀 You need a living Seth to use the market!")
+            return
+
+        async def place(db: aiosqlite.Connection) -> tuple[str, Order | None, list[Fill]]:
+            cursor = await db.execute(
+                "SELECT COUNT(*) FROM market_orders WHERE user_id = ?", (user_id,)
+            )
+            if (await cursor.fetchone())[0] >= MARKET_MAX_ORDERS:
+                return 'too_many', None, []
+
+            # Escrow what the order could cost, guarded like a trade debit
+            cursor = await db.execute(
+                """UPDATE resources
+                SET food = food - ?, medicine = medicine - ?, coal = coal - ?
+                WHERE user_id = ? AND food >= ? AND medicine >= ? AND coal >= ?""",
+                (*held, user_id, *held)
+            )
+            if cursor.rowcount != 1:
+                return 'short', None, []
+
+            await record_ledger(db, [(user_id, *(-amount for amount in held), 'market_escrow')])
+
+            # Mutations run one at a time on the writer, so matching here
+            # sees the book exactly as the committed orders left it
+            book = self.books[pair]
+            if CLUSTERED:
+                # ...but only this process's writer. The batch holds the database
+                # write lock, so rereading the book (before this order is in it)
+                # is just as exact
+                book = await self._reload_book(db, pair)
+
+            cursor = await db.execute(
+                """INSERT INTO market_orders (user_id, pair, side, price, quantity)
+                VALUES (?, ?, ?, ?, ?) RETURNING order_id""",
+                (user_id, pair, side, price, quantity)
+            )
+            order = Order((await cursor.fetchone())[0], user_id, side, price, quantity)
+            fills = book.add(order)
+            await self._record_fills(db, pair, order, fills)
+            return 'placed', order, fills
+
+        try:
+            outcome, order, fills = await write(place)
+        except Exception:
+            # The book may already have matched in memory; resync it with what was saved
+            await self._load_books()
+            raise
+
+        if outcome == 'too_many':
+            await ctx.send(f"❌ You already have {MARKET_MAX_ORDERS} open orders! Cancel one first.")
+        elif outcome == 'short':
+            base, quote = self.pairs[pair]
+            needed = quantity if side == SELL else price * quantity
+            resource = base if side == SELL else quote
+            await ctx.send(f"❌ Not enough {resource}! This order needs {RESOURCE_EMOJIS[resource]} **{needed}**.")
+        else:
+            await ctx.send(embed=self._placed_embed(pair, order, quantity, fills))
+
+    async def _record_fills(self, db: aiosqlite.Connection, pair: str, taker: Order, fills: list[Fill]) -> None:
+        """Write remaining quantities and credit both sides of every fill"""
+        for order in [fill.maker for fill in fills] + [taker]:
+            if order.quantity:
+                await db.execute(
+                    "UPDATE market_orders SET quantity = ? WHERE order_id = ?",
+                    (order.quantity, order.order_id)
+                )
+            else:
+                await db.execute("DELETE FROM market_orders WHERE order_id = ?", (order.order_id,))
+
+        credits = [(user_id, *self._amounts(pair, base, quote)) for user_id, (base, quote) in settlement(fills).items()]
+        await db.executemany(
+            """INSERT INTO resources (user_id, food, medicine, coal) VALUES (?, ?, ?, ?)
+            ON CONFLICT (user_id) DO UPDATE SET
+                food = food + excluded.food,
+                medicine = medicine + excluded.medicine,
+                coal = coal + excluded.coal""",
+            credits
+        )
+        await record_ledger(db, [(*credit, 'market_fill') for credit in credits])
+
+    def _placed_embed(self, pair: str, order: Order, quantity: int, fills: list[Fill]) -> discord.Embed:
+        base, quote = self.pairs[pair]
+        filled = quantity - order.quantity
+        verb = "Bought" if order.side == BUY else "Sold"
+        embed = discord.Embed(
+            title="✅ **Order Filled!**" if not order.quantity else "📈 **Order Placed**",
+            description=f"{order.side.capitalize()} {RESOURCE_EMOJIS[base]} **{quantity}** {base} "
+                        f"@ {self._price_label(pair, order.price)}",
+            color=0x2ecc71 if filled else 0xf39c12
+        )
+        if filled:
+            cost = sum(fill.price * fill.quantity for fill in fills)
+            embed.add_field(
+                name=f"{verb} Now",
+                value=f"{RESOURCE_EMOJIS[base]} **{filled}** for {RESOURCE_EMOJIS[quote]} **{cost}**",
+                inline=True
+            )
+        if order.quantity:
+            embed.add_field(
+                name="Resting",
+                value=f"**{order.quantity}** left on the book (Order #{order.order_id})",
+                inline=True
+            )
+        return embed
+
+    @market.command(name='orders')
+    async def orders(self, ctx: commands.Context) -> None:
+        """List your open orders"""
+        async with connect(self.db_path) as db:
+            cursor = await db.execute(
+                """SELECT order_id, pair, side, price, quantity FROM market_orders
+                WHERE user_id = ? ORDER BY order_id""",
+                (ctx.author.id,)
+            )
+            rows = await cursor.fetchall()
+
+        if not rows:
+            await ctx.send("📭 You have no open orders. Try `!market`!")
+            return
+
+        embed = discord.Embed(title=f"📋 **{ctx.author.name}'s Orders**", color=0x3498db)
+        embed.description = "\n".join(
+            f"`#{order_id}` {side.upper()} **{qty}** {pair} @ {self._price_label(pair, price)}"
+            for order_id, pair, side, price, qty in rows
+        )
+        await ctx.send(embed=embed)
+
+    @market.command(name='cancel')
+    async def cancel(self, ctx: commands.Context, order_id: int) -> None:
+        """Cancel one of your open orders and get its escrow back"""
+        async def withdraw(db: aiosqlite.Connection) -> tuple[int, int, int] | None:
+            cursor = await db.execute(
+                """DELETE FROM market_orders WHERE order_id = ? AND user_id = ?
+                RETURNING pair, side, price, quantity""",
+                (order_id, ctx.author.id)
+            )
+            row = await cursor.fetchone()
+            if not row:
+                return None
+
+            pair, side, price, quantity = row
+            refund = self._amounts(pair, *escrow(side, price, quantity))
+            await db.execute(
+                """INSERT INTO resources (user_id, food, medicine, coal) VALUES (?, ?, ?, ?)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    food = food + excluded.food,
+                    medicine = medicine + excluded.medicine,
+                    coal = coal + excluded.coal""",
+                (ctx.author.id, *refund)
+            )
+            await record_ledger(db, [(ctx.author.id, *refund, 'market_refund')])
+            self.books[pair].cancel(order_id)
+            return refund
+
+        try:
+            refund = await write(withdraw)
+        except Exception:
+            await self._load_books()
+            raise
+        if refund is None:
+            await ctx.send(f"❌ You have no open order #{order_id}!")
+            return
+
+        returned = " + ".join(
+            f"{RESOURCE_EMOJIS[resource]} **{amount}**"
+            for resource, amount in zip(RESOURCES, refund) if amount
+        )
+        await ctx.send(f"🗑️ Order #{order_id} cancelled. Returned {returned}.")
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(Market(bot))
@@ -0,0 +1,73 @@
+"""
+Seth Members - Indexed lookup of guild members by name
+"""
+import discord
+from discord.ext import commands
+
+from utils.names import NameIndex
+
+
+def _member_names(member: discord.Member) -> tuple[str | None, ...]:
+    return member.name, member.global_name, member.nick
+
+class Members(commands.Cog):
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self.indexes: dict[int, NameIndex] = {}
+
+    def _index(self, guild: discord.Guild) -> NameIndex:
+        """The guild's name index, built from the member cache on first use"""
+        index = self.indexes.get(guild.id)
+        if index is None:
+            index = self.indexes[guild.id] = NameIndex.build(
+                (member.id, _member_names(member)) for member in guild.members
+            )
+        return index
+
+    def find(self, guild: discord.Guild, query: str) -> discord.Member | None:
+        """Resolve a typed name to a member: exact name first, then a unique prefix"""
+        query = query.strip().lstrip('@')
+        if not query:
+            return None
+        index = self._index(guild)
+        ids = index.exact(query) or set(index.prefix(query, limit=2))
+        if len(ids) != 1:
+            return None
+        return guild.get_member(next(iter(ids)))
+
+    # ── Keeping indexes current ────────────────────────────────────────
+    # Guilds are only tracked once something has looked them up
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member) -> None:
+        index = self.indexes.get(member.guild.id)
+        if index is not None:
+            index.add(member.id, _member_names(member))
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member) -> None:
+        index = self.indexes.get(member.guild.id)
+        if index is not None:
+            index.remove(member.id)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member) -> None:
+        index = self.indexes.get(after.guild.id)
+        if index is not None:
+            index.add(after.id, _member_names(after))
+
+    @commands.Cog.listener()
+    async def on_user_update(self, before: discord.User, after: discord.User) -> None:
+        """Username changes apply in every guild the user shares with the bot"""
+        for guild in after.mutual_guilds:
+            index = self.indexes.get(guild.id)
+            member = guild.get_member(after.id)
+            if index is not None and member is not None:
+                index.add(member.id, _member_names(member))
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild) -> None:
+        self.indexes.pop(guild.id, None)
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(Members(bot))
@@ -0,0 +1,89 @@
+"""
+Seth Metrics - Command, loop and database timings served to Prometheus
+"""
+import math
+import time
+import weakref
+
+from aiohttp import web
+from discord.ext import commands
+
+from config import METRICS_HOST, METRICS_PORT
+from database import seth_cache, writer
+from utils.metrics import (
+    COMMAND_ERRORS,
+    COMMAND_SECONDS,
+    GATEWAY_LATENCY,
+    GUILDS,
+    QUEUE_DEPTH,
+    SETH_CACHE,
+    metrics,
+)
+
+
+class Metrics(commands.Cog):
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        # When each running command was invoked
+        self.started: weakref.WeakKeyDictionary[commands.Context, float] = weakref.WeakKeyDictionary()
+        self.runner: web.AppRunner | None = None
+
+    async def cog_load(self) -> None:
+        metrics.collectors.append(self._collect)
+        if not METRICS_PORT:
+            return
+        app = web.Application()
+        app.router.add_get('/metrics', self._serve)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, METRICS_HOST, METRICS_PORT).start()
+        print(f"📈 Metrics at http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+
+    async def cog_unload(self) -> None:
+        metrics.collectors.remove(self._collect)
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    async def _serve(self, request: web.Request) -> web.Response:
+        return web.Response(text=metrics.render(), content_type='text/plain', charset='utf-8',
+                            headers={'X-Prometheus-Format': '0.0.4'})
+
+    def _collect(self) -> None:
+        """Read the values that are only worth knowing at scrape time"""
+        QUEUE_DEPTH.labels('writes').set(writer.depth)
+        outbox = self.bot.get_cog('Outbox')
+        if outbox:
+            QUEUE_DEPTH.labels('outbox').set(sum(len(queue) for queue in outbox.queues.values()))
+        GUILDS.labels().set(len(self.bot.guilds))
+        for shard_id, latency in self.bot.latencies:
+            if not math.isnan(latency):
+                GATEWAY_LATENCY.labels(shard_id).set(latency)
+        SETH_CACHE.labels('hit').value = seth_cache.hits
+        SETH_CACHE.labels('miss').value = seth_cache.misses
+
+    # ── Commands ───────────────────────────────────────────────────────
+
+    @commands.Cog.listener()
+    async def on_command(self, ctx: commands.Context) -> None:
+        self.started[ctx] = time.perf_counter()
+
+    @commands.Cog.listener()
+    async def on_command_completion(self, ctx: commands.Context) -> None:
+        self._finish(ctx)
+
+    @commands.Cog.listener()
+    async def on_command_error(self, ctx: commands.Context, error: commands.CommandError) -> None:
+        command = self._finish(ctx)
+        cause = error.original if isinstance(error, commands.CommandInvokeError) else error
+        COMMAND_ERRORS.labels(command, type(cause).__name__).inc()
+
+    def _finish(self, ctx: commands.Context) -> str:
+        """Observe the command's run time and return its name"""
+        command = ctx.command.qualified_name if ctx.command else 'unknown'
+        start = self.started.pop(ctx, None)
+        if start is not None:
+            COMMAND_SECONDS.labels(command).observe(time.perf_counter() - start)
+        return command
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(Metrics(bot))
@@ -0,0 +1,110 @@
+"""
+Seth Outbox - Queued, rate-limited delivery of announcements
+"""
+import asyncio
+
+import discord
+from discord.ext import commands
+
+from config import OUTBOX_BURST, OUTBOX_PERIOD
+from utils.outbox import NORMAL, OutboundQueue, Outgoing, TokenBucket
+
+
+class Outbox(commands.Cog):
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self.queues: dict[int, OutboundQueue] = {}
+        self.buckets: dict[int, TokenBucket] = {}
+        self.workers: dict[int, asyncio.Task] = {}
+
+    def cog_unload(self) -> None:
+        for worker in self.workers.values():
+            worker.cancel()
+        # A worker cancelled before it first ran never gets to fail its queue
+        for queue in self.queues.values():
+            while queue:
+                self._resolve(queue.take_batch(), None)
+
+    def send(self, channel: discord.abc.Messageable, content: str | None = None, *,
+             embed: discord.Embed | None = None, reactions: tuple[str, ...] = (),
+             priority: int = NORMAL, coalesce: bool = True) -> asyncio.Future:
+        """Queue a message and return at once.
+
+        The future resolves to the sent message, or None if it could not be
+        delivered; only callers that need the message have to await it.
+        Embed-only messages with the same reactions queued back to back
+        may go out together as one multi-embed message unless coalesce is off.
+        """
+        future = asyncio.get_running_loop().create_future()
+        queue = self.queues.setdefault(channel.id, OutboundQueue())
+        queue.push(Outgoing(priority, content, embed, tuple(reactions), coalesce, future))
+        worker = self.workers.get(channel.id)
+        if worker is None or worker.done():
+            self.workers[channel.id] = asyncio.create_task(self._deliver(channel, queue))
+        return future
+
+    async def _deliver(self, channel: discord.abc.Messageable, queue: OutboundQueue) -> None:
+        """Drain one channel's queue within its rate bucket, then stop"""
+        bucket = self.buckets.setdefault(channel.id, TokenBucket(OUTBOX_BURST, OUTBOX_PERIOD))
+        loop = asyncio.get_running_loop()
+        batch: list[Outgoing] = []
+        try:
+            while queue:
+                wait = bucket.delay(loop.time())
+                if wait:
+                    # Whatever queues meanwhile can still coalesce or jump the line
+                    await asyncio.sleep(wait)
+                    continue
+                bucket.take(loop.time())
+                batch = queue.take_batch()
+                try:
+                    await self._send_batch(channel, batch)
+                except Exception as e:  # noqa: BLE001 - failed like an HTTP error, not raised
+                    # Fail just this batch; the rest of the queue still goes out
+                    print(f"❌ Could not deliver to #{channel}: {e}")
+                    self._resolve(batch, None)
+        finally:
+            # Also reached on cancel, so nobody waits on a worker that is gone
+            self._resolve(batch, None)
+            while queue:
+                self._resolve(queue.take_batch(), None)
+            del self.workers[channel.id]
+            del self.queues[channel.id]
+            self._evict_buckets(loop.time())
+
+    def _evict_buckets(self, now: float) -> None:
+        """Drop refilled buckets of idle channels; only channels busy within the last period keep one"""
+        for channel_id in [
+            channel_id for channel_id, bucket in self.buckets.items()
+            if channel_id not in self.workers and bucket.full(now)
+        ]:
+            del self.buckets[channel_id]
+
+    @staticmethod
+    def _resolve(batch: list[Outgoing], message: discord.Message | None) -> None:
+        for item in batch:
+            if not item.future.done():
+                item.future.set_result(message)
+
+    async def _send_batch(self, channel: discord.abc.Messageable, batch: list[Outgoing]) -> None:
+        first = batch[0]
+        try:
+            if len(batch) == 1:
+                message = await channel.send(first.content, embed=first.embed)
+            else:
+                message = await channel.send(embeds=[item.embed for item in batch])
+        except discord.HTTPException as e:
+            print(f"❌ Could not deliver to #{channel}: {e}")
+            message = None
+
+        if message is not None:
+            try:
+                for emoji in first.reactions:
+                    await message.add_reaction(emoji)
+            except discord.HTTPException as e:
+                print(f"❌ Could not react in #{channel}: {e}")
+
+        self._resolve(batch, message)
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(Outbox(bot))
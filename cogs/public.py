@@ -1,71 +1,201 @@
 """
 Seth Public Features - Server-wide visibility
 """
+import aiosqlite
 import discord
 from discord.ext import commands
-import aiosqlite
 import config
-from datetime import datetime
+import time
+from database import connect, living_seth, seth_cache, write
 from config import (
     HEALTH_GOOD_DISPLAY, HEALTH_POOR_DISPLAY,
     HUNGER_STARVING_DISPLAY, HUNGER_HUNGRY_DISPLAY,
-    GENERATION_SCORE_WEIGHT, AGE_SCORE_DIVISOR,
+    SERVER_PAGE_SIZE, SERVER_PAGE_TIMEOUT, RANKINGS_SIZE,
 )
+from utils.pagination import RosterKey, roster_key, roster_page_query, split_page
+from utils.ranking import RankIndex, composite_score
+
+class RosterView(discord.ui.View):
+    """Previous/next buttons over a keyset-paginated guild roster"""
+
+    def __init__(self, cog: "Public", author_id: int, guild_id: int, population: int) -> None:
+        super().__init__(timeout=SERVER_PAGE_TIMEOUT)
+        self.cog = cog
+        self.author_id = author_id
+        self.guild_id = guild_id
+        self.population = population
+        self.rows: list[tuple] = []
+        self.page_number = 0
+        self.has_previous = False
+        self.has_next = False
+        self.message: discord.Message | None = None
+
+    async def load(self, key: RosterKey | None, forward: bool) -> bool:
+        """Replace the current page with the one after/before key"""
+        rows, has_more = await self.cog.fetch_roster_page(self.guild_id, key, forward)
+        if not rows:
+            return False
+
+        if key is None:
+            self.page_number = 1
+            self.has_previous, self.has_next = False, has_more
+        elif forward:
+            self.page_number += 1
+            self.has_previous, self.has_next = True, has_more
+        else:
+            self.page_number -= 1
+            self.has_previous, self.has_next = has_more, True
+
+        self.rows = rows
+        self.previous_page.disabled = not self.has_previous
+        self.next_page.disabled = not self.has_next
+        return True
+
+    def build_embed(self) -> discord.Embed:
+        """Render the current page"""
+        pages = max(1, -(-self.population // SERVER_PAGE_SIZE))
+        embed = discord.Embed(
+            title="🌍 **Living Seths in Server**",
+            description=f"Population: {self.population} Seths",
+            color=0x2ecc71
+        )
+
+        for _, name, gen, health, hunger, age_minutes, owner in self.rows:
+
+            if health > HEALTH_GOOD_DISPLAY:
+                status = "💚"
+            elif health > HEALTH_POOR_DISPLAY:
+                status = "💛"
+            else:
+                status = "💔"
+
+            if hunger > HUNGER_STARVING_DISPLAY:
+                hunger_status = "🔴 Starving!"
+            elif hunger > HUNGER_HUNGRY_DISPLAY:
+                hunger_status = "🟡 Hungry"
+            else:
+                hunger_status = "🟢 Fed"
+
+            embed.add_field(
+                name=f"{status} {name} (Gen {gen})",
+                value=f"Owner: {owner}\n❤️ {health}/100 | {hunger_status}\n⏰ Age: {age_minutes} min",
+                inline=True
+            )
+
+        embed.set_footer(text=f"Page {self.page_number}/{pages} | Use !compare @user to compare Seths")
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Run `!server` to browse your own roster.", ephemeral=True)
+            return False
+        return True
+
+    async def _turn_page(self, interaction: discord.Interaction, forward: bool) -> None:
+        key = roster_key(self.rows[-1] if forward else self.rows[0])
+        if not await self.load(key, forward):
+            # The roster shrank since this page was shown; start over
+            await self.load(None, forward=True)
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    @discord.ui.button(emoji="◀️", style=discord.ButtonStyle.secondary, disabled=True)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        await self._turn_page(interaction, forward=False)
+
+    @discord.ui.button(emoji="▶️", style=discord.ButtonStyle.secondary, disabled=True)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        await self._turn_page(interaction, forward=True)
+
+    async def on_timeout(self) -> None:
+        if self.message:
+            self.previous_page.disabled = True
+            self.next_page.disabled = True
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
 
 class Public(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
         self.db_path = config.DATABASE_PATH
+        self.rank_index = RankIndex()
+        # on_ready fires again on every reconnect; the backfill only needs to run once
+        self.backfilled = False
 
-    @commands.command(name='server')
-    async def server_seths(self, ctx: commands.Context) -> None:
-        """Show all living Seths in the server"""
-        async with aiosqlite.connect(self.db_path) as db:
+    async def cog_load(self) -> None:
+        """Build the rank index once; listeners keep it current afterwards"""
+        async with connect(self.db_path) as db:
             cursor = await db.execute(
-                """SELECT s.name, s.generation, s.health, s.hunger, s.birth_time, u.discord_name
-                FROM seths s
-                JOIN users u ON s.user_id = u.user_id
-                WHERE s.is_alive = 1
-                ORDER BY s.generation DESC, s.health DESC"""
+                """SELECT seth_id, generation, health, hunger, birth_ts
+                FROM seths WHERE is_alive = 1"""
             )
-            living_seths = await cursor.fetchall()
+            async for seth_id, gen, health, hunger, birth_ts in cursor:
+                self.rank_index.upsert(seth_id, gen, health, hunger, birth_ts)
 
-            if not living_seths:
-                await ctx.send("💀 No living Seths in this server!")
-                return
+    @commands.Cog.listener()
+    async def on_seth_born(self, seth_id: int, user_id: int, guild_id: int | None, generation: int, birth_ts: int) -> None:
+        self.rank_index.upsert(seth_id, generation, config.STARTING_HEALTH, config.STARTING_HUNGER, birth_ts)
+
+    @commands.Cog.listener()
+    async def on_seth_vitals(self, updates: list[tuple[int, int, int]]) -> None:
+        for seth_id, health, hunger in updates:
+            self.rank_index.update_vitals(seth_id, health, hunger)
 
-            embed = discord.Embed(
-                title="🌍 **Living Seths in Server**",
-                description=f"Population: {len(living_seths)} Seths",
-                color=0x2ecc71
+    @commands.Cog.listener()
+    async def on_seth_died(self, seth_id: int, user_id: int, cause: str) -> None:
+        self.rank_index.remove(seth_id)
+
+    @commands.Cog.listener()
+    async def on_ready(self) -> None:
+        """Assign Seths born before guild tracking to a guild their owner is in"""
+        if self.backfilled:
+            return
+
+        async def backfill(db: aiosqlite.Connection) -> list[tuple[int, int]]:
+            cursor = await db.execute(
+                "SELECT seth_id, user_id FROM seths WHERE is_alive = 1 AND guild_id IS NULL"
             )
+            legacy = await cursor.fetchall()
+            for seth_id, user_id in legacy:
+                guild = next((g for g in self.bot.guilds if g.get_member(user_id)), None)
+                if guild:
+                    await db.execute(
+                        "UPDATE seths SET guild_id = ? WHERE seth_id = ? AND guild_id IS NULL",
+                        (guild.id, seth_id)
+                    )
+            return legacy
 
-            for name, gen, health, hunger, birth_time, owner in living_seths:
-                birth = datetime.fromisoformat(birth_time)
-                age_minutes = int((datetime.now() - birth).total_seconds() / 60)
-
-                if health > HEALTH_GOOD_DISPLAY:
-                    status = "💚"
-                elif health > HEALTH_POOR_DISPLAY:
-                    status = "💛"
-                else:
-                    status = "💔"
-
-                if hunger > HUNGER_STARVING_DISPLAY:
-                    hunger_status = "🔴 Starving!"
-                elif hunger > HUNGER_HUNGRY_DISPLAY:
-                    hunger_status = "🟡 Hungry"
-                else:
-                    hunger_status = "🟢 Fed"
-
-                embed.add_field(
-                    name=f"{status} {name} (Gen {gen})",
-                    value=f"Owner: {owner}\n❤️ {health}/100 | {hunger_status}\n⏰ Age: {age_minutes} min",
-                    inline=True
-                )
-
-            embed.set_footer(text="Use !compare @user to compare Seths")
-            await ctx.send(embed=embed)
+        for _, user_id in await write(backfill):
+            seth_cache.discard(user_id)
+        self.backfilled = True
+
+    async def fetch_roster_page(self, guild_id: int, key: RosterKey | None, forward: bool) -> tuple[list[tuple], bool]:
+        """Fetch one page of a guild's living Seths, returns (rows, has_more)"""
+        sql, params = roster_page_query(guild_id, key, forward, SERVER_PAGE_SIZE + 1)
+        async with connect(self.db_path) as db:
+            cursor = await db.execute(sql, params)
+            rows = await cursor.fetchall()
+        return split_page(rows, SERVER_PAGE_SIZE, forward)
+
+    @commands.command(name='server')
+    @commands.guild_only()
+    async def server_seths(self, ctx: commands.Context) -> None:
+        """Show the living Seths in this server, one page at a time"""
+        async with connect(self.db_path) as db:
+            cursor = await db.execute(
+                "SELECT COUNT(*) FROM seths WHERE guild_id = ? AND is_alive = 1",
+                (ctx.guild.id,)
+            )
+            population = (await cursor.fetchone())[0]
+
+        if not population:
+            await ctx.send("💀 No living Seths in this server!")
+            return
+
+        view = RosterView(self, ctx.author.id, ctx.guild.id, population)
+        await view.load(None, forward=True)
+        view.message = await ctx.send(embed=view.build_embed(), view=view)
 
     @commands.command(name='compare')
     async def compare_seths(self, ctx: commands.Context, *, target: str | None = None) -> None:
@@ -77,16 +207,11 @@ class Public(commands.Cog):
         if ctx.message.mentions:
             member = ctx.message.mentions[0]
         else:
-            try:
+            members = self.bot.get_cog('Members')
+            member = members.find(ctx.guild, target) if ctx.guild and members else None
+            if not member:
                 target = target.replace('@', '')
-                member = discord.utils.get(ctx.guild.members, name=target)
-                if not member:
-                    member = discord.utils.get(ctx.guild.members, nick=target)
-                if not member:
-                    await ctx.send(f"❌ User '{target}' not found! Use `!compare @user` with a mention")
-                    return
-            except Exception:
-                await ctx.send("❌ Invalid user! Use `!compare @user` with a mention")
+                await ctx.send(f"❌ User '{target}' not found! Use `!compare @user` with a mention")
                 return
 
         if member.id == ctx.author.id:
@@ -97,71 +222,121 @@ class Public(commands.Cog):
             await ctx.send("🤖 Bots don't have Seths!")
             return
 
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute(
-                """SELECT s.name, s.generation, s.health, s.hunger, s.birth_time
-                FROM seths s
-                WHERE s.user_id = ? AND s.is_alive = 1""",
-                (ctx.author.id,)
-            )
-            author_seth = await cursor.fetchone()
+        author_seth = await living_seth(ctx.author.id)
+        target_seth = await living_seth(member.id)
 
-            cursor = await db.execute(
-                """SELECT s.name, s.generation, s.health, s.hunger, s.birth_time
-                FROM seths s
-                WHERE s.user_id = ? AND s.is_alive = 1""",
-                (member.id,)
-            )
-            target_seth = await cursor.fetchone()
+        if not author_seth:
+            await ctx.send("💀 You don't have a living Seth! Use `!start [name]`")
+            return
 
-            if not author_seth:
-                await ctx.send("💀 You don't have a living Seth! Use `!start [name]`")
-                return
+        if not target_seth:
+            await ctx.send(f"💀 {member.name} doesn't have a living Seth!")
+            return
 
-            if not target_seth:
-                await ctx.send(f"💀 {member.name} doesn't have a living Seth!")
-                return
+        now = int(time.time())
+        a_name, a_gen, a_health, a_hunger = author_seth.name, author_seth.generation, author_seth.health, author_seth.hunger
+        t_name, t_gen, t_health, t_hunger = target_seth.name, target_seth.generation, target_seth.health, target_seth.hunger
+        a_age = (now - author_seth.birth_ts) // 60
+        t_age = (now - target_seth.birth_ts) // 60
 
-            a_name, a_gen, a_health, a_hunger, a_birth = author_seth
-            t_name, t_gen, t_health, t_hunger, t_birth = target_seth
+        a_score = composite_score(a_health, a_hunger, a_gen, a_age)
+        t_score = composite_score(t_health, t_hunger, t_gen, t_age)
 
-            a_age = int((datetime.now() - datetime.fromisoformat(a_birth)).total_seconds() / 60)
-            t_age = int((datetime.now() - datetime.fromisoformat(t_birth)).total_seconds() / 60)
+        if a_score > t_score:
+            winner = f"🏆 {ctx.author.name}'s {a_name} is superior!"
+            color = 0x2ecc71
+        elif t_score > a_score:
+            winner = f"🏆 {member.name}'s {t_name} is superior!"
+            color = 0xe74c3c
+        else:
+            winner = "🤝 It's a tie!"
+            color = 0xf39c12
 
-            a_score = a_health + (100 - a_hunger) + (a_gen * GENERATION_SCORE_WEIGHT) + (a_age // AGE_SCORE_DIVISOR)
-            t_score = t_health + (100 - t_hunger) + (t_gen * GENERATION_SCORE_WEIGHT) + (t_age // AGE_SCORE_DIVISOR)
+        embed = discord.Embed(
+            title="⚔️ **Seth Comparison**",
+            description=winner,
+            color=color
+        )
 
-            if a_score > t_score:
-                winner = f"🏆 {ctx.author.name}'s {a_name} is superior!"
-                color = 0x2ecc71
-            elif t_score > a_score:
-                winner = f"🏆 {member.name}'s {t_name} is superior!"
-                color = 0xe74c3c
-            else:
-                winner = "🤝 It's a tie!"
-                color = 0xf39c12
+        embed.add_field(
+            name=f"{ctx.author.name}'s {a_name}",
+            value=f"**Gen:** {a_gen}\n**Health:** {a_health}/100\n**Hunger:** {a_hunger}/100\n**Age:** {a_age} min\n**Score:** {a_score}",
+            inline=True
+        )
 
-            embed = discord.Embed(
-                title="⚔️ **Seth Comparison**",
-                description=winner,
-                color=color
-            )
+        embed.add_field(name="⚔️", value="**VS**", inline=True)
 
-            embed.add_field(
-                name=f"{ctx.author.name}'s {a_name}",
-                value=f"**Gen:** {a_gen}\n**Health:** {a_health}/100\n**Hunger:** {a_hunger}/100\n**Age:** {a_age} min\n**Score:** {a_score}",
-                inline=True
-            )
+        embed.add_field(
+            name=f"{member.name}'s {t_name}",
+            value=f"**Gen:** {t_gen}\n**Health:** {t_health}/100\n**Hunger:** {t_hunger}/100\n**Age:** {t_age} min\n**Score:** {t_score}",
+            inline=True
+        )
 
-            embed.add_field(name="⚔️", value="**VS**", inline=True)
+        await ctx.send(embed=embed)
 
-            embed.add_field(
-                name=f"{member.name}'s {t_name}",
-                value=f"**Gen:** {t_gen}\n**Health:** {t_health}/100\n**Hunger:** {t_hunger}/100\n**Age:** {t_age} min\n**Score:** {t_score}",
-                inline=True
+    @commands.command(name='rank')
+    async def rank(self, ctx: commands.Context) -> None:
+        """Show your Seth's position among all living Seths"""
+        seth = await living_seth(ctx.author.id)
+
+        if not seth or seth.seth_id not in self.rank_index:
+            await ctx.send("💀 You don't have a living Seth! Use `!start [name]`")
+            return
+
+        seth_id, name = seth.seth_id, seth.name
+        position = self.rank_index.rank(seth_id)
+        total = len(self.rank_index)
+        score = self.rank_index.score(seth_id, time.time())
+
+        embed = discord.Embed(
+            title=f"🏅 {name}'s Ranking",
+            description=f"**#{position}** of {total} living Seths",
+            color=0xFFD700
+        )
+        embed.add_field(name="Score", value=str(score), inline=True)
+        embed.add_field(
+            name="Percentile",
+            value=f"Top {max(1, round(position / total * 100))}%",
+            inline=True
+        )
+        embed.set_footer(text="Score = health + fullness + generation bonus + age bonus")
+        await ctx.send(embed=embed)
+
+    @commands.command(name='rankings')
+    async def rankings(self, ctx: commands.Context) -> None:
+        """Show the highest scoring living Seths"""
+        top_ids = self.rank_index.top(RANKINGS_SIZE)
+        if not top_ids:
+            await ctx.send("💀 No living Seths to rank!")
+            return
+
+        placeholders = ",".join("?" * len(top_ids))
+        async with connect(self.db_path) as db:
+            cursor = await db.execute(
+                f"""SELECT s.seth_id, s.name, s.generation, u.discord_name
+                FROM seths s
+                JOIN users u ON s.user_id = u.user_id
+                WHERE s.seth_id IN ({placeholders})""",
+                top_ids
             )
+            details = {row[0]: row[1:] for row in await cursor.fetchall()}
 
-            await ctx.send(embed=embed)
+        now = time.time()
+        embed = discord.Embed(
+            title="🏅 **Seth Rankings**",
+            description=f"Top Seths out of {len(self.rank_index)} alive",
+            color=0xFFD700
+        )
+        lines = []
+        for i, seth_id in enumerate(top_ids, 1):
+            if seth_id not in details:
+                continue
+            name, gen, owner = details[seth_id]
+            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
+            lines.append(f"{medal} **{name}** (Gen {gen}) — {self.rank_index.score(seth_id, now)} pts | {owner}")
+        embed.add_field(name="Leaderboard", value="\n".join(lines), inline=False)
+        embed.set_footer(text="Use !rank to see where your Seth stands")
+        await ctx.send(embed=embed)
 
 async def setup(bot: commands.Bot) -> None:
     await bot.add_cog(Public(bot))
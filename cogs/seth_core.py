@@ -4,14 +4,16 @@ Seth Core System - Birth, Life, Death (STANDARDIZED VISUALS)
 import discord
 from discord.ext import commands
 import aiosqlite
-from datetime import datetime
+import time
 import config
+from database import record_ledger, write, living_seth, seth_cache
 from config import (
     MAX_HEALTH,
     HEALTH_CRITICAL_STATUS, HUNGER_CRITICAL_STATUS,
     HEALTH_WARNING_STATUS, HUNGER_WARNING_STATUS,
 )
 from utils.formatting import SethVisuals
+from utils.seth_cache import SethRecord
 from utils.status import get_health_status, get_hunger_status, get_health_color
 
 class SethCore(commands.Cog):
@@ -23,32 +25,32 @@ class SethCore(commands.Cog):
     async def start_seth(self, ctx: commands.Context, *, name: str | None = None) -> None:
         """Create your first Seth or continue bloodline"""
         user_id = ctx.author.id
+        guild_id = ctx.guild.id if ctx.guild else None
+        seth_name = f"{name} Seth" if name else "Seth Jr."
+        birth_ts = int(time.time())
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async def give_birth(db: aiosqlite.Connection) -> tuple:
+            """(living Seth's name and generation, None, None) or (None, new seth_id, generation)"""
             cursor = await db.execute(
                 "SELECT name, generation FROM seths WHERE user_id = ? AND is_alive = 1",
                 (user_id,)
             )
             existing = await cursor.fetchone()
-
             if existing:
-                embed = discord.Embed(
-                    title="❌ You already have a Seth!",
-                    description=f"**{existing[0]}** (Gen {existing[1]}) is still alive!",
-                    color=discord.Color.red()
-                )
-                await ctx.send(embed=embed)
-                return
+                return existing, None, None
 
             await db.execute(
                 "INSERT OR IGNORE INTO users (user_id, discord_name) VALUES (?, ?)",
                 (user_id, str(ctx.author))
             )
 
-            await db.execute(
-                "INSERT OR IGNORE INTO resources (user_id) VALUES (?)",
+            cursor = await db.execute(
+                "INSERT OR IGNORE INTO resources (user_id) VALUES (?) RETURNING food, medicine, coal",
                 (user_id,)
             )
+            starter = await cursor.fetchone()
+            if starter:
+                await record_ledger(db, [(user_id, *starter, 'starter')])
 
             cursor = await db.execute(
                 "SELECT MAX(generation) FROM seths WHERE user_id = ?",
@@ -57,121 +59,127 @@ class SethCore(commands.Cog):
             result = await cursor.fetchone()
             generation = (result[0] + 1) if result[0] else 1
 
-            seth_name = f"{name} Seth" if name else "Seth Jr."
-
-            await db.execute(
+            cursor = await db.execute(
                 """INSERT INTO seths
-                (user_id, name, generation, health, hunger, is_alive)
-                VALUES (?, ?, ?, ?, ?, ?)""",
+                (user_id, name, generation, health, hunger, is_alive, guild_id, birth_ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
                 (user_id, seth_name, generation, config.STARTING_HEALTH,
-                 config.STARTING_HUNGER, 1)
+                 config.STARTING_HUNGER, 1, guild_id, birth_ts)
             )
-            await db.commit()
+            return None, cursor.lastrowid, generation
 
+        existing, seth_id, generation = await write(give_birth)
+        if existing:
             embed = discord.Embed(
-                title="🎉 A SETH IS BORN!",
-                description=f"**{seth_name}** (Generation {generation}) has entered the world!",
-                color=discord.Color.green()
+                title="❌ You already have a Seth!",
+                description=f"**{existing[0]}** (Gen {existing[1]}) is still alive!",
+                color=discord.Color.red()
             )
+            await ctx.send(embed=embed)
+            return
 
-            health_display = SethVisuals.health_bar(config.STARTING_HEALTH, MAX_HEALTH)
-            hunger_display = SethVisuals.hunger_bar(config.STARTING_HUNGER)
+        seth_cache.born(SethRecord(
+            seth_id, user_id, seth_name, generation,
+            config.STARTING_HEALTH, config.STARTING_HUNGER, birth_ts, guild_id
+        ))
+        await self.bot.get_cog('Cluster').publish('seth_born', seth_id, user_id, guild_id, generation, birth_ts)
 
-            embed.add_field(name="❤️ Health", value=health_display, inline=False)
-            embed.add_field(name="🍖 Stomach", value=hunger_display, inline=False)
-            embed.add_field(name="🧬 Generation", value=generation, inline=True)
-            embed.set_footer(text=f"Parent: {ctx.author.name} | Use !status to check on your Seth")
+        embed = discord.Embed(
+            title="🎉 A SETH IS BORN!",
+            description=f"**{seth_name}** (Generation {generation}) has entered the world!",
+            color=discord.Color.green()
+        )
 
-            await ctx.send(embed=embed)
+        health_display = SethVisuals.health_bar(config.STARTING_HEALTH, MAX_HEALTH)
+        hunger_display = SethVisuals.hunger_bar(config.STARTING_HUNGER)
+
+        embed.add_field(name="❤️ Health", value=health_display, inline=False)
+        embed.add_field(name="🍖 Stomach", value=hunger_display, inline=False)
+        embed.add_field(name="🧬 Generation", value=generation, inline=True)
+        embed.set_footer(text=f"Parent: {ctx.author.name} | Use !status to check on your Seth")
+
+        await ctx.send(embed=embed)
 
     @commands.command(name='status')
     async def status(self, ctx: commands.Context) -> None:
         """Check your Seth's vital signs"""
-        user_id = ctx.author.id
+        seth = await living_seth(ctx.author.id)
 
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute(
-                """SELECT name, generation, health, hunger, birth_time
-                FROM seths WHERE user_id = ? AND is_alive = 1""",
-                (user_id,)
+        if not seth:
+            embed = discord.Embed(
+                title="💀 No Living Seth",
+                description=f"You don't have a Seth! Use `{config.BOT_PREFIX}start [name]` to create one!",
+                color=discord.Color.red()
             )
-            seth = await cursor.fetchone()
+            await ctx.send(embed=embed)
+            return
 
-            if not seth:
-                embed = discord.Embed(
-                    title="💀 No Living Seth",
-                    description=f"You don't have a Seth! Use `{config.BOT_PREFIX}start [name]` to create one!",
-                    color=discord.Color.red()
-                )
-                await ctx.send(embed=embed)
-                return
+        name, gen, health, hunger = seth.name, seth.generation, seth.health, seth.hunger
+        age = (int(time.time()) - seth.birth_ts) // config.SECONDS_PER_DAY
 
-            name, gen, health, hunger, birth_time = seth
+        health_status = get_health_status(health)
+        hunger_status = get_hunger_status(hunger)
 
-            health_status = get_health_status(health)
-            hunger_status = get_hunger_status(hunger)
+        health_display = SethVisuals.health_bar(health, MAX_HEALTH)
+        hunger_display = SethVisuals.hunger_bar(hunger)
 
-            health_display = SethVisuals.health_bar(health, MAX_HEALTH)
-            hunger_display = SethVisuals.hunger_bar(hunger)
+        embed = discord.Embed(
+            title=f"📊 {name} Status",
+            color=get_health_color(health)
+        )
 
-            birth = datetime.fromisoformat(birth_time)
-            age = (datetime.utcnow() - birth).days
+        embed.add_field(
+            name="❤️ Health",
+            value=f"{health_display} [{health_status}]",
+            inline=False
+        )
 
-            embed = discord.Embed(
-                title=f"📊 {name} Status",
-                color=get_health_color(health)
-            )
+        embed.add_field(
+            name="🍖 Stomach",
+            value=f"{hunger_display} [{hunger_status}]",
+            inline=False
+        )
 
-            embed.add_field(
-                name="❤️ Health",
-                value=f"{health_display} [{health_status}]",
-                inline=False
-            )
+        embed.add_field(name="🧬 Generation", value=gen, inline=True)
+        embed.add_field(name="📅 Age", value=f"{age} days", inline=True)
 
+        if health < HEALTH_CRITICAL_STATUS or hunger > HUNGER_CRITICAL_STATUS:
             embed.add_field(
-                name="🍖 Stomach",
-                value=f"{hunger_display} [{hunger_status}]",
+                name="🚨 **CRITICAL WARNING** 🚨",
+                value="**Wake up ass-hole, I'm starving!!! Feed me now!**",
                 inline=False
             )
-
-            embed.add_field(name="🧬 Generation", value=gen, inline=True)
-            embed.add_field(name="📅 Age", value=f"{age} days", inline=True)
-
-            if health < HEALTH_CRITICAL_STATUS or hunger > HUNGER_CRITICAL_STATUS:
+            if health < HEALTH_CRITICAL_STATUS and hunger > HUNGER_CRITICAL_STATUS:
+                embed.add_field(
+                    name="💀 BOTH CRITICAL",
+                    value="Use `!heal` for health AND `!feed` for hunger NOW!",
+                    inline=False
+                )
+            elif hunger > HUNGER_CRITICAL_STATUS:
+                embed.add_field(
+                    name="💀 ACTION REQUIRED",
+                    value="Use `!feed` immediately to reduce hunger!",
+                    inline=False
+                )
+            elif health < HEALTH_CRITICAL_STATUS:
                 embed.add_field(
-                    name="🚨 **CRITICAL WARNING** 🚨",
-                    value="**Wake up ass-hole, I'm starving!!! Feed me now!**",
+                    name="💀 ACTION REQUIRED",
+                    value="Use `!heal` immediately to increase health!",
                     inline=False
                 )
-                if health < HEALTH_CRITICAL_STATUS and hunger > HUNGER_CRITICAL_STATUS:
-                    embed.add_field(
-                        name="💀 BOTH CRITICAL",
-                        value="Use `!heal` for health AND `!feed` for hunger NOW!",
-                        inline=False
-                    )
-                elif hunger > HUNGER_CRITICAL_STATUS:
-                    embed.add_field(
-                        name="💀 ACTION REQUIRED",
-                        value="Use `!feed` immediately to reduce hunger!",
-                        inline=False
-                    )
-                elif health < HEALTH_CRITICAL_STATUS:
-                    embed.add_field(
-                        name="💀 ACTION REQUIRED",
-                        value="Use `!heal` immediately to increase health!",
-                        inline=False
-                    )
-            elif health < HEALTH_WARNING_STATUS:
-                embed.add_field(name="⚠️ WARNING", value="Seth's health is getting low! Use `!heal`", inline=False)
-            elif hunger > HUNGER_WARNING_STATUS:
-                embed.add_field(name="⚠️ WARNING", value="Seth is getting hungry! Use `!feed`", inline=False)
+        elif health < HEALTH_WARNING_STATUS:
+            embed.add_field(name="⚠️ WARNING", value="Seth's health is getting low! Use `!heal`", inline=False)
+        elif hunger > HUNGER_WARNING_STATUS:
+            embed.add_field(name="⚠️ WARNING", value="Seth is getting hungry! Use `!feed`", inline=False)
 
-            await ctx.send(embed=embed)
+        await ctx.send(embed=embed)
 
     async def announce_death(self, ctx: commands.Context, seth_name: str, generation: int, cause: str = "Natural causes") -> None:
         """Announce death in #seth-graveyard channel"""
-        graveyard_channel = discord.utils.get(ctx.guild.channels, name="seth-graveyard")
-        if graveyard_channel:
+        channels = self.bot.get_cog('Channels')
+        outbox = self.bot.get_cog('Outbox')
+        graveyard_channel = channels.channel(ctx.guild, 'graveyard') if ctx.guild and channels else None
+        if graveyard_channel and outbox:
             embed = discord.Embed(
                 title="💀 SETH HAS DIED!",
                 description=f"**{seth_name}** (Generation {generation}) has passed away",
@@ -180,61 +188,68 @@ class SethCore(commands.Cog):
             embed.add_field(name="Cause of Death", value=cause, inline=False)
             embed.add_field(name="Owner", value=ctx.author.mention, inline=False)
             embed.set_footer(text="Press F to pay respects")
-            msg = await graveyard_channel.send(embed=embed)
-            await msg.add_reaction("🇫")
+            outbox.send(graveyard_channel, embed=embed, reactions=("🇫",))
 
     @commands.command(name="kill")
     async def kill_seth(self, ctx: commands.Context) -> None:
         """TEST COMMAND: Kill your Seth instantly"""
         user_id = ctx.author.id
+        reason = "Murdered by owner (test)"
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async def kill(db: aiosqlite.Connection) -> tuple | None:
+            """(seth_id, name, generation, lived_days), or None if there was no living Seth to kill"""
             cursor = await db.execute(
-                """SELECT seth_id, name, generation, birth_time
+                """SELECT seth_id, name, generation, birth_ts, version
                 FROM seths WHERE user_id = ? AND is_alive = 1""",
                 (user_id,)
             )
             seth = await cursor.fetchone()
-
             if not seth:
-                await ctx.send("💀 You don't have a living Seth to kill!")
-                return
+                return None
 
-            seth_id, name, gen, birth_time = seth
+            seth_id, name, gen, birth_ts, version = seth
+            death_ts = int(time.time())
+            lived_days = (death_ts - birth_ts) // config.SECONDS_PER_DAY
 
-            birth = datetime.fromisoformat(birth_time)
-            lived_days = (datetime.utcnow() - birth).days
-
-            death_time = datetime.utcnow()
-            await db.execute(
+            cursor = await db.execute(
                 """UPDATE seths
-                SET is_alive = 0, death_time = ?, death_reason = ?
-                WHERE seth_id = ?""",
-                (death_time, "Murdered by owner (test)", seth_id)
+                SET is_alive = 0, death_ts = ?, death_reason = ?, version = version + 1
+                WHERE seth_id = ? AND is_alive = 1 AND version = ?""",
+                (death_ts, reason, seth_id, version)
             )
-
-            await self.announce_death(ctx, name, gen, "Murdered by owner")
+            if cursor.rowcount != 1:
+                return None
             await db.execute(
                 """INSERT INTO graveyard
-                (seth_id, user_id, name, generation, lived_days, death_reason, death_time, memorial_message)
+                (seth_id, user_id, name, generation, lived_days, death_reason, death_ts, memorial_message)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-                (seth_id, user_id, name, gen, lived_days, "Murdered by owner (test)",
-                 death_time, f"Here lies {name}, cruelly murdered for testing.")
+                (seth_id, user_id, name, gen, lived_days, reason,
+                 death_ts, f"Here lies {name}, cruelly murdered for testing.")
             )
-
-            await db.commit()
-
-            embed = discord.Embed(
-                title="💀 SETH HAS DIED!",
-                description=f"**{name}** (Generation {gen}) has been murdered!",
-                color=discord.Color.dark_red()
-            )
-            embed.add_field(name="⏰ Lived", value=f"{lived_days} days", inline=True)
-            embed.add_field(name="☠️ Cause", value="Murdered by owner", inline=True)
-            embed.add_field(name="🪦 Legacy", value=f"Generation {gen} has ended", inline=True)
-            embed.set_footer(text=f"Use {config.BOT_PREFIX}start [name] to continue the bloodline")
-
-            await ctx.send(embed=embed)
+            return seth_id, name, gen, lived_days
+
+        killed = await write(kill)
+        if not killed:
+            await ctx.send("💀 You don't have a living Seth to kill!")
+            return
+
+        # Only once the death is committed is it told to anyone
+        seth_id, name, gen, lived_days = killed
+        seth_cache.discard(user_id)
+        await self.bot.get_cog('Cluster').publish('seth_died', seth_id, user_id, reason)
+        await self.announce_death(ctx, name, gen, "Murdered by owner")
+
+        embed = discord.Embed(
+            title="💀 SETH HAS DIED!",
+            description=f"**{name}** (Generation {gen}) has been murdered!",
+            color=discord.Color.dark_red()
+        )
+        embed.add_field(name="⏰ Lived", value=f"{lived_days} days", inline=True)
+        embed.add_field(name="☠️ Cause", value="Murdered by owner", inline=True)
+        embed.add_field(name="🪦 Legacy", value=f"Generation {gen} has ended", inline=True)
+        embed.set_footer(text=f"Use {config.BOT_PREFIX}start [name] to continue the bloodline")
+
+        await ctx.send(embed=embed)
 
 async def setup(bot: commands.Bot) -> None:
     await bot.add_cog(SethCore(bot))
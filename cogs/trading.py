@@ -1,19 +1,250 @@
 """
 Seth Trading System - Exchange resources between users (STANDARDIZED VISUALS)
 """
-import discord
-from discord.ext import commands
+import time
+
 import aiosqlite
+import discord
+from discord.ext import commands, tasks
+
 import config
-import asyncio
-from config import MAX_TRADE_AMOUNT, TRADE_TIMEOUT
+from config import TRADE_TIMEOUT
+from database import (
+    TRADE_DEBIT,
+    WriterStopped,
+    connect,
+    record_ledger,
+    user_snapshots,
+    write,
+)
 from utils.formatting import SethVisuals
+from utils.timing_wheel import TimingWheel
+from utils.trade import (
+    RESOURCES,
+    BundleError,
+    bundle_amounts,
+    format_bundle,
+    parse_bundle,
+)
+
+ACCEPT, DECLINE = '✅', '❌'
+
+class PendingTrade:
+    """An offer waiting on the receiver's reaction"""
+    __slots__ = ('bundle', 'channel_id', 'receiver_id', 'receiver_seth', 'sender_id', 'sender_seth')
+
+    def __init__(self, channel_id: int, sender_id: int, receiver_id: int, bundle: dict[str, int],
+                 sender_seth: str, receiver_seth: str) -> None:
+        self.channel_id = channel_id
+        self.sender_id = sender_id
+        self.receiver_id = receiver_id
+        self.bundle = bundle
+        self.sender_seth = sender_seth
+        self.receiver_seth = receiver_seth
 
 class Trading(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
         self.db_path = config.DATABASE_PATH
-        self.pending_trades: dict[str, dict] = {}
+        # Offer message id -> trade; reactions are routed here with one lookup
+        self.pending_trades: dict[int, PendingTrade] = {}
+        self.expiry = TimingWheel(tick=1, slots=int(TRADE_TIMEOUT) + 1)
+        self.expire_trades.start()
+
+    def cog_unload(self) -> None:
+        self.expire_trades.cancel()
+
+    async def cog_load(self) -> None:
+        """Pick up offers that were still open when the bot stopped"""
+        async with connect(self.db_path) as db:
+            cursor = await db.execute(
+                """SELECT message_id, channel_id, sender_id, receiver_id, food, medicine, coal,
+                    sender_seth, receiver_seth, expires_at
+                FROM pending_trades"""
+            )
+            async for row in cursor:
+                message_id, channel_id, sender_id, receiver_id = row[:4]
+                bundle = {r: a for r, a in zip(RESOURCES, row[4:7]) if a}
+                self.pending_trades[message_id] = PendingTrade(
+                    channel_id, sender_id, receiver_id, bundle, row[7], row[8]
+                )
+                # Offers that lapsed while offline expire on the first tick
+                self.expiry.schedule(message_id, row[9])
+
+    async def _send_shortfall(self, ctx: commands.Context, balances: dict[str, int], bundle: dict[str, int]) -> bool:
+        """Report any resources the sender is short of, returns True if they can afford it"""
+        short = {r: a for r, a in bundle.items() if balances[r] < a}
+        if not short:
+            return True
+
+        embed = discord.Embed(
+            title="❌ Insufficient Resources",
+            description=f"Not enough {', '.join(short)}!",
+            color=discord.Color.red()
+        )
+        for resource, amount in short.items():
+            resource_display = SethVisuals.resource_bar(balances[resource], amount, show_fraction=True)
+            embed.add_field(
+                name=f"{resource.capitalize()} Status",
+                value=f"{resource_display}\nYou have: **{balances[resource]}** | Need: **{amount}**",
+                inline=False
+            )
+        await ctx.send(embed=embed)
+        return False
+
+    async def settle_trade(self, message_id: int, trade: PendingTrade) -> str:
+        """Close the offer and move its bundle in one transaction.
+
+        Returns 'settled', 'short' if the sender can no longer cover it, or
+        'closed' if the offer was already closed, e.g. expired by another
+        process in a cluster.
+        """
+        food, medicine, coal = bundle_amounts(trade.bundle)
+
+        async def transfer(db: aiosqlite.Connection) -> str:
+            cursor = await db.execute("DELETE FROM pending_trades WHERE message_id = ?", (message_id,))
+            if cursor.rowcount != 1:
+                return 'closed'
+
+            # The balance check and the debit are one statement, so a feed,
+            # mine or other trade that lands first simply makes this match 0 rows
+            cursor = await db.execute(
+                TRADE_DEBIT, (food, medicine, coal, trade.sender_id, food, medicine, coal)
+            )
+            if cursor.rowcount != 1:
+                return 'short'
+
+            await db.execute(
+                """INSERT INTO resources (user_id, food, medicine, coal) VALUES (?, ?, ?, ?)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    food = food + excluded.food,
+                    medicine = medicine + excluded.medicine,
+                    coal = coal + excluded.coal""",
+                (trade.receiver_id, food, medicine, coal)
+            )
+            await record_ledger(db, [
+                (trade.sender_id, -food, -medicine, -coal, 'trade'),
+                (trade.receiver_id, food, medicine, coal, 'trade'),
+            ])
+            return 'settled'
+
+        return await write(transfer)
+
+    async def _open_trade(self, message_id: int, trade: PendingTrade) -> None:
+        expires_at = int(time.time() + TRADE_TIMEOUT)
+        # Registered before the write, so a reaction that lands meanwhile is not
+        # dropped; its settlement is queued behind this insert on the writer
+        self.pending_trades[message_id] = trade
+        self.expiry.schedule(message_id, expires_at)
+
+        async def post(db: aiosqlite.Connection) -> None:
+            await db.execute(
+                """INSERT INTO pending_trades (message_id, channel_id, sender_id, receiver_id,
+                    food, medicine, coal, sender_seth, receiver_seth, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (message_id, trade.channel_id, trade.sender_id, trade.receiver_id,
+                 *bundle_amounts(trade.bundle), trade.sender_seth, trade.receiver_seth, expires_at)
+            )
+
+        try:
+            await write(post)
+        except Exception:
+            self.pending_trades.pop(message_id, None)
+            self.expiry.cancel(message_id)
+            raise
+
+    async def _close_offers(self, message_ids: list[int]) -> None:
+        async def close(db: aiosqlite.Connection) -> None:
+            await db.executemany(
+                "DELETE FROM pending_trades WHERE message_id = ?",
+                [(message_id,) for message_id in message_ids]
+            )
+
+        await write(close)
+
+    async def _announce(self, trade: PendingTrade, content: str | None = None, embed: discord.Embed | None = None) -> None:
+        channel = self.bot.get_channel(trade.channel_id)
+        if channel is not None:
+            await channel.send(content, embed=embed)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent) -> None:
+        """Route ✅/❌ on an open offer to that trade"""
+        trade = self.pending_trades.get(payload.message_id)
+        if trade is None or payload.user_id != trade.receiver_id:
+            return
+        emoji = str(payload.emoji)
+        if emoji not in (ACCEPT, DECLINE):
+            return
+
+        # Claim the trade before any await so a double click can't settle twice
+        del self.pending_trades[payload.message_id]
+        deadline = self.expiry.get(payload.message_id)
+        self.expiry.cancel(payload.message_id)
+
+        try:
+            if emoji == DECLINE:
+                await self._close_offers([payload.message_id])
+            else:
+                outcome = await self.settle_trade(payload.message_id, trade)
+        except (aiosqlite.Error, WriterStopped) as e:
+            # Nothing was committed, so the offer is still open: hand the claim back
+            print(f"❌ Could not settle trade {payload.message_id}: {e}")
+            self.pending_trades[payload.message_id] = trade
+            if deadline is not None:
+                self.expiry.schedule(payload.message_id, deadline)
+            await self._announce(trade, "⚠️ **Trade Failed!** Something went wrong, the offer is still open. React again to retry.")
+            return
+
+        if emoji == DECLINE:
+            await self._announce(trade, f"❌ **Trade Declined!** <@{trade.receiver_id}> rejected the offer.")
+            return
+        if outcome == 'closed':
+            # Whoever closed it has announced that already
+            return
+        if outcome == 'short':
+            await self._announce(
+                trade, f"❌ **Trade Failed!** <@{trade.sender_id}> no longer has {format_bundle(trade.bundle)} to give."
+            )
+            return
+
+        embed = discord.Embed(
+            title="✅ **Trade Complete!**",
+            description="Resources successfully transferred!",
+            color=0x2ecc71
+        )
+        embed.add_field(
+            name="Transaction",
+            value=f"<@{trade.sender_id}> ➡️ {format_bundle(trade.bundle)} ➡️ <@{trade.receiver_id}>",
+            inline=False
+        )
+        embed.add_field(
+            name="Seth Involved",
+            value=f"**{trade.sender_seth}** traded with **{trade.receiver_seth}**",
+            inline=False
+        )
+        await self._announce(trade, embed=embed)
+
+    @tasks.loop(seconds=1)
+    async def expire_trades(self) -> None:
+        """Close offers whose TRADE_TIMEOUT has passed"""
+        expired = [
+            (message_id, self.pending_trades.pop(message_id))
+            for message_id in self.expiry.advance(time.time())
+            if message_id in self.pending_trades
+        ]
+        if not expired:
+            return
+
+        await self._close_offers([message_id for message_id, _ in expired])
+        for _, trade in expired:
+            await self._announce(
+                trade, f"⏰ **Trade Expired!** The offer timed out after {int(TRADE_TIMEOUT)} seconds."
+            )
+
+    @expire_trades.before_loop
+    async def before_expire_trades(self) -> None:
+        await self.bot.wait_until_ready()
 
     @commands.command(name='trade')
     async def trade(self, ctx: commands.Context, *, args: str | None = None) -> None:
@@ -26,12 +257,12 @@ class Trading(commands.Cog):
             )
             embed.add_field(
                 name="Usage",
-                value="`!trade @user [food/medicine/coal] [amount]`",
+                value="`!trade @user [food/medicine/coal] [amount] ...`",
                 inline=False
             )
             embed.add_field(
                 name="Example",
-                value="`!trade @friend food 3`\n`!trade @buddy coal 10`",
+                value="`!trade @friend food 3`\n`!trade @buddy coal 10 medicine 1`",
                 inline=False
             )
             embed.add_field(
@@ -44,29 +275,24 @@ class Trading(commands.Cog):
 
         parts = args.split()
         if len(parts) < 3:
-            await ctx.send("❌ Usage: `!trade @user [food/medicine/coal] [amount]`")
+            await ctx.send("❌ Usage: `!trade @user [food/medicine/coal] [amount] ...`")
             return
 
-        member = None
         if ctx.message.mentions:
             member = ctx.message.mentions[0]
-            resource_index = 1
         else:
-            potential_name = parts[0].replace('@', '')
-            member = discord.utils.get(ctx.guild.members, name=potential_name)
-            if not member:
-                member = discord.utils.get(ctx.guild.members, display_name=potential_name)
-            resource_index = 1
+            members = self.bot.get_cog('Members')
+            member = members.find(ctx.guild, parts[0]) if ctx.guild and members else None
+        resource_index = 1
 
         if not member:
             await ctx.send("❌ User not found! Make sure to @ mention them properly")
             return
 
         try:
-            resource = parts[resource_index].lower()
-            amount = int(parts[resource_index + 1])
-        except (IndexError, ValueError):
-            await ctx.send("❌ Usage: `!trade @user [food/medicine/coal] [amount]`")
+            bundle = parse_bundle(parts[resource_index:])
+        except BundleError as e:
+            await ctx.send(str(e))
             return
 
         if member.id == ctx.author.id:
@@ -77,133 +303,41 @@ class Trading(commands.Cog):
             await ctx.send("🤖 Bots don't have Seths! They can't trade.")
             return
 
-        safe_columns = {'food': 'food', 'medicine': 'medicine', 'coal': 'coal'}
-        if resource not in safe_columns:
-            await ctx.send("❌ Invalid resource! Choose: `food`, `medicine`, or `coal`")
+        author, target = await user_snapshots(ctx, ctx.author.id, member.id)
+        author_seth, target_seth = author.seth, target.seth
+        if not author_seth:
+            await ctx.send("💀 You need a living Seth to trade!")
             return
-        column = safe_columns[resource]
 
-        if amount <= 0:
-            await ctx.send("❌ Amount must be positive!")
+        if not target_seth:
+            await ctx.send(f"💀 {member.name} doesn't have a living Seth!")
             return
 
-        if amount > MAX_TRADE_AMOUNT:
-            await ctx.send(f"❌ That's too much! Trade max {MAX_TRADE_AMOUNT} at a time.")
+        if not author.resources:
+            await ctx.send("❌ You have no resources! Use `!mine` to gather some.")
             return
 
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute(
-                "SELECT name FROM seths WHERE user_id = ? AND is_alive = 1",
-                (ctx.author.id,)
-            )
-            author_seth = await cursor.fetchone()
-            if not author_seth:
-                await ctx.send("💀 You need a living Seth to trade!")
-                return
-
-            cursor = await db.execute(
-                "SELECT name FROM seths WHERE user_id = ? AND is_alive = 1",
-                (member.id,)
-            )
-            target_seth = await cursor.fetchone()
-            if not target_seth:
-                await ctx.send(f"💀 {member.name} doesn't have a living Seth!")
-                return
-
-            cursor = await db.execute(
-                f"SELECT {column} FROM resources WHERE user_id = ?",
-                (ctx.author.id,)
-            )
-            result = await cursor.fetchone()
-            if not result:
-                await ctx.send("❌ You have no resources! Use `!mine` to gather some.")
-                return
-
-            current_amount = result[0]
-            if current_amount < amount:
-                resource_display = SethVisuals.resource_bar(current_amount, amount, show_fraction=True)
-                embed = discord.Embed(
-                    title="❌ Insufficient Resources",
-                    description=f"Not enough {resource}!",
-                    color=discord.Color.red()
-                )
-                embed.add_field(
-                    name=f"{resource.capitalize()} Status",
-                    value=f"{resource_display}\nYou have: **{current_amount}** | Need: **{amount}**",
-                    inline=False
-                )
-                await ctx.send(embed=embed)
-                return
-
-        trade_id = f"{ctx.author.id}:{member.id}:{ctx.message.id}"
-        self.pending_trades[trade_id] = {
-            'from': ctx.author,
-            'to': member,
-            'resource': resource,
-            'amount': amount,
-            'channel': ctx.channel
-        }
-
-        resource_emojis = {'food': '🍖', 'medicine': '💊', 'coal': '⚫'}
+        balances = dict(zip(RESOURCES, author.resources))
+        if not await self._send_shortfall(ctx, balances, bundle):
+            return
 
         embed = discord.Embed(
             title="🤝 **Trade Offer**",
             description=f"{ctx.author.mention} wants to trade with {member.mention}!",
             color=0xf39c12
         )
-        embed.add_field(name="From", value=f"{ctx.author.name}'s **{author_seth[0]}**", inline=True)
-        embed.add_field(name="Offering", value=f"{resource_emojis.get(resource, '')} **{amount}** {resource.capitalize()}", inline=True)
-        embed.add_field(name="To", value=f"{member.name}'s **{target_seth[0]}**", inline=True)
-        embed.set_footer(text=f"{member.name}, react ✅ to accept or ❌ to decline ({int(TRADE_TIMEOUT)}s)")
+        embed.add_field(name="From", value=f"{ctx.author.name}'s **{author_seth.name}**", inline=True)
+        embed.add_field(name="Offering", value=format_bundle(bundle), inline=True)
+        embed.add_field(name="To", value=f"{member.name}'s **{target_seth.name}**", inline=True)
+        embed.set_footer(text=f"{member.name}, react {ACCEPT} to accept or {DECLINE} to decline ({int(TRADE_TIMEOUT)}s)")
 
         msg = await ctx.send(embed=embed)
-        await msg.add_reaction('✅')
-        await msg.add_reaction('❌')
-
-        def check(reaction: discord.Reaction, user: discord.User) -> bool:
-            return (user.id == member.id and
-                   reaction.message.id == msg.id and
-                   str(reaction.emoji) in ['✅', '❌'])
-
-        try:
-            reaction, user = await self.bot.wait_for('reaction_add', timeout=TRADE_TIMEOUT, check=check)
-
-            if str(reaction.emoji) == '✅':
-                async with aiosqlite.connect(self.db_path) as db:
-                    await db.execute(
-                        f"UPDATE resources SET {column} = {column} - ? WHERE user_id = ?",
-                        (amount, ctx.author.id)
-                    )
-                    await db.execute(
-                        f"UPDATE resources SET {column} = {column} + ? WHERE user_id = ?",
-                        (amount, member.id)
-                    )
-                    await db.commit()
-
-                embed = discord.Embed(
-                    title="✅ **Trade Complete!**",
-                    description="Resources successfully transferred!",
-                    color=0x2ecc71
-                )
-                embed.add_field(
-                    name="Transaction",
-                    value=f"{ctx.author.mention} ➡️ **{amount}** {resource_emojis.get(resource, '')} {resource} ➡️ {member.mention}",
-                    inline=False
-                )
-                embed.add_field(
-                    name="Seth Involved",
-                    value=f"**{author_seth[0]}** traded with **{target_seth[0]}**",
-                    inline=False
-                )
-                await ctx.send(embed=embed)
-            else:
-                await ctx.send(f"❌ **Trade Declined!** {member.name} rejected the offer.")
-
-        except asyncio.TimeoutError:
-            await ctx.send(f"⏰ **Trade Expired!** The offer timed out after {int(TRADE_TIMEOUT)} seconds.")
-        finally:
-            if trade_id in self.pending_trades:
-                del self.pending_trades[trade_id]
+        await self._open_trade(
+            msg.id,
+            PendingTrade(ctx.channel.id, ctx.author.id, member.id, bundle, author_seth.name, target_seth.name)
+        )
+        await msg.add_reaction(ACCEPT)
+        await msg.add_reaction(DECLINE)
 
 async def setup(bot: commands.Bot) -> None:
     await bot.add_cog(Trading(bot))
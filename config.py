@@ -9,8 +9,40 @@ load_dotenv()
 # Bot Configuration
 DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
 BOT_PREFIX = os.getenv('BOT_PREFIX', '!')
+# Gateway shards; unset lets Discord recommend a count for our guilds
+SHARD_COUNT = int(os.getenv('SHARD_COUNT')) if os.getenv('SHARD_COUNT') else None
+# Cluster mode: this process runs only these shards (e.g. "0-3,8"), other processes the rest
+SHARD_IDS = os.getenv('SHARD_IDS')
+CLUSTERED = SHARD_IDS is not None
+LEASE_TTL = 30.0        # seconds a silent process keeps a singleton loop; the failover window
+LEASE_RENEW = 10.0      # seconds between lease heartbeats
+CLUSTER_POLL = 2.0      # seconds between checks for events from other processes
+CLUSTER_EVENT_RETENTION = 10 * 60  # seconds relayed events are kept
+# Outbound Messages
+OUTBOX_BURST = 5        # messages per channel per OUTBOX_PERIOD, Discord's per-channel limit
+OUTBOX_PERIOD = 5.0     # seconds
+
+# Metrics: Prometheus text at http://METRICS_HOST:METRICS_PORT/metrics; port 0 turns it off
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9464'))
+
+# Profiler (!profile)
+PROFILE_INTERVAL = 0.01       # CPU seconds between stack samples at least
+PROFILE_MAX_OVERHEAD = 0.02   # share of the CPU time sampling may take
+PROFILE_MAX_SECONDS = 15 * 60 # a forgotten profile stops itself
+
+# Event loop monitor (!lag)
+LOOP_LAG_INTERVAL = 0.5       # seconds between lag probes
+LOOP_SLOW_CALLBACK = 0.1      # seconds a callback may hold the loop, asyncio's own default
+LOOP_STALL_HISTORY = 50       # stalls kept for !lag
+
 # Database Configuration
 DATABASE_PATH = 'data/seth.db'
+WRITE_BATCH_SIZE = 64         # mutations committed together at most
+WRITE_BATCH_DELAY = 0.005     # seconds a batch waits to fill before committing
+SETH_CACHE_SIZE = 10_000      # living Seth records kept in memory
+SLOW_QUERY_SECONDS = 0.05     # statements slower than this are logged and explained
+SETH_CAS_RETRIES = 5          # attempts at a Seth vitals write before giving up
 
 # Game Configuration
 STARTING_HEALTH = 100
@@ -18,6 +50,9 @@ STARTING_HUNGER = 0
 MAX_HUNGER = 100
 MINE_COOLDOWN = 60  # seconds
 PREMIUM_MINE_COOLDOWN = 30  # seconds for premium users
+EXPEDITION_MAX_DURATION = 12 * 60 * 60  # seconds of idle mining one !claim can pay out
+LEDGER_RETENTION = 24 * 60 * 60  # seconds of resource history kept before folding into snapshots
+LEDGER_COMPACT_INTERVAL = 60 * 60  # seconds between ledger compactions
 
 # Game Defaults
 STARTING_FOOD = 5
@@ -31,6 +66,7 @@ DEFAULT_RELATIONSHIP_SCORE = 50
 
 # Decay System
 DECAY_INTERVAL = 120          # seconds between decay cycles
+DECAY_TICK_SLACK = 10         # seconds a cycle may run early, e.g. after the loop was held up
 HUNGER_PER_CYCLE = 5
 NATURAL_DECAY = 1             # base health loss per cycle
 SEVERE_HUNGER_THRESHOLD = 80
@@ -56,6 +92,12 @@ COAL_MINE_MAX = 5
 MAX_TRADE_AMOUNT = 100
 TRADE_TIMEOUT = 30.0
 
+# Market
+MARKET_MAX_QUANTITY = 100     # units of the base resource per order
+MARKET_MAX_PRICE = 100        # quote units per base unit
+MARKET_MAX_ORDERS = 10        # open orders per user across all pairs
+MARKET_DEPTH = 5              # price levels shown per side by !market book
+
 # Status Display Thresholds
 HEALTH_EXCELLENT_THRESHOLD = 80
 HEALTH_GOOD_THRESHOLD = 60
@@ -76,6 +118,10 @@ HEALTH_POOR_DISPLAY = 25
 HUNGER_STARVING_DISPLAY = 80
 HUNGER_HUNGRY_DISPLAY = 50
 
+# Server Roster Pagination
+SERVER_PAGE_SIZE = 9          # embed fields per page (Discord caps at 25)
+SERVER_PAGE_TIMEOUT = 120     # seconds before page buttons are disabled
+
 # Warning Thresholds (decay system)
 HEALTH_CRITICAL_WARNING = 10
 HUNGER_CRITICAL_WARNING = 70
@@ -86,9 +132,15 @@ HUNGER_CRITICAL_STATUS = 80
 HEALTH_WARNING_STATUS = 40
 HUNGER_WARNING_STATUS = 60
 
+# Census
+CENSUS_BAND_WIDTH = 20        # health/hunger histogram rows span this many points
+CENSUS_SKETCH_ACCURACY = 0.02 # relative error of lifespan/generation percentiles
+CENSUS_SAVE_INTERVAL = 60     # seconds between saves of changed lifespan sketches
+
 # Score Calculation
 GENERATION_SCORE_WEIGHT = 10
 AGE_SCORE_DIVISOR = 10
+RANKINGS_SIZE = 10            # Seths shown by !rankings
 
 # Visual Bars
 BAR_SEGMENTS = 10
@@ -99,6 +151,8 @@ SECONDS_PER_HOUR = 3600
 SECONDS_PER_DAY = 86400
 
 # Drama System
+DRAMA_INTERVAL = 5 * 60       # seconds between drama events
+DRAMA_TICK_SLACK = 10         # seconds an event may start early, e.g. after the loop was held up
 DRAMA_VOTE_DURATION = 180     # seconds
 ROMANCE_DRAMA_CHANCE = 0.4
 CONFLICT_DRAMA_CHANCE = 0.5
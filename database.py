@@ -3,8 +3,184 @@ Seth Bot Database
 Handles all database operations with aiosqlite
 """
 import aiosqlite
+import asyncio
 import os
-from config import DATABASE_PATH
+import sqlite3
+import time
+import weakref
+from aiosqlite.context import contextmanager
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+from config import (
+    DATABASE_PATH, WRITE_BATCH_SIZE, WRITE_BATCH_DELAY, SETH_CACHE_SIZE, SETH_CAS_RETRIES, CLUSTERED,
+    SLOW_QUERY_SECONDS,
+)
+from utils.seth_cache import MISSING, SethCache, SethRecord
+from utils.snapshot import UserSnapshot, snapshot_from_row, snapshot_query
+from utils.metrics import DB_SECONDS, DB_WRITE_ERRORS
+from utils.sqlstats import SqlStats, StatementStats, format_plan
+
+# Current time as integer epoch seconds, for use inside SQL statements
+NOW_EPOCH = "CAST(strftime('%s', 'now') AS INTEGER)"
+
+# Every statement this process has run, for !dbstats
+sql_stats = SqlStats()
+
+# Tables the timestamp migration rebuilds, so the fresh and migrated schemas match
+SETHS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        seth_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        generation INTEGER DEFAULT 1,
+        health INTEGER DEFAULT 100,
+        hunger INTEGER DEFAULT 0,
+        is_alive INTEGER DEFAULT 1,
+        birth_ts INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+        death_ts INTEGER,
+        death_reason TEXT,
+        parent_id INTEGER,
+        guild_id INTEGER,
+        version INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (user_id) REFERENCES users(user_id),
+        FOREIGN KEY (parent_id) REFERENCES seths(seth_id)
+    )
+'''
+GRAVEYARD_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        seth_id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        generation INTEGER,
+        lived_days INTEGER,
+        death_reason TEXT,
+        death_ts INTEGER,
+        memorial_message TEXT,
+        FOREIGN KEY (user_id) REFERENCES users(user_id)
+    )
+'''
+
+class TimedConnection(aiosqlite.Connection):
+    """An aiosqlite connection that times and traces every statement it runs"""
+
+    def __init__(self, connector: Callable[[], sqlite3.Connection], iter_chunk_size: int, path: str) -> None:
+        super().__init__(connector, iter_chunk_size)
+        self.path = path
+
+    @contextmanager
+    async def execute(self, sql: str, parameters: Any = None) -> aiosqlite.Cursor:
+        start = time.perf_counter()
+        with DB_SECONDS.labels(_verb(sql)).time():
+            cursor = await super().execute(sql, parameters)
+        return TracedCursor(self, cursor._cursor, sql, parameters, time.perf_counter() - start)
+
+    @contextmanager
+    async def executemany(self, sql: str, parameters: Any) -> aiosqlite.Cursor:
+        start = time.perf_counter()
+        with DB_SECONDS.labels(_verb(sql)).time():
+            cursor = await super().executemany(sql, parameters)
+        # The parameters may have been an iterator, so there are none left to explain with
+        return TracedCursor(self, cursor._cursor, sql, None, time.perf_counter() - start)
+
+class TracedCursor(aiosqlite.Cursor):
+    """Adds its statement's fetches, rows and run time to sql_stats.
+
+    A call's run time is the execute plus the fetches up to the first
+    fetchone, a fetchall, a short fetchmany or close(), whichever comes
+    first; statements that return no rows are done at once. Fetches after
+    that still count towards the statement's total time and rows.
+    """
+
+    def __init__(self, conn: TimedConnection, cursor: sqlite3.Cursor, sql: str,
+                 parameters: Any, seconds: float) -> None:
+        super().__init__(conn, cursor)
+        self._stats = sql_stats.statement(sql)
+        self._stats.seconds += seconds
+        self._sql = sql
+        self._parameters = parameters
+        self._seconds = seconds
+        self._done = False
+        if cursor.description is None:
+            self._finish()
+
+    async def fetchone(self) -> Any:
+        row = await self._fetch(super().fetchone())
+        self._count(0 if row is None else 1)
+        self._finish()
+        return row
+
+    async def fetchmany(self, size: int | None = None) -> Any:
+        rows = await self._fetch(super().fetchmany(size))
+        self._count(len(rows))
+        if len(rows) < (size or self.arraysize):
+            self._finish()
+        return rows
+
+    async def fetchall(self) -> Any:
+        rows = await self._fetch(super().fetchall())
+        self._count(len(rows))
+        self._finish()
+        return rows
+
+    async def close(self) -> None:
+        self._finish()
+        await super().close()
+
+    async def _fetch(self, fetch: Awaitable[Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return await fetch
+        finally:
+            seconds = time.perf_counter() - start
+            self._stats.seconds += seconds
+            if not self._done:
+                self._seconds += seconds
+
+    def _count(self, rows: int) -> None:
+        self._stats.rows += rows
+
+    def _finish(self) -> None:
+        if self._done:
+            return
+        self._done = True
+        self._stats.called(self._seconds)
+        if self._seconds >= SLOW_QUERY_SECONDS:
+            _slow_query(self._conn.path, self._stats, self._sql, self._parameters, self._seconds)
+        self._parameters = None
+
+def _verb(sql: str) -> str:
+    """SELECT, INSERT, ... - the statement's first keyword"""
+    words = sql.split(None, 1)
+    return words[0].upper() if words else ''
+
+def connect(path: str = DATABASE_PATH, **kwargs: Any) -> TimedConnection:
+    """Open a connection like aiosqlite.connect, with its statements timed into metrics and sql_stats"""
+    return TimedConnection(lambda: sqlite3.connect(path, **kwargs), 64, path)
+
+# Statements that have a query plan worth explaining
+EXPLAINABLE = {'SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE'}
+_explaining: set[asyncio.Task] = set()
+
+def _slow_query(path: str, stats: StatementStats, sql: str, parameters: Any, seconds: float) -> None:
+    """Log a slow call; the first time a statement is slow, explain it in the background"""
+    stats.slow += 1
+    print(f"🐌 Slow query ({seconds * 1000:.0f}ms): {stats.sql}")
+    if stats.plan is not None or _verb(sql) not in EXPLAINABLE:
+        return
+    stats.plan = ''  # explaining
+    task = asyncio.get_running_loop().create_task(_explain(path, stats, sql, parameters))
+    _explaining.add(task)
+    task.add_done_callback(_explaining.discard)
+
+async def _explain(path: str, stats: StatementStats, sql: str, parameters: Any) -> None:
+    # A plain connection, so explaining is not traced itself
+    try:
+        async with aiosqlite.connect(path) as db:
+            cursor = await db.execute(f"EXPLAIN QUERY PLAN {sql}", parameters)
+            stats.plan = format_plan(await cursor.fetchall())
+    except (sqlite3.Error, ValueError) as e:
+        stats.plan = f"(could not explain: {e})"
+    print(f"🐌 Plan for {stats.sql}:\n{stats.plan}")
 
 async def init_db() -> None:
     """Initialize database with all required tables"""
@@ -12,7 +188,11 @@ async def init_db() -> None:
     # Ensure data directory exists
     os.makedirs('data', exist_ok=True)
     
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with connect(DATABASE_PATH) as db:
+        if CLUSTERED:
+            # Several processes share the file; WAL lets their reads run beside the writer
+            await db.execute("PRAGMA journal_mode = WAL")
+
         # Users table
         await db.execute('''
             CREATE TABLE IF NOT EXISTS users (
@@ -24,23 +204,7 @@ async def init_db() -> None:
         ''')
         
         # Seths table - the core entities
-        await db.execute('''
-            CREATE TABLE IF NOT EXISTS seths (
-                seth_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                name TEXT NOT NULL,
-                generation INTEGER DEFAULT 1,
-                health INTEGER DEFAULT 100,
-                hunger INTEGER DEFAULT 0,
-                is_alive INTEGER DEFAULT 1,
-                birth_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                death_time TIMESTAMP,
-                death_reason TEXT,
-                parent_id INTEGER,
-                FOREIGN KEY (user_id) REFERENCES users(user_id),
-                FOREIGN KEY (parent_id) REFERENCES seths(seth_id)
-            )
-        ''')
+        await db.execute(SETHS_TABLE.format(table='seths'))
         
         # Resources table
         await db.execute('''
@@ -49,33 +213,627 @@ async def init_db() -> None:
                 food INTEGER DEFAULT 5,
                 medicine INTEGER DEFAULT 2,
                 coal INTEGER DEFAULT 0,
-                last_mine_time TIMESTAMP,
+                last_mine_time INTEGER,  -- epoch seconds
+                expedition_start INTEGER,  -- epoch seconds, NULL when not on one
+                expedition_cooldown INTEGER,  -- seconds per mining window, fixed when it set out
                 FOREIGN KEY (user_id) REFERENCES users(user_id)
             )
         ''')
         
         # Graveyard table - memorial for dead Seths
+        await db.execute(GRAVEYARD_TABLE.format(table='graveyard'))
+        
+        # Census sketches - serialized per-guild lifespan summaries
+        await db.execute('''
+            CREATE TABLE IF NOT EXISTS census_sketches (
+                guild_id INTEGER NOT NULL,
+                metric TEXT NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (guild_id, metric)
+            )
+        ''')
+
+        # Trade offers awaiting the receiver's reaction, keyed by offer message
+        await db.execute('''
+            CREATE TABLE IF NOT EXISTS pending_trades (
+                message_id INTEGER PRIMARY KEY,
+                channel_id INTEGER NOT NULL,
+                sender_id INTEGER NOT NULL,
+                receiver_id INTEGER NOT NULL,
+                food INTEGER NOT NULL DEFAULT 0,
+                medicine INTEGER NOT NULL DEFAULT 0,
+                coal INTEGER NOT NULL DEFAULT 0,
+                sender_seth TEXT NOT NULL,
+                receiver_seth TEXT NOT NULL,
+                expires_at INTEGER NOT NULL  -- epoch seconds
+            )
+        ''')
+
+        # Per-guild announcement channel overrides set with !setchannel
         await db.execute('''
-            CREATE TABLE IF NOT EXISTS graveyard (
-                seth_id INTEGER PRIMARY KEY,
+            CREATE TABLE IF NOT EXISTS guild_channels (
+                guild_id INTEGER NOT NULL,
+                purpose TEXT NOT NULL,
+                channel_id INTEGER NOT NULL,
+                PRIMARY KEY (guild_id, purpose)
+            )
+        ''')
+
+        # Cluster mode: which process runs each singleton loop, until when
+        await db.execute('''
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                holder TEXT NOT NULL,
+                expires REAL NOT NULL  -- epoch seconds
+            )
+        ''')
+
+        # When each singleton loop last ran, so a lease changing hands never runs it twice
+        await db.execute('''
+            CREATE TABLE IF NOT EXISTS loop_ticks (
+                name TEXT PRIMARY KEY,
+                last_tick REAL NOT NULL  -- epoch seconds
+            )
+        ''')
+
+        # Cluster mode: bot events relayed to the other processes
+        await db.execute('''
+            CREATE TABLE IF NOT EXISTS cluster_events (
+                event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                origin TEXT NOT NULL,
+                event TEXT NOT NULL,
+                args TEXT NOT NULL,  -- JSON list
+                created_ts INTEGER NOT NULL
+            )
+        ''')
+
+        # Resting market orders; quantity is what is still open and escrowed
+        await db.execute('''
+            CREATE TABLE IF NOT EXISTS market_orders (
+                order_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 user_id INTEGER NOT NULL,
-                name TEXT NOT NULL,
-                generation INTEGER,
-                lived_days INTEGER,
-                death_reason TEXT,
-                death_time TIMESTAMP,
-                memorial_message TEXT,
+                pair TEXT NOT NULL,
+                side TEXT NOT NULL CHECK (side IN ('buy', 'sell')),
+                price INTEGER NOT NULL,
+                quantity INTEGER NOT NULL,
                 FOREIGN KEY (user_id) REFERENCES users(user_id)
             )
         ''')
-        
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_market_orders_user ON market_orders (user_id)"
+        )
+
+        # Resource ledger - one row per balance change, reason is e.g.
+        # 'starter', 'mine', 'expedition', 'feed', 'heal', 'trade',
+        # 'market_escrow', 'market_fill' or 'market_refund'
+        await db.execute(f'''
+            CREATE TABLE IF NOT EXISTS resource_ledger (
+                entry_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                food INTEGER NOT NULL DEFAULT 0,
+                medicine INTEGER NOT NULL DEFAULT 0,
+                coal INTEGER NOT NULL DEFAULT 0,
+                reason TEXT NOT NULL,
+                created_ts INTEGER NOT NULL DEFAULT ({NOW_EPOCH})
+            )
+        ''')
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_resource_ledger_user ON resource_ledger (user_id, entry_id)"
+        )
+
+        # Balances with every ledger entry up to the last compaction folded in
+        seed_snapshots = not await _table_exists(db, 'resource_snapshots')
+        await db.execute(f'''
+            CREATE TABLE IF NOT EXISTS resource_snapshots (
+                user_id INTEGER PRIMARY KEY,
+                food INTEGER NOT NULL DEFAULT 0,
+                medicine INTEGER NOT NULL DEFAULT 0,
+                coal INTEGER NOT NULL DEFAULT 0,
+                updated_ts INTEGER NOT NULL DEFAULT ({NOW_EPOCH})
+            )
+        ''')
+        if seed_snapshots:
+            # Balances from before the ledger existed become the opening snapshot
+            await db.execute(
+                """INSERT INTO resource_snapshots (user_id, food, medicine, coal)
+                SELECT user_id, food, medicine, coal FROM resources"""
+            )
+
+        # Migrations for databases created before these columns existed
+        await _add_column(db, 'seths', 'guild_id', 'INTEGER')
+        await _add_column(db, 'seths', 'version', 'INTEGER NOT NULL DEFAULT 0')
+        await _add_column(db, 'resources', 'expedition_start', 'INTEGER')
+        await _add_column(db, 'resources', 'expedition_cooldown', 'INTEGER')
+        await _migrate_timestamps(db)
+
+        # Compatibility view: ISO text timestamps and ages derived from epoch columns
+        await db.execute(f'''
+            CREATE VIEW IF NOT EXISTS seths_compat AS
+            SELECT s.*,
+                datetime(s.birth_ts, 'unixepoch') AS birth_time,
+                datetime(s.death_ts, 'unixepoch') AS death_time,
+                COALESCE(s.death_ts, {NOW_EPOCH}) - s.birth_ts AS age_seconds
+            FROM seths s
+        ''')
+
+        # Lifespan index for !top
+        await db.execute('''
+            CREATE INDEX IF NOT EXISTS idx_seths_lifespan
+            ON seths (death_ts - birth_ts)
+            WHERE is_alive = 0
+        ''')
+
+        # Per-owner lookups: the living Seth, lifetime count and best generation
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_seths_user ON seths (user_id, generation)"
+        )
+
+        # Keyset index for the per-guild !server roster
+        await db.execute('''
+            CREATE INDEX IF NOT EXISTS idx_seths_guild_roster
+            ON seths (guild_id, generation DESC, health DESC, seth_id)
+            WHERE is_alive = 1
+        ''')
+
+        await _create_drama_tables(db)
+
         await db.commit()
         print("✅ Database initialized with all tables!")
 
+async def _create_drama_tables(db: aiosqlite.Connection) -> None:
+    """Create NPC relationship tables and seed the NPCs"""
+    # NPC relationship matrix
+    await db.execute('''
+        CREATE TABLE IF NOT EXISTS npc_relationships (
+            npc1 TEXT NOT NULL,
+            npc2 TEXT NOT NULL,
+            relationship_type TEXT DEFAULT 'neutral',
+            relationship_score INTEGER DEFAULT 50,
+            last_event TEXT,
+            last_change TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (npc1, npc2)
+        )
+    ''')
+
+    # Current NPC states (dating, fighting, etc)
+    await db.execute('''
+        CREATE TABLE IF NOT EXISTS npc_states (
+            npc_name TEXT PRIMARY KEY,
+            current_mood TEXT DEFAULT 'normal',
+            dating TEXT,
+            rival TEXT,
+            health INTEGER DEFAULT 100,
+            location TEXT DEFAULT 'village_square'
+        )
+    ''')
+
+    # Drama history
+    await db.execute('''
+        CREATE TABLE IF NOT EXISTS drama_history (
+            event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_type TEXT NOT NULL,
+            description TEXT NOT NULL,
+            npc1 TEXT,
+            npc2 TEXT,
+            player_votes_option1 INTEGER DEFAULT 0,
+            player_votes_option2 INTEGER DEFAULT 0,
+            player_votes_option3 INTEGER DEFAULT 0,
+            outcome TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Vote messages posted for a drama event, across every guild and process
+    await db.execute('''
+        CREATE TABLE IF NOT EXISTS drama_posts (
+            event_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            PRIMARY KEY (event_id, channel_id)
+        )
+    ''')
+
+    # Player drama participation
+    await db.execute('''
+        CREATE TABLE IF NOT EXISTS player_drama (
+            user_id INTEGER NOT NULL,
+            event_id INTEGER NOT NULL,
+            vote_choice INTEGER,
+            seth_involved BOOLEAN DEFAULT FALSE,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, event_id)
+        )
+    ''')
+
+    # Initialize NPCs if not exists
+    npcs = ['Luna', 'Marcus', 'Felix', 'Aria', 'Thorne']
+    for npc in npcs:
+        await db.execute('''
+            INSERT OR IGNORE INTO npc_states (npc_name) VALUES (?)
+        ''', (npc,))
+
+    # Initialize relationships
+    for i, npc1 in enumerate(npcs):
+        for npc2 in npcs[i+1:]:
+            await db.execute('''
+                INSERT OR IGNORE INTO npc_relationships (npc1, npc2)
+                VALUES (?, ?)
+            ''', (npc1, npc2))
+
+async def _table_exists(db: aiosqlite.Connection, table: str) -> bool:
+    cursor = await db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return await cursor.fetchone() is not None
+
+async def _columns(db: aiosqlite.Connection, table: str) -> set[str]:
+    """Column names of a table"""
+    cursor = await db.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in await cursor.fetchall()}
+
+async def _add_column(db: aiosqlite.Connection, table: str, column: str, definition: str) -> None:
+    """Add a column to an existing table if it is missing"""
+    if column not in await _columns(db, table):
+        await db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+def _epoch(columns: set[str], epoch: str, iso: str, fallback: str | None = None) -> str:
+    """SQL for an epoch column's value, taken from its old ISO text column where it is unset"""
+    parts = [epoch] if epoch in columns else []
+    if iso in columns:
+        parts.append(f"CAST(strftime('%s', {iso}) AS INTEGER)")
+    if fallback is not None:
+        parts.append(fallback)
+    if not parts:
+        return "NULL"
+    return parts[0] if len(parts) == 1 else f"COALESCE({', '.join(parts)})"
+
+async def _rebuild(db: aiosqlite.Connection, table: str, schema: str, computed: dict[str, str]) -> None:
+    """Recreate a table from its current schema and copy its rows across.
+
+    Columns the old table lacks get their defaults, and computed maps
+    a new column to the SQL that fills it. This is SQLite's documented
+    way to change a column's constraints, and unlike DROP COLUMN
+    (3.35+) it works on every SQLite version.
+    """
+    old = await _columns(db, table)
+    await db.execute(f"DROP TABLE IF EXISTS {table}_rebuild")
+    await db.execute(schema.format(table=f"{table}_rebuild"))
+    cursor = await db.execute(f"PRAGMA table_info({table}_rebuild)")
+    targets = [row[1] for row in await cursor.fetchall() if row[1] in computed or row[1] in old]
+    await db.execute(
+        f"INSERT INTO {table}_rebuild ({', '.join(targets)}) "
+        f"SELECT {', '.join(computed.get(column, column) for column in targets)} FROM {table}"
+    )
+    await db.execute(f"DROP TABLE {table}")
+    await db.execute(f"ALTER TABLE {table}_rebuild RENAME TO {table}")
+
+async def _migrate_timestamps(db: aiosqlite.Connection) -> None:
+    """Replace ISO text birth/death times with integer epoch seconds.
+
+    Also rebuilds seths migrated by earlier versions of this function,
+    which added birth_ts without its NOT NULL default.
+    """
+    cursor = await db.execute("PRAGMA table_info(seths)")
+    seths = {row[1]: bool(row[3]) for row in await cursor.fetchall()}  # name -> NOT NULL
+    if 'birth_time' in seths or 'death_time' in seths or not seths.get('birth_ts'):
+        columns = set(seths)
+        # A view on seths blocks the rename; init_db creates it again afterwards
+        await db.execute("DROP VIEW IF EXISTS seths_compat")
+        await _rebuild(db, 'seths', SETHS_TABLE, {
+            'birth_ts': _epoch(columns, 'birth_ts', 'birth_time', NOW_EPOCH),
+            'death_ts': _epoch(columns, 'death_ts', 'death_time'),
+        })
+
+    graveyard = await _columns(db, 'graveyard')
+    if 'death_time' in graveyard or 'death_ts' not in graveyard:
+        await _rebuild(db, 'graveyard', GRAVEYARD_TABLE, {
+            'death_ts': _epoch(graveyard, 'death_ts', 'death_time'),
+        })
+
+# (user_id, food, medicine, coal, reason)
+LedgerEntry = tuple[int, int, int, int, str]
+
+async def record_ledger(db: aiosqlite.Connection, entries: list[LedgerEntry]) -> None:
+    """Append balance changes; call inside the transaction that makes them"""
+    await db.executemany(
+        "INSERT INTO resource_ledger (user_id, food, medicine, coal, reason) VALUES (?, ?, ?, ?, ?)",
+        [entry for entry in entries if any(entry[1:4])]
+    )
+
+async def ledger_balance(db: aiosqlite.Connection, user_id: int) -> tuple[int, int, int] | None:
+    """(food, medicine, coal) from the user's snapshot plus the ledger tail since it"""
+    cursor = await db.execute(
+        """SELECT COALESCE(s.food, 0) + COALESCE(t.food, 0),
+            COALESCE(s.medicine, 0) + COALESCE(t.medicine, 0),
+            COALESCE(s.coal, 0) + COALESCE(t.coal, 0)
+        FROM (SELECT SUM(food) AS food, SUM(medicine) AS medicine, SUM(coal) AS coal, COUNT(*) AS entries
+              FROM resource_ledger WHERE user_id = ?) t
+        LEFT JOIN resource_snapshots s ON s.user_id = ?
+        WHERE t.entries > 0 OR s.user_id IS NOT NULL""",
+        (user_id, user_id)
+    )
+    return await cursor.fetchone()
+
+async def compact_ledger(db: aiosqlite.Connection, before_ts: int) -> int:
+    """Fold ledger entries older than before_ts into snapshots, returns entries folded"""
+    cursor = await db.execute(
+        "SELECT MAX(entry_id) FROM resource_ledger WHERE created_ts < ?", (before_ts,)
+    )
+    (through,) = await cursor.fetchone()
+    if through is None:
+        return 0
+
+    # Folding by entry id keeps every snapshot an exact prefix of the ledger
+    await db.execute(
+        f"""INSERT INTO resource_snapshots (user_id, food, medicine, coal)
+        SELECT user_id, SUM(food), SUM(medicine), SUM(coal)
+        FROM resource_ledger WHERE entry_id <= ? GROUP BY user_id
+        ON CONFLICT (user_id) DO UPDATE SET
+            food = food + excluded.food,
+            medicine = medicine + excluded.medicine,
+            coal = coal + excluded.coal,
+            updated_ts = {NOW_EPOCH}""",
+        (through,)
+    )
+    cursor = await db.execute("DELETE FROM resource_ledger WHERE entry_id <= ?", (through,))
+    await db.commit()
+    return cursor.rowcount
+
+T = TypeVar('T')
+Mutation = Callable[[aiosqlite.Connection], Awaitable[T]]
+
+class WriterStopped(Exception):
+    """The writer stopped, e.g. was cancelled, before a queued write was committed"""
+
+class WriteQueue:
+    """A single writer connection that commits queued mutations in batches.
+
+    A batch is whatever arrives within WRITE_BATCH_DELAY of its first
+    mutation, up to WRITE_BATCH_SIZE, committed as one transaction. Each
+    mutation runs in its own savepoint, so one that raises is rolled back
+    without touching the rest of its batch. Callers' futures resolve only
+    after the commit, so an awaited write is durable.
+
+    Mutations run one at a time on the writer, which also makes each one
+    atomic against every other queued write. They must only touch the
+    database and must not commit.
+    """
+
+    def __init__(self, path: str = DATABASE_PATH, max_batch: int = WRITE_BATCH_SIZE,
+                 max_delay: float = WRITE_BATCH_DELAY) -> None:
+        self.path = path
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.commits = 0
+        self.mutations = 0
+
+    async def submit(self, mutation: Mutation[T]) -> T:
+        """Queue a mutation and wait for the commit that includes it"""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run(self._queue))
+        future = loop.create_future()
+        self._queue.put_nowait((mutation, future))
+        return await future
+
+    @property
+    def depth(self) -> int:
+        """Mutations waiting for the writer to pick them up"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def close(self) -> None:
+        """Commit everything already queued, then stop the writer"""
+        if self._task is not None and not self._task.done():
+            self._queue.put_nowait(None)
+            await self._task
+        self._task = None
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            # isolation_level=None: transactions are begun and committed explicitly
+            async with connect(self.path, isolation_level=None) as db:
+                stopping = False
+                while not stopping:
+                    first = await queue.get()
+                    if first is None:
+                        break
+                    batch = [first]
+                    deadline = loop.time() + self.max_delay
+                    while len(batch) < self.max_batch:
+                        try:
+                            item = queue.get_nowait() if not queue.empty() else await asyncio.wait_for(
+                                queue.get(), max(0.0, deadline - loop.time())
+                            )
+                        except TimeoutError:
+                            break
+                        if item is None:
+                            stopping = True
+                            break
+                        batch.append(item)
+                    await self._apply(db, batch)
+                    batch = []
+        finally:
+            # However the writer stopped, nobody is left awaiting a write it will never make
+            while not queue.empty():
+                item = queue.get_nowait()
+                if item is not None:
+                    batch.append(item)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(WriterStopped("The database writer stopped before this write was committed"))
+
+    async def _apply(self, db: aiosqlite.Connection, batch: list[tuple[Mutation[Any], asyncio.Future]]) -> None:
+        outcomes = []
+        try:
+            await db.execute("BEGIN IMMEDIATE")
+            for mutation, future in batch:
+                await db.execute("SAVEPOINT mutation")
+                try:
+                    result = await mutation(db)
+                except Exception as e:  # noqa: BLE001 - raised again to the mutation's caller
+                    await db.execute("ROLLBACK TO mutation")
+                    await db.execute("RELEASE mutation")
+                    outcomes.append((future, None, e))
+                else:
+                    await db.execute("RELEASE mutation")
+                    outcomes.append((future, result, None))
+            await db.execute("COMMIT")
+            self.commits += 1
+            self.mutations += len(batch)
+        except sqlite3.Error as e:
+            # Nothing in the batch was committed; every caller sees the failure
+            DB_WRITE_ERRORS.labels().inc()
+            if db.in_transaction:
+                await db.execute("ROLLBACK")
+            outcomes = [(future, None, e) for _, future in batch]
+        except BaseException:
+            # Cancelled or broken mid-batch: undo it, and let _run fail the batch's futures
+            if db.in_transaction:
+                await db.execute("ROLLBACK")
+            raise
+
+        for future, result, error in outcomes:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+writer = WriteQueue()
+
+async def write(mutation: Mutation[T]) -> T:
+    """Run a mutation on the shared writer and wait until it is committed"""
+    return await writer.submit(mutation)
+
+# Other processes in a cluster can change any Seth unseen, so there nothing is cached
+seth_cache = SethCache(0 if CLUSTERED else SETH_CACHE_SIZE)
+
+async def living_seth(user_id: int) -> SethRecord | None:
+    """The user's living Seth, read through the cache.
+
+    Anything that changes a living Seth's row must update seth_cache
+    right after it commits, or this will keep serving the old values.
+    """
+    record = seth_cache.get(user_id)
+    if record is not MISSING:
+        return record
+
+    token = seth_cache.token()
+    async with connect(DATABASE_PATH) as db:
+        cursor = await db.execute(
+            f"SELECT {SethRecord.COLUMNS} FROM seths WHERE user_id = ? AND is_alive = 1",
+            (user_id,)
+        )
+        row = await cursor.fetchone()
+    record = SethRecord(*row) if row else None
+    seth_cache.put(user_id, record, token)
+    return record
+
+# Compare-and-set of a living Seth's vitals against the version it was read at
+SETH_CAS = """UPDATE seths SET health = ?, hunger = ?, version = version + 1
+    WHERE seth_id = ? AND version = ? AND is_alive = 1
+    RETURNING health, hunger, version"""
+
+# Credit a mining haul and stamp the cooldown, only for a user with a living Seth;
+# returns the new totals and the Seth's name, or no row
+MINE_UPSERT = """INSERT INTO resources (user_id, food, medicine, coal, last_mine_time)
+    SELECT ?, ?, ?, ?, ?
+    WHERE EXISTS (SELECT 1 FROM seths WHERE user_id = ? AND is_alive = 1)
+    ON CONFLICT (user_id) DO UPDATE SET
+        food = food + excluded.food,
+        medicine = medicine + excluded.medicine,
+        coal = coal + excluded.coal,
+        last_mine_time = excluded.last_mine_time
+    RETURNING food, medicine, coal,
+        (SELECT name FROM seths WHERE user_id = resources.user_id AND is_alive = 1)"""
+
+# Debit a whole bundle, or nothing if the user is short on any of it
+TRADE_DEBIT = """UPDATE resources
+    SET food = food - ?, medicine = medicine - ?, coal = coal - ?
+    WHERE user_id = ? AND food >= ? AND medicine >= ? AND coal >= ?"""
+
+class StaleSeth(Exception):
+    """A Seth changed between being read and written"""
+
+class SethGone(Exception):
+    """A Seth died before a change to it could be written"""
+
+VitalsChange = Callable[[SethRecord], tuple[int, int]]
+
+async def change_vitals(seth: SethRecord, change: VitalsChange,
+                        charge: Mutation[bool] | None = None) -> SethRecord | None:
+    """Write change(seth)'s (health, hunger) if nothing else wrote the Seth since it was read.
+
+    On a conflict the Seth is re-read and change applied to the fresh
+    values, up to SETH_CAS_RETRIES attempts before StaleSeth is raised.
+    charge runs first in the same transaction; returning False cancels the
+    write. Returns the updated record, or None if charge refused. Raises
+    SethGone if the Seth died in the meantime.
+    """
+    for _ in range(SETH_CAS_RETRIES):
+        health, hunger = change(seth)
+
+        async def apply(db: aiosqlite.Connection, seth: SethRecord = seth, health: int = health,
+                        hunger: int = hunger) -> tuple[int, int, int] | None:
+            if charge is not None and not await charge(db):
+                return None
+            cursor = await db.execute(SETH_CAS, (health, hunger, seth.seth_id, seth.version))
+            vitals = await cursor.fetchone()
+            if vitals is None:
+                # Raising rolls the charge back with the rest of this mutation
+                raise StaleSeth(seth.seth_id)
+            return vitals
+
+        try:
+            vitals = await write(apply)
+        except StaleSeth:
+            seth_cache.discard(seth.user_id)
+            seth_id = seth.seth_id
+            seth = await living_seth(seth.user_id)
+            if seth is None or seth.seth_id != seth_id:
+                raise SethGone(seth_id) from None
+            continue
+        if vitals is None:
+            return None
+        seth_cache.update_vitals(seth.user_id, *vitals)
+        return seth.with_vitals(*vitals)
+    raise StaleSeth(seth.seth_id)
+
+# Snapshots read during one command invocation, dropped with its context
+_snapshots: weakref.WeakKeyDictionary[Any, dict[int, UserSnapshot]] = weakref.WeakKeyDictionary()
+
+async def user_snapshots(ctx: Any, *user_ids: int) -> list[UserSnapshot]:
+    """Snapshots of users for one command, fetched together in one query.
+
+    Results are memoized on ctx, so every handler of the invocation sees
+    the users as the command first read them, without another round trip.
+    """
+    memo = _snapshots.setdefault(ctx, {})
+    wanted = [user_id for user_id in dict.fromkeys(user_ids) if user_id not in memo]
+    if wanted:
+        async with connect(DATABASE_PATH) as db:
+            cursor = await db.execute(snapshot_query(len(wanted)), wanted)
+            rows = await cursor.fetchall()
+        for row in rows:
+            snapshot = snapshot_from_row(row)
+            memo[snapshot.user_id] = snapshot
+    return [memo[user_id] for user_id in user_ids]
+
+async def user_snapshot(ctx: Any, user_id: int | None = None) -> UserSnapshot:
+    """Snapshot of one user, the command's author by default"""
+    (snapshot,) = await user_snapshots(ctx, ctx.author.id if user_id is None else user_id)
+    return snapshot
+
 async def test_connection() -> bool:
     """Test database connection"""
     try:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
+        async with connect(DATABASE_PATH) as db:
             cursor = await db.execute("SELECT name FROM sqlite_master WHERE type='table';")
             tables = await cursor.fetchall()
             print(f"📊 Found {len(tables)} tables: {[t[0] for t in tables]}")
@@ -89,80 +847,3 @@ if __name__ == "__main__":
     import asyncio
     asyncio.run(init_db())
     asyncio.run(test_connection())
-
-async def create_drama_tables() -> None:
-    """Create NPC relationship tables"""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        # NPC relationship matrix
-        await db.execute('''
-            CREATE TABLE IF NOT EXISTS npc_relationships (
-                npc1 TEXT NOT NULL,
-                npc2 TEXT NOT NULL,
-                relationship_type TEXT DEFAULT 'neutral',
-                relationship_score INTEGER DEFAULT 50,
-                last_event TEXT,
-                last_change TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (npc1, npc2)
-            )
-        ''')
-        
-        # Current NPC states (dating, fighting, etc)
-        await db.execute('''
-            CREATE TABLE IF NOT EXISTS npc_states (
-                npc_name TEXT PRIMARY KEY,
-                current_mood TEXT DEFAULT 'normal',
-                dating TEXT,
-                rival TEXT,
-                health INTEGER DEFAULT 100,
-                location TEXT DEFAULT 'village_square'
-            )
-        ''')
-        
-        # Drama history
-        await db.execute('''
-            CREATE TABLE IF NOT EXISTS drama_history (
-                event_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                event_type TEXT NOT NULL,
-                description TEXT NOT NULL,
-                npc1 TEXT,
-                npc2 TEXT,
-                player_votes_option1 INTEGER DEFAULT 0,
-                player_votes_option2 INTEGER DEFAULT 0,
-                player_votes_option3 INTEGER DEFAULT 0,
-                outcome TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Player drama participation
-        await db.execute('''
-            CREATE TABLE IF NOT EXISTS player_drama (
-                user_id INTEGER NOT NULL,
-                event_id INTEGER NOT NULL,
-                vote_choice INTEGER,
-                seth_involved BOOLEAN DEFAULT FALSE,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (user_id, event_id)
-            )
-        ''')
-        
-        await db.commit()
-        
-        # Initialize NPCs if not exists
-        npcs = ['Luna', 'Marcus', 'Felix', 'Aria', 'Thorne']
-        for npc in npcs:
-            await db.execute('''
-                INSERT OR IGNORE INTO npc_states (npc_name) VALUES (?)
-            ''', (npc,))
-        
-        # Initialize relationships
-        for i, npc1 in enumerate(npcs):
-            for npc2 in npcs[i+1:]:
-                await db.execute('''
-                    INSERT OR IGNORE INTO npc_relationships (npc1, npc2)
-                    VALUES (?, ?)
-                ''', (npc1, npc2))
-        
-        await db.commit()
-        print("✅ Drama tables initialized with NPCs!")
-
@@ -73,7 +73,7 @@ for r in resources:
     print(f"  User {r[0]}: Food={r[1]}, Medicine={r[2]}, Coal={r[3]}")
 
 # Timeline check - when was first Seth created?
-cursor.execute("SELECT MIN(birth_time) FROM seths")
+cursor.execute("SELECT MIN(birth_time) FROM seths_compat")
 first_birth = cursor.fetchone()[0]
 if first_birth:
     print(f"\n⏰ First Seth created: {first_birth}")
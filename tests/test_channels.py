@@ -0,0 +1,42 @@
+"""Tests for utils/channels.py"""
+from utils.channels import ChannelRegistry
+
+
+def registry(*channels, overrides=None):
+    found = ChannelRegistry(overrides)
+    for channel_id, name in channels:
+        found.add(channel_id, name)
+    return found
+
+
+class TestChannelRegistry:
+    def test_falls_back_through_names(self):
+        channels = registry((1, 'general'), (2, 'seth-graveyard'))
+        assert channels.resolve('home') == 1
+        assert channels.resolve('graveyard') == 2
+        assert channels.resolve('drama') == 2
+        channels.add(3, 'seth-home')
+        assert channels.resolve('home') == 3
+
+    def test_nothing_matches(self):
+        assert registry((1, 'random')).resolve('home') is None
+
+    def test_rename_and_delete(self):
+        channels = registry((1, 'seth-home'), (2, 'general'))
+        channels.add(1, 'off-topic')
+        assert channels.resolve('home') == 2
+        channels.remove(2)
+        assert channels.resolve('home') is None
+        assert len(channels) == 1
+
+    def test_first_of_duplicate_names_wins(self):
+        channels = registry((5, 'general'), (4, 'general'))
+        assert channels.resolve('home') == 5
+        channels.remove(5)
+        assert channels.resolve('home') == 4
+
+    def test_override_only_while_channel_exists(self):
+        channels = registry((1, 'seth-home'), (9, 'announcements'), overrides={'home': 9})
+        assert channels.resolve('home') == 9
+        channels.remove(9)
+        assert channels.resolve('home') == 1
@@ -1,7 +1,13 @@
 """Tests for database schema — uses stdlib sqlite3 with in-memory DB"""
+import asyncio
 import sqlite3
+import aiosqlite
 import pytest
 
+import database
+from database import MINE_UPSERT, SETH_CAS, TRADE_DEBIT, WriteQueue, change_vitals, compact_ledger, ledger_balance, record_ledger
+from utils.seth_cache import SethRecord
+
 
 @pytest.fixture
 def db():
@@ -26,8 +32,8 @@ def db():
             health INTEGER DEFAULT 100,
             hunger INTEGER DEFAULT 0,
             is_alive INTEGER DEFAULT 1,
-            birth_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            death_time TIMESTAMP,
+            birth_ts INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+            death_ts INTEGER,
             death_reason TEXT,
             parent_id INTEGER
         )
@@ -49,7 +55,7 @@ def db():
             generation INTEGER,
             lived_days INTEGER,
             death_reason TEXT,
-            death_time TIMESTAMP,
+            death_ts INTEGER,
             memorial_message TEXT
         )
     ''')
@@ -184,6 +190,53 @@ class TestResources:
         assert row[0] == 4
 
 
+class TestMiningUpsert:
+    def test_credits_existing_row_and_returns_totals(self, db):
+        db.execute("INSERT INTO seths (user_id, name) VALUES (1, 'Miner')")
+        db.execute("INSERT INTO resources (user_id) VALUES (1)")
+        row = db.execute(MINE_UPSERT, (1, 2, 1, 3, 1000, 1)).fetchone()
+        assert row == (7, 3, 3, "Miner")
+
+    def test_creates_row_for_first_mine(self, db):
+        db.execute("INSERT INTO seths (user_id, name) VALUES (1, 'Miner')")
+        row = db.execute(MINE_UPSERT, (1, 2, 0, 4, 1000, 1)).fetchone()
+        assert row == (2, 0, 4, "Miner")
+
+    def test_no_living_seth_writes_nothing(self, db):
+        db.execute("INSERT INTO seths (user_id, name, is_alive) VALUES (1, 'Gone', 0)")
+        db.execute("INSERT INTO resources (user_id) VALUES (1)")
+        assert db.execute(MINE_UPSERT, (1, 2, 1, 3, 1000, 1)).fetchone() is None
+        assert db.execute("SELECT food, last_mine_time FROM resources").fetchone() == (5, None)
+
+
+class TestTradeDebit:
+    def test_debits_whole_bundle(self, db):
+        db.execute("INSERT INTO resources (user_id, coal) VALUES (1, 3)")
+        cursor = db.execute(TRADE_DEBIT, (2, 1, 3, 1, 2, 1, 3))
+        assert cursor.rowcount == 1
+        assert db.execute("SELECT food, medicine, coal FROM resources").fetchone() == (3, 1, 0)
+
+    def test_short_on_any_resource_debits_nothing(self, db):
+        db.execute("INSERT INTO resources (user_id) VALUES (1)")
+        cursor = db.execute(TRADE_DEBIT, (2, 0, 1, 1, 2, 0, 1))
+        assert cursor.rowcount == 0
+        assert db.execute("SELECT food, medicine, coal FROM resources").fetchone() == (5, 2, 0)
+
+
+class TestSethCompareAndSet:
+    def test_stale_version_writes_nothing(self, db):
+        db.execute("ALTER TABLE seths ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        db.execute("INSERT INTO seths (user_id, name, health, hunger) VALUES (1, 'Seth', 80, 40)")
+        assert db.execute(SETH_CAS, (80, 10, 1, 0)).fetchone() == (80, 10, 1)
+        assert db.execute(SETH_CAS, (50, 90, 1, 0)).fetchone() is None
+        assert db.execute("SELECT health, hunger, version FROM seths").fetchone() == (80, 10, 1)
+
+    def test_dead_seth_is_not_written(self, db):
+        db.execute("ALTER TABLE seths ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        db.execute("INSERT INTO seths (user_id, name, is_alive) VALUES (1, 'Seth', 0)")
+        assert db.execute(SETH_CAS, (50, 50, 1, 0)).fetchone() is None
+
+
 class TestGraveyard:
     def test_add_to_graveyard(self, db):
         db.execute(
@@ -197,3 +250,260 @@ class TestGraveyard:
         assert grave[2] == "Fallen Seth"
         assert grave[3] == 3
         assert grave[5] == "Starvation"
+
+
+class TestEpochTimestamps:
+    def test_birth_defaults_to_now(self, db):
+        db.execute("INSERT INTO seths (user_id, name) VALUES (1, 'Fresh')")
+        age = db.execute(
+            "SELECT CAST(strftime('%s', 'now') AS INTEGER) - birth_ts FROM seths"
+        ).fetchone()[0]
+        assert 0 <= age <= 2
+
+    def test_lifespan_computed_in_sql(self, db):
+        db.execute(
+            "INSERT INTO seths (user_id, name, is_alive, birth_ts, death_ts) VALUES (1, 'Short', 0, 1000, 1600)"
+        )
+        db.execute(
+            "INSERT INTO seths (user_id, name, is_alive, birth_ts, death_ts) VALUES (1, 'Long', 0, 1000, 90000)"
+        )
+        rows = db.execute(
+            "SELECT name FROM seths WHERE is_alive = 0 ORDER BY death_ts - birth_ts DESC"
+        ).fetchall()
+        assert [r[0] for r in rows] == ["Long", "Short"]
+
+    async def test_migration_matches_fresh_schema(self):
+        async with aiosqlite.connect(":memory:") as conn:
+            await conn.execute('''
+                CREATE TABLE seths (
+                    seth_id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL, name TEXT NOT NULL,
+                    is_alive INTEGER DEFAULT 1, birth_time TIMESTAMP, death_time TIMESTAMP, birth_ts INTEGER
+                )
+            ''')
+            await conn.execute('''
+                CREATE TABLE graveyard (
+                    seth_id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, name TEXT NOT NULL, death_time TIMESTAMP
+                )
+            ''')
+            await conn.execute(
+                """INSERT INTO seths (user_id, name, is_alive, birth_time, death_time)
+                VALUES (1, 'Old', 0, '1970-01-01 00:16:40', '1970-01-01 00:26:40')"""
+            )
+            await conn.execute("INSERT INTO seths (user_id, name) VALUES (1, 'Undated')")
+            await conn.execute("INSERT INTO graveyard (seth_id, user_id, name, death_time) VALUES (1, 1, 'Old', '1970-01-01 00:26:40')")
+            await database._migrate_timestamps(conn)
+
+            cursor = await conn.execute("SELECT name, birth_ts, death_ts FROM seths ORDER BY seth_id")
+            (old, undated) = await cursor.fetchall()
+            assert old == ('Old', 1000, 1600)
+            assert undated[1] is not None and undated[2] is None
+            cursor = await conn.execute("SELECT death_ts FROM graveyard")
+            assert await cursor.fetchall() == [(1600,)]
+
+            with pytest.raises(sqlite3.IntegrityError):
+                await conn.execute("INSERT INTO seths (user_id, name, birth_ts) VALUES (1, 'Null', NULL)")
+            cursor = await conn.execute("PRAGMA table_info(seths)")
+            assert {row[1] for row in await cursor.fetchall()} == {
+                'seth_id', 'user_id', 'name', 'generation', 'health', 'hunger', 'is_alive', 'birth_ts',
+                'death_ts', 'death_reason', 'parent_id', 'guild_id', 'version',
+            }
+
+
+@pytest.fixture
+async def ledger_db():
+    """In-memory aiosqlite database with the resource ledger tables"""
+    async with aiosqlite.connect(":memory:") as conn:
+        await conn.execute('''
+            CREATE TABLE resource_ledger (
+                entry_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                food INTEGER NOT NULL DEFAULT 0,
+                medicine INTEGER NOT NULL DEFAULT 0,
+                coal INTEGER NOT NULL DEFAULT 0,
+                reason TEXT NOT NULL,
+                created_ts INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+            )
+        ''')
+        await conn.execute('''
+            CREATE TABLE resource_snapshots (
+                user_id INTEGER PRIMARY KEY,
+                food INTEGER NOT NULL DEFAULT 0,
+                medicine INTEGER NOT NULL DEFAULT 0,
+                coal INTEGER NOT NULL DEFAULT 0,
+                updated_ts INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+            )
+        ''')
+        yield conn
+
+
+class TestResourceLedger:
+    async def test_balance_is_snapshot_plus_tail(self, ledger_db):
+        await ledger_db.execute("INSERT INTO resource_snapshots (user_id, food, medicine, coal) VALUES (1, 5, 2, 0)")
+        await record_ledger(ledger_db, [(1, 2, 0, 3, 'mine'), (1, -1, 0, 0, 'feed'), (2, 1, 1, 1, 'mine')])
+        assert await ledger_balance(ledger_db, 1) == (6, 2, 3)
+        assert await ledger_balance(ledger_db, 2) == (1, 1, 1)
+        assert await ledger_balance(ledger_db, 3) is None
+
+    async def test_zero_deltas_are_not_recorded(self, ledger_db):
+        await record_ledger(ledger_db, [(1, 0, 0, 0, 'market_fill')])
+        cursor = await ledger_db.execute("SELECT COUNT(*) FROM resource_ledger")
+        assert (await cursor.fetchone())[0] == 0
+
+    async def test_compaction_folds_old_entries_only(self, ledger_db):
+        await ledger_db.execute("INSERT INTO resource_snapshots (user_id, food) VALUES (1, 5)")
+        await record_ledger(ledger_db, [(1, 2, 0, 0, 'mine'), (2, 0, 0, 4, 'mine')])
+        await ledger_db.execute("UPDATE resource_ledger SET created_ts = 100")
+        await record_ledger(ledger_db, [(1, 0, 0, 1, 'mine')])
+
+        assert await compact_ledger(ledger_db, 200) == 2
+        cursor = await ledger_db.execute("SELECT user_id, food, coal FROM resource_snapshots ORDER BY user_id")
+        assert await cursor.fetchall() == [(1, 7, 0), (2, 0, 4)]
+        cursor = await ledger_db.execute("SELECT COUNT(*) FROM resource_ledger")
+        assert (await cursor.fetchone())[0] == 1
+        assert await ledger_balance(ledger_db, 1) == (7, 0, 1)
+        assert await compact_ledger(ledger_db, 200) == 0
+
+
+class TestWriteQueue:
+    @pytest.fixture
+    async def queue(self, tmp_path):
+        path = str(tmp_path / "queue.db")
+        async with aiosqlite.connect(path) as conn:
+            await conn.execute("CREATE TABLE t (k INTEGER PRIMARY KEY)")
+            await conn.commit()
+        queue = WriteQueue(path, max_batch=8, max_delay=0.01)
+        yield queue, path
+        await queue.close()
+
+    async def test_concurrent_writes_share_commits(self, queue):
+        queue, path = queue
+
+        def insert(k):
+            async def mutation(db):
+                await db.execute("INSERT INTO t VALUES (?)", (k,))
+                return k
+            return mutation
+
+        results = await asyncio.gather(*(queue.submit(insert(k)) for k in range(20)))
+        assert results == list(range(20))
+        assert queue.mutations == 20
+        assert queue.commits < 20
+        async with aiosqlite.connect(path) as conn:
+            assert (await (await conn.execute("SELECT COUNT(*) FROM t")).fetchone())[0] == 20
+
+    async def test_failed_mutation_rolls_back_alone(self, queue):
+        queue, path = queue
+
+        async def good(db):
+            await db.execute("INSERT INTO t VALUES (1)")
+
+        async def bad(db):
+            await db.execute("INSERT INTO t VALUES (2)")
+            raise ValueError("nope")
+
+        results = await asyncio.gather(queue.submit(good), queue.submit(bad), return_exceptions=True)
+        assert results[0] is None
+        assert isinstance(results[1], ValueError)
+        async with aiosqlite.connect(path) as conn:
+            assert await (await conn.execute("SELECT k FROM t")).fetchall() == [(1,)]
+
+    async def test_cancelled_writer_fails_its_writes(self, queue):
+        queue, path = queue
+        started = asyncio.Event()
+
+        async def good(db):
+            await db.execute("INSERT INTO t VALUES (1)")
+
+        async def stuck(db):
+            started.set()
+            await asyncio.sleep(60)
+
+        writes = [asyncio.ensure_future(queue.submit(m)) for m in (good, stuck, good)]
+        await started.wait()
+        queue._task.cancel()
+        results = await asyncio.gather(*writes, return_exceptions=True)
+        assert all(isinstance(result, database.WriterStopped) for result in results)
+        async with aiosqlite.connect(path) as conn:
+            assert await (await conn.execute("SELECT k FROM t")).fetchall() == []
+
+        # The next write starts a fresh writer
+        await queue.submit(good)
+
+
+class TestChangeVitals:
+    @pytest.fixture
+    async def seth(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "seths.db")
+        async with aiosqlite.connect(path) as conn:
+            await conn.execute(
+                "CREATE TABLE seths (seth_id INTEGER PRIMARY KEY, user_id INTEGER, name TEXT, generation INTEGER, "
+                "health INTEGER, hunger INTEGER, birth_ts INTEGER, guild_id INTEGER, is_alive INTEGER DEFAULT 1, "
+                "version INTEGER NOT NULL DEFAULT 0)"
+            )
+            await conn.execute("INSERT INTO seths VALUES (1, 7, 'Seth', 1, 50, 50, 0, NULL, 1, 0)")
+            await conn.commit()
+        queue = WriteQueue(path, max_batch=8, max_delay=0.01)
+        monkeypatch.setattr(database, "DATABASE_PATH", path)
+        monkeypatch.setattr(database, "writer", queue)
+        monkeypatch.setattr(database, "seth_cache", database.SethCache(8))
+        yield SethRecord(1, 7, 'Seth', 1, 50, 50, 0, None, 0), path
+        await queue.close()
+
+    async def test_concurrent_changes_all_apply(self, seth):
+        seth, path = seth
+        results = await asyncio.gather(*(
+            change_vitals(seth, lambda s: (s.health + 5, s.hunger - 5)) for _ in range(3)
+        ))
+        assert sorted(r.version for r in results) == [1, 2, 3]
+        async with aiosqlite.connect(path) as conn:
+            cursor = await conn.execute("SELECT health, hunger, version FROM seths")
+            assert await cursor.fetchone() == (65, 35, 3)
+
+    async def test_refused_charge_writes_nothing(self, seth):
+        seth, path = seth
+
+        async def refuse(db):
+            return False
+
+        assert await change_vitals(seth, lambda s: (0, 0), refuse) is None
+        async with aiosqlite.connect(path) as conn:
+            cursor = await conn.execute("SELECT health, version FROM seths")
+            assert await cursor.fetchone() == (50, 0)
+
+    async def test_dead_seth_raises(self, seth):
+        seth, path = seth
+        async with aiosqlite.connect(path) as conn:
+            await conn.execute("UPDATE seths SET is_alive = 0, version = 1")
+            await conn.commit()
+
+        with pytest.raises(database.SethGone):
+            await change_vitals(seth, lambda s: (s.health + 5, s.hunger))
+
+
+class TestTimedConnection:
+    async def test_statements_are_timed_by_verb(self, tmp_path):
+        selects = database.DB_SECONDS.labels('SELECT')
+        before = selects.count
+        async with database.connect(str(tmp_path / "timed.db")) as conn:
+            await conn.execute("CREATE TABLE t (k INTEGER)")
+            await conn.executemany("INSERT INTO t VALUES (?)", [(1,), (2,)])
+            cursor = await conn.execute("\n  select k FROM t")
+            assert await cursor.fetchall() == [(1,), (2,)]
+        assert selects.count == before + 1
+
+    async def test_statements_are_traced(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(database, 'SLOW_QUERY_SECONDS', 0.0)
+        monkeypatch.setattr(database, 'sql_stats', database.SqlStats())
+        async with database.connect(str(tmp_path / "traced.db")) as conn:
+            await conn.execute("CREATE TABLE t (k INTEGER)")
+            await conn.executemany("INSERT INTO t VALUES (?)", [(1,), (2,), (3,)])
+            await conn.commit()
+            for limit in (2, 3):
+                cursor = await conn.execute(f"SELECT k FROM t WHERE k > 0 LIMIT {limit}")
+                assert len([row async for row in cursor]) == limit
+        await asyncio.gather(*database._explaining)
+
+        select = database.sql_stats.statements["SELECT k FROM t WHERE k > ? LIMIT ?"]
+        assert (select.calls, select.rows, select.slow) == (2, 5, 2)
+        assert select.plan == "SCAN t"
+        assert database.sql_stats.statements["INSERT INTO t VALUES (?)"].calls == 1
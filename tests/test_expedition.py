@@ -0,0 +1,49 @@
+"""Tests for utils/expedition.py"""
+import random
+
+from config import COAL_MINE_MAX, COAL_MINE_MIN
+from utils.expedition import (
+    EXACT_SUM_LIMIT,
+    expedition_yield,
+    mining_windows,
+    sum_uniform,
+)
+
+
+class TestMiningWindows:
+    def test_whole_windows_only(self):
+        assert mining_windows(179, 60, 3600) == 2
+        assert mining_windows(180, 60, 3600) == 3
+
+    def test_capped_and_never_negative(self):
+        assert mining_windows(10_000, 60, 3600) == 60
+        assert mining_windows(-5, 60, 3600) == 0
+
+
+class TestSumUniform:
+    def test_zero_draws(self):
+        assert sum_uniform(0, 1, 5) == 0
+
+    def test_exact_path_matches_individual_draws(self):
+        n = EXACT_SUM_LIMIT
+        rng = random.Random(7)
+        expected = sum(rng.randint(1, 5) for _ in range(n))
+        assert sum_uniform(n, 1, 5, random.Random(7)) == expected
+
+    def test_approximation_stays_in_range_and_near_mean(self):
+        rng = random.Random(1)
+        n = 10_000
+        draws = [sum_uniform(n, 0, 2, rng) for _ in range(200)]
+        assert all(0 <= d <= 2 * n for d in draws)
+        mean = sum(draws) / len(draws)
+        assert abs(mean - n) < 20
+
+    def test_degenerate_range(self):
+        assert sum_uniform(1000, 3, 3, random.Random(0)) == 3000
+
+
+class TestExpeditionYield:
+    def test_coal_bounds(self):
+        food, medicine, coal = expedition_yield(500, random.Random(3))
+        assert 500 * COAL_MINE_MIN <= coal <= 500 * COAL_MINE_MAX
+        assert food >= 0 and medicine >= 0
@@ -58,3 +58,14 @@ class TestResourceBar:
     def test_zero_max(self):
         result = SethVisuals.resource_bar(0, 0)
         assert "0%" in result
+
+
+class TestDuration:
+    def test_minutes(self):
+        assert SethVisuals.duration(125) == "2 minutes"
+
+    def test_hours(self):
+        assert SethVisuals.duration(5400) == "1.5 hours"
+
+    def test_days(self):
+        assert SethVisuals.duration(86400 * 3) == "3.0 days"
@@ -0,0 +1,81 @@
+"""Tests for utils/lease.py — lease claims against in-memory SQLite"""
+import sqlite3
+
+import pytest
+
+from utils.lease import (
+    CLAIM_LEASE,
+    CLAIM_TICK,
+    RELEASE_LEASE,
+    claim_params,
+    holds,
+    tick_params,
+)
+
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE leases (name TEXT PRIMARY KEY, holder TEXT NOT NULL, expires REAL NOT NULL)")
+    conn.execute("CREATE TABLE loop_ticks (name TEXT PRIMARY KEY, last_tick REAL NOT NULL)")
+    yield conn
+    conn.close()
+
+
+def claim(db, holder, now, ttl=30.0):
+    row = db.execute(CLAIM_LEASE, claim_params('decay', holder, now, ttl)).fetchone()
+    return row[0] if row else None
+
+
+class TestClaimLease:
+    def test_free_lease_is_taken(self, db):
+        assert claim(db, 'a', 100.0) == 130.0
+
+    def test_held_lease_refuses_others(self, db):
+        claim(db, 'a', 100.0)
+        assert claim(db, 'b', 110.0) is None
+        assert db.execute("SELECT holder, expires FROM leases").fetchone() == ('a', 130.0)
+
+    def test_holder_renews(self, db):
+        claim(db, 'a', 100.0)
+        assert claim(db, 'a', 120.0) == 150.0
+
+    def test_expired_lease_fails_over(self, db):
+        claim(db, 'a', 100.0)
+        assert claim(db, 'b', 130.0) == 160.0
+        assert claim(db, 'a', 131.0) is None
+
+    def test_release_frees_only_own_lease(self, db):
+        claim(db, 'a', 100.0)
+        db.execute(RELEASE_LEASE, ('decay', 'b'))
+        assert claim(db, 'b', 101.0) is None
+        db.execute(RELEASE_LEASE, ('decay', 'a'))
+        assert claim(db, 'b', 101.0) == 131.0
+
+
+def tick(db, now):
+    return db.execute(CLAIM_TICK, tick_params('decay', now, 120.0, 10.0)).fetchone() is not None
+
+
+class TestClaimTick:
+    def test_first_tick_runs(self, db):
+        assert tick(db, 100.0)
+
+    def test_tick_soon_after_another_is_skipped(self, db):
+        assert tick(db, 100.0)
+        assert not tick(db, 105.0)
+        assert db.execute("SELECT last_tick FROM loop_ticks").fetchone() == (100.0,)
+
+    def test_next_interval_runs_within_slack(self, db):
+        assert tick(db, 100.0)
+        assert tick(db, 211.0)
+        assert not tick(db, 320.0)
+
+
+class TestHolds:
+    def test_stops_a_margin_before_expiry(self):
+        assert holds(130.0, 119.0, 10.0)
+        assert not holds(130.0, 120.0, 10.0)
+
+    def test_never_claimed(self):
+        assert not holds(None, 0.0, 10.0)
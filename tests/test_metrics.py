@@ -0,0 +1,66 @@
+"""Tests for utils/metrics.py"""
+import asyncio
+
+import pytest
+
+from utils.metrics import Histogram, Registry, timed
+
+
+class TestHistogram:
+    def test_buckets_are_cumulative(self):
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+        assert histogram.cumulative() == [('0.1', 2), ('1', 3), ('+Inf', 4)]
+        assert histogram.count == 4
+        assert histogram.sum == pytest.approx(3.65)
+
+    def test_time_observes_on_error(self):
+        histogram = Histogram((1.0,))
+        with pytest.raises(RuntimeError), histogram.time():
+            raise RuntimeError
+        assert histogram.count == 1
+
+    def test_timed_coroutine(self):
+        histogram = Histogram((1.0,))
+
+        @timed(histogram)
+        async def work(value):
+            return value * 2
+
+        assert asyncio.run(work(21)) == 42
+        assert histogram.count == 1
+
+
+class TestRegistry:
+    def test_render_prometheus_text(self):
+        registry = Registry()
+        registry.counter('errors_total', 'Errors', ('command',)).labels('feed').inc()
+        registry.histogram('seconds', 'Latency', ('command',), buckets=(0.5,)).labels('feed').observe(0.25)
+        assert registry.render().splitlines() == [
+            '# HELP errors_total Errors',
+            '# TYPE errors_total counter',
+            'errors_total{command="feed"} 1',
+            '# HELP seconds Latency',
+            '# TYPE seconds histogram',
+            'seconds_bucket{command="feed",le="0.5"} 1',
+            'seconds_bucket{command="feed",le="+Inf"} 1',
+            'seconds_sum{command="feed"} 0.25',
+            'seconds_count{command="feed"} 1',
+        ]
+
+    def test_collectors_run_before_render(self):
+        registry = Registry()
+        depth = registry.gauge('depth', 'Queue depth')
+        registry.collectors.append(lambda: depth.labels().set(7))
+        assert 'depth 7' in registry.render()
+
+    def test_label_values_are_escaped(self):
+        registry = Registry()
+        registry.counter('c', 'C', ('name',)).labels('say "hi"\n').inc()
+        assert 'c{name="say \\"hi\\"\\n"} 1' in registry.render()
+
+    def test_wrong_label_count(self):
+        registry = Registry()
+        with pytest.raises(ValueError):
+            registry.counter('c', 'C', ('a',)).labels()
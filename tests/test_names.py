@@ -0,0 +1,61 @@
+"""Tests for utils/names.py"""
+from utils.names import NameIndex
+
+
+def make_index():
+    index = NameIndex()
+    index.add(1, ["Alice", "alice_w", None])
+    index.add(2, ["alfred", "Al", "Big Al"])
+    index.add(3, ["bob", "Bob", None])
+    return index
+
+
+class TestNameIndex:
+    def test_exact_is_case_insensitive(self):
+        index = make_index()
+        assert index.exact("ALICE") == {1}
+        assert index.exact("big al") == {2}
+        assert index.exact("carol") == set()
+
+    def test_shared_name_maps_to_every_member(self):
+        index = make_index()
+        index.add(4, ["bob"])
+        assert index.exact("bob") == {3, 4}
+
+    def test_prefix_matches_distinct_members(self):
+        index = make_index()
+        assert index.prefix("al") == [2, 1]
+        assert index.prefix("ali") == [1]
+        assert index.prefix("z") == []
+
+    def test_prefix_limit(self):
+        index = make_index()
+        assert len(index.prefix("", limit=2)) == 2
+
+    def test_readd_replaces_old_names(self):
+        index = make_index()
+        index.add(1, ["Alicia"])
+        assert index.exact("alice") == set()
+        assert index.exact("alicia") == {1}
+        assert index.prefix("alice") == []
+
+    def test_build_matches_adding_one_by_one(self):
+        members = [(1, ["Alice", "alice_w", None]), (2, ["alfred", "Al", "Big Al"]),
+                   (3, ["bob", "Bob", None]), (4, ["bob"])]
+        built = NameIndex.build(members)
+        added = NameIndex()
+        for member_id, names in members:
+            added.add(member_id, names)
+        assert built._sorted == added._sorted
+        assert built._ids == added._ids
+        assert built.prefix("al") == [2, 1]
+        built.add(5, ["albert"])
+        assert built.prefix("alb") == [5]
+
+    def test_remove(self):
+        index = make_index()
+        index.remove(3)
+        assert 3 not in index
+        assert index.exact("bob") == set()
+        assert index.prefix("b") == [2]
+        assert len(index) == 2
@@ -0,0 +1,85 @@
+"""Tests for utils/orderbook.py"""
+from utils.orderbook import BUY, SELL, Order, OrderBook, escrow, settlement
+
+
+def book_with(*orders):
+    book = OrderBook()
+    for order in orders:
+        book.load(Order(*order))
+    return book
+
+
+class TestMatching:
+    def test_no_cross_rests(self):
+        book = book_with((1, 10, SELL, 5, 3))
+        fills = book.add(Order(2, 20, BUY, 4, 3))
+        assert fills == []
+        assert book.best(BUY).order_id == 2
+        assert book.best(SELL).order_id == 1
+
+    def test_fills_at_maker_price(self):
+        book = book_with((1, 10, SELL, 3, 5))
+        fills = book.add(Order(2, 20, BUY, 4, 2))
+        assert [(f.maker.order_id, f.price, f.quantity) for f in fills] == [(1, 3, 2)]
+        assert book.orders[1].quantity == 3
+        assert 2 not in book.orders
+
+    def test_price_then_time_priority(self):
+        book = book_with((1, 10, SELL, 3, 1), (2, 11, SELL, 2, 1), (3, 12, SELL, 2, 1))
+        fills = book.add(Order(4, 20, BUY, 3, 3))
+        assert [f.maker.order_id for f in fills] == [2, 3, 1]
+        assert len(book) == 0
+
+    def test_partial_fill_rests_remainder(self):
+        book = book_with((1, 10, BUY, 2, 2))
+        fills = book.add(Order(2, 20, SELL, 1, 5))
+        assert sum(f.quantity for f in fills) == 2
+        assert book.orders[2].quantity == 3
+        assert book.best(SELL).order_id == 2
+        assert book.best(BUY) is None
+
+    def test_cancelled_orders_never_match(self):
+        book = book_with((1, 10, SELL, 1, 1), (2, 11, SELL, 2, 1))
+        assert book.cancel(1).user_id == 10
+        assert book.cancel(1) is None
+        fills = book.add(Order(3, 20, BUY, 5, 1))
+        assert fills[0].maker.order_id == 2
+
+    def test_own_orders_are_stepped_over(self):
+        book = book_with((1, 20, SELL, 2, 1), (2, 10, SELL, 3, 2), (3, 20, SELL, 3, 1))
+        fills = book.add(Order(4, 20, BUY, 3, 3))
+        assert [(f.maker.order_id, f.quantity) for f in fills] == [(2, 2)]
+        assert book.orders[1].quantity == 1 and book.orders[3].quantity == 1
+        assert book.best(SELL).order_id == 1
+        assert book.orders[4].quantity == 1
+
+    def test_levels_aggregate_by_price(self):
+        book = book_with((1, 1, BUY, 3, 2), (2, 2, BUY, 3, 1), (3, 3, BUY, 5, 4), (4, 4, BUY, 1, 1))
+        assert book.levels(BUY, 2) == [(5, 4), (3, 3)]
+        assert book.levels(SELL, 2) == []
+
+
+class TestSettlement:
+    def test_escrow(self):
+        assert escrow(SELL, 4, 3) == (3, 0)
+        assert escrow(BUY, 4, 3) == (0, 12)
+
+    def test_taking_buy_is_refunded_price_improvement(self):
+        book = book_with((1, 10, SELL, 3, 5))
+        credits = settlement(book.add(Order(2, 20, BUY, 4, 2)))
+        assert credits == {20: [2, 2], 10: [0, 6]}
+
+    def test_taking_sell_gets_bid_price(self):
+        book = book_with((1, 10, BUY, 4, 5))
+        credits = settlement(book.add(Order(2, 20, SELL, 3, 2)))
+        assert credits == {10: [2, 0], 20: [0, 8]}
+
+    def test_credits_balance_escrow(self):
+        book = book_with((1, 10, SELL, 2, 3), (2, 11, SELL, 3, 3))
+        taker = Order(3, 20, BUY, 5, 5)
+        credits = settlement(book.add(taker))
+        base = sum(c[0] for c in credits.values())
+        quote = sum(c[1] for c in credits.values())
+        # Every unit of the taker's 25 quote escrow goes to a seller or back as refund
+        assert base == 5
+        assert quote == escrow(BUY, 5, 5)[1]
@@ -0,0 +1,67 @@
+"""Tests for utils/outbox.py"""
+from utils.outbox import FLAVOR, NORMAL, URGENT, OutboundQueue, Outgoing, TokenBucket
+
+
+def queue(*items):
+    outbound = OutboundQueue()
+    for item in items:
+        outbound.push(item)
+    return outbound
+
+
+class TestOutboundQueue:
+    def test_urgent_lane_first_then_fifo(self):
+        outbound = queue(
+            Outgoing(FLAVOR, "drama", coalesce=False),
+            Outgoing(NORMAL, "death 1"),
+            Outgoing(URGENT, "dying"),
+            Outgoing(NORMAL, "death 2"),
+        )
+        order = [outbound.take_batch()[0].content for _ in range(4)]
+        assert order == ["dying", "death 1", "death 2", "drama"]
+        assert len(outbound) == 0
+
+    def test_embeds_coalesce_up_to_limit(self):
+        outbound = queue(*(Outgoing(NORMAL, embed=n) for n in range(12)))
+        assert [item.embed for item in outbound.take_batch(limit=10)] == list(range(10))
+        assert [item.embed for item in outbound.take_batch(limit=10)] == [10, 11]
+
+    def test_only_matching_messages_coalesce(self):
+        outbound = queue(
+            Outgoing(NORMAL, embed="a", reactions=("🇫",)),
+            Outgoing(NORMAL, embed="b", reactions=("🇫",)),
+            Outgoing(NORMAL, embed="c"),
+            Outgoing(NORMAL, embed="d", reactions=("🇫",)),
+            Outgoing(FLAVOR, embed="vote", coalesce=False),
+            Outgoing(FLAVOR, embed="vote 2", coalesce=False),
+        )
+        batches = [[item.embed for item in outbound.take_batch()] for _ in range(5)]
+        assert batches == [["a", "b"], ["c"], ["d"], ["vote"], ["vote 2"]]
+
+    def test_plain_text_is_never_merged(self):
+        outbound = queue(Outgoing(NORMAL, "hi", embed="a"), Outgoing(NORMAL, embed="b"))
+        assert len(outbound.take_batch()) == 1
+
+
+class TestTokenBucket:
+    def test_burst_then_wait_for_refill(self):
+        bucket = TokenBucket(5, 5.0)
+        for _ in range(5):
+            assert bucket.delay(0.0) == 0
+            bucket.take(0.0)
+        assert bucket.delay(0.0) == 1.0
+        assert bucket.delay(0.5) == 0.5
+        assert bucket.delay(1.0) == 0
+
+    def test_refill_caps_at_capacity(self):
+        bucket = TokenBucket(2, 1.0)
+        bucket.take(0.0)
+        bucket.delay(100.0)
+        assert bucket.tokens == 2
+
+    def test_full_once_refilled(self):
+        bucket = TokenBucket(2, 1.0)
+        assert bucket.full(0.0)
+        bucket.take(0.0)
+        assert not bucket.full(0.25)
+        assert bucket.full(0.5)
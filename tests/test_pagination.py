@@ -0,0 +1,83 @@
+"""Tests for utils/pagination.py — keyset roster pages against in-memory SQLite"""
+import sqlite3
+
+import pytest
+
+from utils.pagination import roster_key, roster_page_query, split_page
+
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE users (user_id INTEGER PRIMARY KEY, discord_name TEXT NOT NULL)")
+    conn.execute('''
+        CREATE TABLE seths (
+            seth_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            generation INTEGER DEFAULT 1,
+            health INTEGER DEFAULT 100,
+            hunger INTEGER DEFAULT 0,
+            is_alive INTEGER DEFAULT 1,
+            birth_ts INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+            guild_id INTEGER
+        )
+    ''')
+    # 7 Seths in guild 1 with ties on generation and health, 1 in guild 2, 1 dead
+    rows = [
+        (1, 3, 50), (2, 3, 50), (3, 3, 90), (4, 1, 100),
+        (5, 2, 70), (6, 2, 70), (7, 2, 10),
+    ]
+    for user_id, gen, health in rows:
+        conn.execute("INSERT INTO users VALUES (?, ?)", (user_id, f"user{user_id}"))
+        conn.execute(
+            "INSERT INTO seths (user_id, name, generation, health, guild_id) VALUES (?, ?, ?, ?, 1)",
+            (user_id, f"Seth{user_id}", gen, health)
+        )
+    conn.execute("INSERT INTO users VALUES (8, 'other')")
+    conn.execute("INSERT INTO seths (user_id, name, generation, guild_id) VALUES (8, 'Elsewhere', 9, 2)")
+    conn.execute("INSERT INTO seths (user_id, name, generation, is_alive, guild_id) VALUES (8, 'Dead', 9, 0, 1)")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def fetch(db, key, forward, page_size):
+    sql, params = roster_page_query(1, key, forward, page_size + 1)
+    return split_page(db.execute(sql, params).fetchall(), page_size, forward)
+
+
+def names(page):
+    return [row[1] for row in page]
+
+
+FULL_ORDER = ["Seth3", "Seth1", "Seth2", "Seth5", "Seth6", "Seth7", "Seth4"]
+
+
+class TestRosterPages:
+    def test_first_page_order(self, db):
+        page, has_more = fetch(db, None, True, 3)
+        assert names(page) == FULL_ORDER[:3]
+        assert has_more
+
+    def test_walk_forward_covers_everything_once(self, db):
+        seen = []
+        page, has_more = fetch(db, None, True, 3)
+        seen += names(page)
+        while has_more:
+            page, has_more = fetch(db, roster_key(page[-1]), True, 3)
+            seen += names(page)
+        assert seen == FULL_ORDER
+
+    def test_walk_backward_returns_previous_page(self, db):
+        first, _ = fetch(db, None, True, 3)
+        second, _ = fetch(db, roster_key(first[-1]), True, 3)
+        back, has_more = fetch(db, roster_key(second[0]), False, 3)
+        assert names(back) == names(first)
+        assert not has_more
+
+    def test_scoped_to_guild_and_living(self, db):
+        page, has_more = fetch(db, None, True, 25)
+        assert "Elsewhere" not in names(page)
+        assert "Dead" not in names(page)
+        assert not has_more
@@ -0,0 +1,62 @@
+"""Tests for utils/profiler.py"""
+import sys
+import time
+
+import pytest
+
+from utils.profiler import AVAILABLE, SamplingProfiler, fold_stack
+
+needs_sigprof = pytest.mark.skipif(not AVAILABLE, reason="SIGPROF is Unix-only")
+
+
+def outer():
+    return inner()
+
+
+def inner():
+    return fold_stack(sys._getframe())
+
+
+def spin(seconds):
+    """Burn CPU so the CPU-time timer fires"""
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        sum(range(1000))
+
+
+class TestFoldStack:
+    def test_root_first(self):
+        assert outer().endswith("test_profiler.py:outer;test_profiler.py:inner")
+
+
+@needs_sigprof
+class TestSamplingProfiler:
+    def test_samples_what_is_running(self):
+        profiler = SamplingProfiler(interval=0.001, max_overhead=0.05, max_seconds=10)
+        profiler.start()
+        spin(0.2)
+        profiler.stop()
+
+        assert profiler.samples > 0
+        assert profiler.hottest(1)[0][0] == "test_profiler.py:spin"
+        lines = profiler.folded().splitlines()
+        assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == profiler.samples
+        assert profiler.overhead < 0.05
+
+    def test_stops_after_max_seconds(self):
+        profiler = SamplingProfiler(interval=0.001, max_overhead=0.05, max_seconds=0.05)
+        profiler.start()
+        spin(0.2)
+        assert not profiler.running
+        samples = profiler.samples
+        spin(0.05)
+        assert profiler.samples == samples
+
+    def test_stop_restores_the_previous_handler(self):
+        import signal
+        before = signal.getsignal(signal.SIGPROF)
+        profiler = SamplingProfiler(interval=0.001, max_overhead=0.05, max_seconds=10)
+        profiler.start()
+        profiler.stop()
+        profiler.stop()
+        assert signal.getsignal(signal.SIGPROF) == before
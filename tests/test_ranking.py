@@ -0,0 +1,80 @@
+"""Tests for utils/ranking.py"""
+import random
+
+from utils.ranking import OrderStatisticTree, RankIndex, composite_score
+
+
+class TestCompositeScore:
+    def test_matches_compare_formula(self):
+        # health + fullness + 10 per generation + 1 per 10 minutes alive
+        assert composite_score(80, 30, 2, 125) == 80 + 70 + 20 + 12
+
+    def test_fresh_seth(self):
+        assert composite_score(100, 0, 1, 0) == 210
+
+
+class TestOrderStatisticTree:
+    def test_rank_and_select_match_sorted_list(self):
+        rng = random.Random(7)
+        tree = OrderStatisticTree()
+        keys = set()
+        for _ in range(500):
+            key = (rng.randint(-1000, 1000), rng.randint(0, 10**6))
+            keys.add(key)
+            tree.insert(key)
+        for key in rng.sample(sorted(keys), 200):
+            tree.remove(key)
+            keys.discard(key)
+
+        ordered = sorted(keys)
+        assert len(tree) == len(ordered)
+        assert list(tree) == ordered
+        for i in range(0, len(ordered), 17):
+            assert tree.rank(ordered[i]) == i
+            assert tree.select(i) == ordered[i]
+
+    def test_remove_missing_key_is_noop(self):
+        tree = OrderStatisticTree()
+        tree.insert((1, 1))
+        tree.remove((2, 2))
+        assert len(tree) == 1
+
+
+class TestRankIndex:
+    def test_rank_matches_brute_force_sort(self):
+        rng = random.Random(3)
+        index = RankIndex()
+        now = 1_000_000
+        seths = {}
+        for seth_id in range(1, 200):
+            seths[seth_id] = (rng.randint(1, 5), rng.randint(0, 100), rng.randint(0, 100), now - rng.randint(0, 50_000))
+            index.upsert(seth_id, *seths[seth_id])
+
+        brute = sorted(seths, key=lambda s: -index.score(s, now))
+        top = index.top(10)
+        assert [index.score(s, now) for s in top] == [index.score(s, now) for s in brute[:10]]
+        for seth_id in seths:
+            better = sum(1 for other in seths if index.score(other, now) > index.score(seth_id, now))
+            assert index.rank(seth_id) >= better + 1
+
+    def test_vitals_update_moves_seth(self):
+        index = RankIndex()
+        index.upsert(1, 1, 50, 50, 0)
+        index.upsert(2, 1, 60, 50, 0)
+        assert index.rank(1) == 2
+        index.update_vitals(1, 100, 0)
+        assert index.rank(1) == 1
+        assert index.rank(2) == 2
+
+    def test_older_seth_wins_ties(self):
+        index = RankIndex()
+        index.upsert(1, 1, 100, 0, 1000)
+        index.upsert(2, 1, 100, 0, 500)
+        assert index.top(2) == [2, 1]
+
+    def test_death_removes_seth(self):
+        index = RankIndex()
+        index.upsert(1, 1, 100, 0, 0)
+        index.remove(1)
+        assert index.rank(1) is None
+        assert len(index) == 0
@@ -0,0 +1,53 @@
+"""Tests for utils/seth_cache.py"""
+from utils.seth_cache import MISSING, SethCache, SethRecord
+
+
+def record(user_id, health=100, hunger=0):
+    return SethRecord(user_id * 10, user_id, f"Seth{user_id}", 1, health, hunger, 0, 1)
+
+
+class TestSethCache:
+    def test_miss_then_hit(self):
+        cache = SethCache(4)
+        assert cache.get(1) is MISSING
+        cache.put(1, record(1))
+        assert cache.get(1).name == "Seth1"
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_negative_entries(self):
+        cache = SethCache(4)
+        cache.put(1, None)
+        assert cache.get(1) is None
+        cache.born(record(1))
+        assert cache.get(1).seth_id == 10
+
+    def test_evicts_least_recently_used(self):
+        cache = SethCache(2)
+        cache.put(1, record(1))
+        cache.put(2, record(2))
+        cache.get(1)
+        cache.put(3, record(3))
+        assert cache.get(2) is MISSING
+        assert cache.get(1) is not MISSING
+        assert len(cache) == 2
+
+    def test_update_vitals_in_place(self):
+        cache = SethCache(4)
+        cache.put(1, record(1))
+        cache.update_vitals(1, 40, 70, 3)
+        cache.update_vitals(2, 10, 10, 1)
+        seth = cache.get(1)
+        assert (seth.health, seth.hunger, seth.version) == (40, 70, 3)
+        assert cache.get(2) is MISSING
+
+    def test_stale_read_is_not_cached(self):
+        cache = SethCache(4)
+        token = cache.token()
+        cache.discard(1)
+        cache.put(1, record(1), token)
+        assert cache.get(1) is MISSING
+        cache.put(1, record(1), cache.token())
+        assert cache.get(1) is not MISSING
+
+    def test_records_have_no_dict(self):
+        assert not hasattr(record(1), "__dict__")
@@ -0,0 +1,36 @@
+"""Tests for utils/shards.py"""
+from types import SimpleNamespace
+
+from utils.shards import guilds_by_shard, parse_shard_ids
+
+
+class FakeBot:
+    def __init__(self, guilds, closed=()):
+        self.guilds = guilds
+        self.closed = set(closed)
+
+    def get_shard(self, shard_id):
+        return SimpleNamespace(is_closed=lambda: shard_id in self.closed)
+
+
+def guild(guild_id, shard_id):
+    return SimpleNamespace(id=guild_id, shard_id=shard_id)
+
+
+class TestGuildsByShard:
+    def test_groups_in_guild_order(self):
+        bot = FakeBot([guild(1, 0), guild(2, 1), guild(3, 0)])
+        shards = guilds_by_shard(bot)
+        assert {shard: [g.id for g in guilds] for shard, guilds in shards.items()} == {0: [1, 3], 1: [2]}
+
+    def test_keeps_disconnected_shards(self):
+        bot = FakeBot([guild(1, 0), guild(2, 1)], closed={1})
+        assert list(guilds_by_shard(bot)) == [0, 1]
+
+
+class TestParseShardIds:
+    def test_ranges_and_singles(self):
+        assert parse_shard_ids("0-3,8") == [0, 1, 2, 3, 8]
+
+    def test_overlaps_and_spaces(self):
+        assert parse_shard_ids(" 2, 0-2 ") == [0, 1, 2]
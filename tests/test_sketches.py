@@ -0,0 +1,70 @@
+"""Tests for utils/sketches.py"""
+import random
+
+from utils.sketches import FixedHistogram, QuantileSketch
+
+
+class TestFixedHistogram:
+    def test_quantiles_are_exact(self):
+        hist = FixedHistogram(0, 100)
+        for value in range(1, 101):
+            hist.add(value)
+        assert hist.quantile(0.5) == 50
+        assert hist.quantile(0.9) == 90
+        assert hist.quantile(1.0) == 100
+
+    def test_move_keeps_total(self):
+        hist = FixedHistogram(0, 100)
+        hist.add(90)
+        hist.move(90, 10)
+        assert hist.total == 1
+        assert hist.count_between(0, 19) == 1
+        assert hist.count_between(80, 100) == 0
+
+    def test_values_are_clamped(self):
+        hist = FixedHistogram(0, 100)
+        hist.add(-5)
+        hist.add(150)
+        assert hist.quantile(0.0) == 0
+        assert hist.quantile(1.0) == 100
+
+    def test_empty(self):
+        assert FixedHistogram(0, 100).quantile(0.5) is None
+
+
+class TestQuantileSketch:
+    def test_relative_error_bound(self):
+        rng = random.Random(1)
+        values = sorted(rng.expovariate(1 / 3600) + 1 for _ in range(5000))
+        sketch = QuantileSketch(0.02)
+        for value in values:
+            sketch.add(value)
+        for q in (0.1, 0.5, 0.9, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            assert abs(sketch.quantile(q) - exact) <= 0.02 * exact + 1e-9
+
+    def test_merge_equals_combined_stream(self):
+        left, right, both = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for value in range(1, 500):
+            (left if value % 2 else right).add(value)
+            both.add(value)
+        left.merge(right)
+        assert left.count == both.count
+        assert left.quantile(0.5) == both.quantile(0.5)
+
+    def test_remove_undoes_add(self):
+        sketch = QuantileSketch()
+        sketch.add(10)
+        sketch.add(1000)
+        sketch.remove(1000)
+        assert sketch.count == 1
+        assert abs(sketch.quantile(1.0) - 10) <= 0.2
+
+    def test_round_trip_bytes(self):
+        sketch = QuantileSketch()
+        for value in (0, 5, 50, 5000):
+            sketch.add(value)
+        restored = QuantileSketch.from_bytes(sketch.to_bytes())
+        assert restored.count == 4
+        assert restored.zero_count == 1
+        assert restored.quantile(0.75) == sketch.quantile(0.75)
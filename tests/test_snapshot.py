@@ -0,0 +1,61 @@
+"""Tests for utils/snapshot.py against in-memory SQLite"""
+import sqlite3
+
+import pytest
+
+from utils.snapshot import snapshot_from_row, snapshot_query
+
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(":memory:")
+    conn.execute('''
+        CREATE TABLE seths (
+            seth_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            generation INTEGER DEFAULT 1,
+            health INTEGER DEFAULT 100,
+            hunger INTEGER DEFAULT 0,
+            is_alive INTEGER DEFAULT 1,
+            birth_ts INTEGER DEFAULT 0,
+            guild_id INTEGER,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute("CREATE TABLE resources (user_id INTEGER PRIMARY KEY, food INTEGER, medicine INTEGER, coal INTEGER)")
+    conn.execute("INSERT INTO seths (user_id, name, generation, is_alive) VALUES (1, 'Old', 1, 0)")
+    conn.execute("INSERT INTO seths (user_id, name, generation, health, hunger, guild_id) VALUES (1, 'Current', 2, 70, 30, 5)")
+    conn.execute("INSERT INTO resources VALUES (1, 4, 2, 9)")
+    conn.execute("INSERT INTO seths (user_id, name, generation, is_alive) VALUES (2, 'Gone', 3, 0)")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def snapshots(db, *user_ids):
+    rows = db.execute(snapshot_query(len(user_ids)), user_ids).fetchall()
+    return {snapshot.user_id: snapshot for snapshot in map(snapshot_from_row, rows)}
+
+
+class TestUserSnapshot:
+    def test_living_seth_resources_and_stats(self, db):
+        snapshot = snapshots(db, 1)[1]
+        assert snapshot.seth.name == "Current"
+        assert (snapshot.seth.health, snapshot.seth.hunger, snapshot.seth.guild_id) == (70, 30, 5)
+        assert snapshot.resources == (4, 2, 9)
+        assert (snapshot.total_seths, snapshot.max_generation) == (2, 2)
+
+    def test_dead_line_keeps_history(self, db):
+        snapshot = snapshots(db, 2)[2]
+        assert snapshot.seth is None
+        assert snapshot.resources is None
+        assert (snapshot.total_seths, snapshot.max_generation) == (1, 3)
+
+    def test_unknown_user_still_gets_a_row(self, db):
+        snapshot = snapshots(db, 99)[99]
+        assert snapshot.seth is None
+        assert (snapshot.total_seths, snapshot.max_generation) == (0, 0)
+
+    def test_several_users_in_one_query(self, db):
+        assert set(snapshots(db, 1, 2, 99)) == {1, 2, 99}
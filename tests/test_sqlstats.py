@@ -0,0 +1,47 @@
+"""Tests for utils/sqlstats.py"""
+import pytest
+
+from utils.sqlstats import SqlStats, format_plan, normalize
+
+
+class TestNormalize:
+    def test_literals_become_placeholders(self):
+        assert normalize("SELECT * FROM seths WHERE health < 20 AND name = 'O''Seth'") == \
+            "SELECT * FROM seths WHERE health < ? AND name = ?"
+
+    def test_whitespace_is_collapsed(self):
+        assert normalize("\n  SELECT a,b\n   FROM t ;") == "SELECT a, b FROM t"
+
+    def test_identifiers_keep_their_digits(self):
+        assert normalize("SELECT t1.x FROM t1") == "SELECT t1.x FROM t1"
+
+    def test_placeholder_lists_collapse(self):
+        three = normalize("SELECT * FROM t WHERE id IN (?, ?, ?)")
+        assert three == normalize("SELECT * FROM t WHERE id IN (?,?,?,?)") == \
+            "SELECT * FROM t WHERE id IN (?, ...)"
+
+    def test_values_lists_collapse(self):
+        assert normalize("VALUES (?), (?), (?)") == normalize("VALUES (?)") + ", ..."
+
+
+class TestSqlStats:
+    def test_same_shape_shares_stats(self):
+        stats = SqlStats()
+        assert stats.statement("SELECT 1") is stats.statement("SELECT  2")
+
+    def test_top_and_p99(self):
+        stats = SqlStats()
+        cheap, dear = stats.statement("SELECT a FROM t"), stats.statement("SELECT b FROM t")
+        for _ in range(99):
+            cheap.called(0.001)
+            cheap.seconds += 0.001
+        dear.called(0.5)
+        dear.seconds += 0.5
+        assert [s.sql for s in stats.top(2)] == ["SELECT b FROM t", "SELECT a FROM t"]
+        assert [s.sql for s in stats.top(1, 'calls')] == ["SELECT a FROM t"]
+        assert cheap.p99() == pytest.approx(0.001, rel=0.03)
+
+
+def test_format_plan_nests_children():
+    rows = [(2, 0, 0, "SCAN seths"), (5, 2, 0, "CORRELATED SCALAR SUBQUERY 1"), (9, 0, 0, "SEARCH r")]
+    assert format_plan(rows) == "SCAN seths\n  CORRELATED SCALAR SUBQUERY 1\nSEARCH r"
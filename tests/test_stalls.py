@@ -0,0 +1,103 @@
+"""Tests for utils/stalls.py"""
+import asyncio
+import time
+
+from utils.stalls import (
+    CallbackTimer,
+    Stall,
+    StallLog,
+    current_command,
+    describe_callback,
+    measure_lag,
+)
+
+
+def stall(seconds):
+    return Stall(seconds, "somewhere", None, 0.0)
+
+
+class TestStallLog:
+    def test_keeps_only_the_latest(self):
+        log = StallLog(3)
+        for seconds in (0.9, 0.1, 0.2, 0.3):
+            log.record(stall(seconds))
+        assert [s.seconds for s in log.stalls] == [0.1, 0.2, 0.3]
+        assert log.total == 4
+
+    def test_worst_first(self):
+        log = StallLog(10)
+        for seconds in (0.2, 0.5, 0.1):
+            log.record(stall(seconds))
+        assert [s.seconds for s in log.worst(2)] == [0.5, 0.2]
+
+
+async def blocks_then_waits(event):
+    time.sleep(0.03)  # noqa: ASYNC251 - a task step that blocks the loop is what is timed
+    await event.wait()
+
+
+class TestCallbackTimer:
+    def test_reports_slow_task_with_its_command(self):
+        reported = []
+        timer = CallbackTimer(0.02, reported.append)
+
+        async def command():
+            current_command.set('server')
+            await blocks_then_waits(event)
+
+        async def main():
+            nonlocal event
+            event = asyncio.Event()
+            task = asyncio.create_task(command())
+            await asyncio.sleep(0.05)
+            event.set()
+            await task
+
+        event = None
+        timer.install()
+        try:
+            asyncio.run(main())
+        finally:
+            timer.uninstall()
+
+        assert len(reported) == 1
+        assert reported[0].seconds >= 0.03
+        assert reported[0].command == 'server'
+        assert reported[0].where.startswith("tests/test_stalls.py:")
+        assert reported[0].where.endswith(" in blocks_then_waits")
+
+    def test_uninstall_restores_the_loop(self):
+        original = asyncio.Handle._run
+        timer = CallbackTimer(0.02, print)
+        timer.install()
+        timer.install()
+        timer.uninstall()
+        assert asyncio.Handle._run is original
+
+    def test_covers_only_loops_that_run_handles(self):
+        loop = asyncio.new_event_loop()
+        try:
+            assert CallbackTimer.covers(loop)
+        finally:
+            loop.close()
+        assert not CallbackTimer.covers(object())
+
+    def test_describes_plain_callbacks_by_name(self):
+        def tick():
+            pass
+        assert describe_callback(tick).endswith("tick")
+
+
+class TestMeasureLag:
+    def test_records_how_late_the_loop_woke(self):
+        lags = []
+
+        async def main():
+            probe = asyncio.create_task(measure_lag(0.01, lags.append))
+            await asyncio.sleep(0)
+            asyncio.get_running_loop().call_soon(time.sleep, 0.05)
+            await asyncio.sleep(0.02)
+            probe.cancel()
+
+        asyncio.run(main())
+        assert lags[0] >= 0.03
@@ -0,0 +1,39 @@
+"""Tests for utils/timing_wheel.py"""
+from utils.timing_wheel import TimingWheel
+
+
+class TestTimingWheel:
+    def test_expires_at_deadline(self):
+        wheel = TimingWheel(tick=1, slots=8)
+        wheel.advance(100)
+        wheel.schedule("a", 103.5)
+        assert wheel.advance(103) == []
+        assert "a" in wheel
+        assert wheel.advance(103.5) == ["a"]
+        assert "a" not in wheel
+        assert len(wheel) == 0
+
+    def test_deadline_beyond_one_lap(self):
+        wheel = TimingWheel(tick=1, slots=4)
+        wheel.advance(0)
+        wheel.schedule("far", 10)
+        assert wheel.advance(6) == []
+        assert wheel.advance(10) == ["far"]
+
+    def test_long_gap_sweeps_everything_due(self):
+        wheel = TimingWheel(tick=1, slots=4)
+        wheel.advance(0)
+        for i in range(20):
+            wheel.schedule(i, i + 1)
+        assert sorted(wheel.advance(1000)) == list(range(20))
+
+    def test_reschedule_and_cancel(self):
+        wheel = TimingWheel(tick=1, slots=8)
+        wheel.advance(0)
+        wheel.schedule("a", 2)
+        wheel.schedule("a", 5)
+        assert wheel.get("a") == 5
+        assert wheel.advance(3) == []
+        wheel.cancel("a")
+        assert wheel.advance(10) == []
+        assert wheel.get("a") is None
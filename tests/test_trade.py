@@ -0,0 +1,43 @@
+"""Tests for utils/trade.py"""
+import pytest
+
+from config import MAX_TRADE_AMOUNT
+from utils.trade import BundleError, bundle_amounts, format_bundle, parse_bundle
+
+
+class TestParseBundle:
+    def test_single_resource(self):
+        assert parse_bundle(["food", "3"]) == {"food": 3}
+
+    def test_multiple_resources_case_insensitive(self):
+        assert parse_bundle(["Coal", "10", "MEDICINE", "1"]) == {"coal": 10, "medicine": 1}
+
+    def test_repeated_resource_is_summed(self):
+        assert parse_bundle(["food", "2", "food", "3"]) == {"food": 5}
+
+    @pytest.mark.parametrize("tokens", [[], ["food"], ["food", "lots"], ["food", "1", "coal"]])
+    def test_malformed(self, tokens):
+        with pytest.raises(BundleError, match="Usage"):
+            parse_bundle(tokens)
+
+    def test_unknown_resource(self):
+        with pytest.raises(BundleError, match="Invalid resource"):
+            parse_bundle(["gold", "1"])
+
+    @pytest.mark.parametrize("amount", ["0", "-4"])
+    def test_non_positive(self, amount):
+        with pytest.raises(BundleError, match="positive"):
+            parse_bundle(["food", amount])
+
+    def test_cap_applies_to_the_summed_amount(self):
+        parse_bundle(["coal", str(MAX_TRADE_AMOUNT)])
+        with pytest.raises(BundleError, match="too much"):
+            parse_bundle(["coal", str(MAX_TRADE_AMOUNT), "coal", "1"])
+
+
+class TestBundleHelpers:
+    def test_amounts_fill_missing_with_zero(self):
+        assert bundle_amounts({"coal": 4}) == (0, 0, 4)
+
+    def test_format(self):
+        assert format_bundle({"food": 3, "coal": 2}) == "🍖 **3** Food + ⚫ **2** Coal"
@@ -0,0 +1,58 @@
+"""Per-guild lookup of announcement channels by purpose"""
+from __future__ import annotations
+
+# Channel names tried in order for each purpose when no override is set
+PURPOSES: dict[str, tuple[str, ...]] = {
+    'home': ('seth-home', 'general'),
+    'graveyard': ('seth-graveyard',),
+    'drama': ('village-drama', 'seth-graveyard'),
+}
+
+
+class ChannelRegistry:
+    """Text channel ids of one guild by name, plus per-purpose overrides.
+
+    resolve() costs a dict hit per fallback name, whatever the size of the
+    guild. Channels keep the order they were added in, so with duplicate
+    names the first one listed wins, as with discord.utils.get.
+    """
+
+    def __init__(self, overrides: dict[str, int] | None = None) -> None:
+        self._by_name: dict[str, dict[int, None]] = {}
+        self._names: dict[int, str] = {}
+        # Shared with the caller, so changes to it apply immediately
+        self.overrides: dict[str, int] = overrides if overrides is not None else {}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, channel_id: int) -> bool:
+        return channel_id in self._names
+
+    def add(self, channel_id: int, name: str) -> None:
+        """Track a channel, or follow a rename of one already tracked"""
+        if self._names.get(channel_id) == name:
+            return
+        self.remove(channel_id)
+        self._names[channel_id] = name
+        self._by_name.setdefault(name, {})[channel_id] = None
+
+    def remove(self, channel_id: int) -> None:
+        name = self._names.pop(channel_id, None)
+        if name is None:
+            return
+        ids = self._by_name[name]
+        del ids[channel_id]
+        if not ids:
+            del self._by_name[name]
+
+    def resolve(self, purpose: str) -> int | None:
+        """Channel id for a purpose: a live override, else the first fallback name present"""
+        override = self.overrides.get(purpose)
+        if override in self._names:
+            return override
+        for name in PURPOSES[purpose]:
+            ids = self._by_name.get(name)
+            if ids:
+                return next(iter(ids))
+        return None
@@ -0,0 +1,40 @@
+"""Closed-form mining yield for idle expeditions"""
+import math
+import random
+
+from config import (
+    COAL_MINE_MAX,
+    COAL_MINE_MIN,
+    FOOD_MINE_MAX,
+    FOOD_MINE_MIN,
+    MEDICINE_MINE_MAX,
+    MEDICINE_MINE_MIN,
+)
+
+# Up to this many draws are summed directly; beyond it the sum is
+# near-normal and sampled from that approximation in constant time
+EXACT_SUM_LIMIT = 32
+
+
+def mining_windows(elapsed: float, cooldown: int, max_duration: int) -> int:
+    """How many !mine cooldowns fit into an expedition, capped at max_duration"""
+    return int(min(max(elapsed, 0), max_duration) // cooldown)
+
+
+def sum_uniform(n: int, lo: int, hi: int, rng: random.Random | None = None) -> int:
+    """Sum of n independent randint(lo, hi) draws"""
+    rng = rng or random
+    if n <= EXACT_SUM_LIMIT:
+        return sum(rng.randint(lo, hi) for _ in range(n))
+    mean = n * (lo + hi) / 2
+    variance = n * ((hi - lo + 1) ** 2 - 1) / 12
+    return min(n * hi, max(n * lo, round(rng.gauss(mean, math.sqrt(variance)))))
+
+
+def expedition_yield(windows: int, rng: random.Random | None = None) -> tuple[int, int, int]:
+    """(food, medicine, coal) that mining once per window would have found"""
+    return (
+        sum_uniform(windows, FOOD_MINE_MIN, FOOD_MINE_MAX, rng),
+        sum_uniform(windows, MEDICINE_MINE_MIN, MEDICINE_MINE_MAX, rng),
+        sum_uniform(windows, COAL_MINE_MIN, COAL_MINE_MAX, rng),
+    )
@@ -1,7 +1,7 @@
 """
 Standardized visual formatting for all Seth bot displays
 """
-from config import BAR_SEGMENTS, BAR_PERCENTAGE_MAX
+from config import BAR_SEGMENTS, BAR_PERCENTAGE_MAX, SECONDS_PER_HOUR, SECONDS_PER_DAY
 
 
 class SethVisuals:
@@ -33,3 +33,12 @@ class SethVisuals:
         if show_fraction:
             return f"{bar} {current}/{max_val}"
         return f"{bar} {percentage:.0f}%"
+
+    @staticmethod
+    def duration(seconds: float) -> str:
+        """Consistent lifespan display: minutes, then hours, then days"""
+        if seconds < SECONDS_PER_HOUR:
+            return f"{int(seconds / 60)} minutes"
+        elif seconds < SECONDS_PER_DAY:
+            return f"{round(seconds / SECONDS_PER_HOUR, 1)} hours"
+        return f"{round(seconds / SECONDS_PER_DAY, 1)} days"
@@ -0,0 +1,36 @@
+"""Expiring leases that let one process in a cluster own a singleton task"""
+
+# Takes a lease that is free, expired or already ours, pushing out its expiry.
+# RETURNING yields a row only when this holder now has the lease.
+CLAIM_LEASE = """INSERT INTO leases (name, holder, expires) VALUES (?, ?, ?)
+    ON CONFLICT (name) DO UPDATE SET holder = excluded.holder, expires = excluded.expires
+    WHERE leases.holder = excluded.holder OR leases.expires <= ?
+    RETURNING expires"""
+
+RELEASE_LEASE = "DELETE FROM leases WHERE name = ? AND holder = ?"
+
+# Records a singleton tick unless one was recorded less than an interval ago,
+# whichever process ran it. RETURNING yields a row only when this tick may run.
+CLAIM_TICK = """INSERT INTO loop_ticks (name, last_tick) VALUES (?, ?)
+    ON CONFLICT (name) DO UPDATE SET last_tick = excluded.last_tick
+    WHERE loop_ticks.last_tick <= ?
+    RETURNING last_tick"""
+
+
+def claim_params(name: str, holder: str, now: float, ttl: float) -> tuple[str, str, float, float]:
+    """Parameters for CLAIM_LEASE: hold name until now + ttl"""
+    return name, holder, now + ttl, now
+
+
+def tick_params(name: str, now: float, interval: float, slack: float) -> tuple[str, float, float]:
+    """Parameters for CLAIM_TICK: run unless the last tick was within interval - slack of now"""
+    return name, now, now - (interval - slack)
+
+
+def holds(expires: float | None, now: float, margin: float) -> bool:
+    """Whether a holder whose last claim ran to expires may still act.
+
+    It stops margin seconds early, so a holder that can no longer renew
+    has gone quiet before the lease lapses and anyone else can claim it.
+    """
+    return expires is not None and now < expires - margin
@@ -0,0 +1,183 @@
+"""Counters, gauges and histograms rendered in the Prometheus text format"""
+from __future__ import annotations
+
+import functools
+import time
+from bisect import bisect_left
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from typing import Any, TypeVar
+
+# Seconds; fine enough at the low end for single SQL statements
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+T = TypeVar('T')
+
+
+class Counter:
+    __slots__ = ('value',)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Gauge:
+    __slots__ = ('value',)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Histogram:
+    """Observations counted into fixed buckets, plus their count and sum"""
+
+    __slots__ = ('bounds', 'count', 'counts', 'sum')
+
+    def __init__(self, bounds: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe how long the block takes, whether or not it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """(le, observations at or below it) for every bucket, +Inf last"""
+        total = 0
+        buckets = []
+        for bound, count in zip([*map(_number, self.bounds), '+Inf'], self.counts):
+            total += count
+            buckets.append((bound, total))
+        return buckets
+
+
+class Metric:
+    """One metric family; each combination of label values is a child"""
+
+    def __init__(self, name: str, help: str, kind: str, labelnames: tuple[str, ...],
+                 factory: Callable[[], Counter | Gauge | Histogram]) -> None:
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = labelnames
+        self.factory = factory
+        self.children: dict[tuple[str, ...], Any] = {}
+
+    def labels(self, *values: Any) -> Any:
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}")
+        key = tuple(map(str, values))
+        child = self.children.get(key)
+        if child is None:
+            child = self.children[key] = self.factory()
+        return child
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self.children.items()):
+            labels = list(zip(self.labelnames, values))
+            if isinstance(child, Histogram):
+                for le, total in child.cumulative():
+                    lines.append(f"{self.name}_bucket{_labels(labels + [('le', le)])} {total}")
+                lines.append(f"{self.name}_sum{_labels(labels)} {_number(child.sum)}")
+                lines.append(f"{self.name}_count{_labels(labels)} {child.count}")
+            else:
+                lines.append(f"{self.name}{_labels(labels)} {_number(child.value)}")
+        return lines
+
+
+class Registry:
+    """Every metric the process exposes.
+
+    Collectors run just before rendering, for values such as queue
+    depths that are cheaper to read on demand than to track.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+        self.collectors: list[Callable[[], None]] = []
+
+    def _add(self, name: str, help: str, kind: str, labelnames: tuple[str, ...],
+             factory: Callable[[], Counter | Gauge | Histogram]) -> Metric:
+        if name in self.metrics:
+            raise ValueError(f"Metric {name} is already registered")
+        metric = self.metrics[name] = Metric(name, help, kind, labelnames, factory)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Metric:
+        return self._add(name, help, 'counter', labelnames, Counter)
+
+    def gauge(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Metric:
+        return self._add(name, help, 'gauge', labelnames, Gauge)
+
+    def histogram(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Metric:
+        return self._add(name, help, 'histogram', labelnames, lambda: Histogram(buckets))
+
+    def render(self) -> str:
+        for collect in self.collectors:
+            collect()
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def timed(histogram: Histogram) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Decorate a coroutine function so every run is observed"""
+    def decorate(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            with histogram.time():
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _number(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels: list[tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+# The process-wide registry, and the metrics shared across modules
+metrics = Registry()
+COMMAND_SECONDS = metrics.histogram('seth_command_seconds', 'Command run time', ('command',))
+COMMAND_ERRORS = metrics.counter('seth_command_errors_total', 'Commands that failed', ('command', 'error'))
+LOOP_SECONDS = metrics.histogram('seth_loop_seconds', 'Background loop run time', ('loop',))
+DB_SECONDS = metrics.histogram('seth_db_statement_seconds', 'SQL statement time', ('verb',))
+QUEUE_DEPTH = metrics.gauge('seth_queue_depth', 'Items waiting in a queue', ('queue',))
+GUILDS = metrics.gauge('seth_guilds', 'Guilds this process serves')
+GATEWAY_LATENCY = metrics.gauge('seth_gateway_latency_seconds', 'Heartbeat latency per shard', ('shard',))
+LOOP_LAG = metrics.histogram('seth_event_loop_lag_seconds', 'How late the event loop wakes a sleeper')
+LOOP_STALLS = metrics.counter('seth_event_loop_stalls_total', 'Callbacks that held the event loop too long')
+SETH_CACHE = metrics.counter('seth_cache_lookups_total', 'Living Seth cache lookups', ('result',))
+DB_WRITE_ERRORS = metrics.counter('seth_db_write_errors_total', 'Write batches that failed and were rolled back')
+CLUSTER_ERRORS = metrics.counter('seth_cluster_errors_total', 'Cluster writes that failed', ('operation',))
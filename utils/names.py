@@ -0,0 +1,84 @@
+"""Case-folded member name index with exact and prefix lookup"""
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from collections.abc import Iterable
+
+
+class NameIndex:
+    """Member ids by case-folded name, display name and nick for one guild.
+
+    Exact lookups are a dict hit. Prefix lookups bisect into a sorted list
+    of the distinct names and walk forward only while names still match.
+    """
+
+    def __init__(self) -> None:
+        self._ids: dict[str, set[int]] = {}
+        self._sorted: list[str] = []
+        self._keys: dict[int, frozenset[str]] = {}
+
+    @classmethod
+    def build(cls, members: Iterable[tuple[int, Iterable[str | None]]]) -> NameIndex:
+        """An index of many (member_id, names) at once, sorting the names a single time.
+
+        add() keeps the list sorted with insort, which is quadratic when
+        indexing a whole guild one member at a time.
+        """
+        index = cls()
+        for member_id, names in members:
+            keys = frozenset(name.casefold() for name in names if name)
+            for key in keys:
+                index._ids.setdefault(key, set()).add(member_id)
+            index._keys[member_id] = keys
+        index._sorted = sorted(index._ids)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, member_id: int) -> bool:
+        return member_id in self._keys
+
+    def add(self, member_id: int, names: Iterable[str | None]) -> None:
+        """Index a member under each of their names, replacing any old ones"""
+        keys = frozenset(name.casefold() for name in names if name)
+        old = self._keys.get(member_id, frozenset())
+        if keys == old:
+            return
+        for key in old - keys:
+            self._discard(key, member_id)
+        for key in keys - old:
+            if key not in self._ids:
+                self._ids[key] = set()
+                insort(self._sorted, key)
+            self._ids[key].add(member_id)
+        self._keys[member_id] = keys
+
+    def remove(self, member_id: int) -> None:
+        for key in self._keys.pop(member_id, ()):
+            self._discard(key, member_id)
+
+    def _discard(self, key: str, member_id: int) -> None:
+        ids = self._ids[key]
+        ids.discard(member_id)
+        if not ids:
+            del self._ids[key]
+            del self._sorted[bisect_left(self._sorted, key)]
+
+    def exact(self, name: str) -> set[int]:
+        """Members with this name, display name or nick, ignoring case"""
+        return set(self._ids.get(name.casefold(), ()))
+
+    def prefix(self, prefix: str, limit: int = 10) -> list[int]:
+        """Up to limit distinct members with a name starting with prefix"""
+        prefix = prefix.casefold()
+        found: dict[int, None] = {}
+        for i in range(bisect_left(self._sorted, prefix), len(self._sorted)):
+            key = self._sorted[i]
+            if not key.startswith(prefix):
+                break
+            for member_id in sorted(self._ids[key]):
+                found[member_id] = None
+                if len(found) >= limit:
+                    return list(found)
+        return list(found)
@@ -0,0 +1,137 @@
+"""Price-time priority order book for resource-for-resource markets"""
+from __future__ import annotations
+
+import heapq
+from typing import NamedTuple
+
+# (base, quote): orders buy or sell the base resource, priced in the quote
+PAIRS = (('food', 'coal'), ('medicine', 'coal'), ('medicine', 'food'))
+
+BUY, SELL = 'buy', 'sell'
+
+
+class Order:
+    """A limit order; quantity is what is still open"""
+    __slots__ = ('order_id', 'price', 'quantity', 'side', 'user_id')
+
+    def __init__(self, order_id: int, user_id: int, side: str, price: int, quantity: int) -> None:
+        self.order_id = order_id
+        self.user_id = user_id
+        self.side = side
+        self.price = price
+        self.quantity = quantity
+
+
+class Fill(NamedTuple):
+    maker: Order
+    taker: Order
+    price: int
+    quantity: int
+
+
+def pair_name(base: str, quote: str) -> str:
+    return f"{base}/{quote}"
+
+
+def escrow(side: str, price: int, quantity: int) -> tuple[int, int]:
+    """(base, quote) held back while an order is open"""
+    return (quantity, 0) if side == SELL else (0, price * quantity)
+
+
+def settlement(fills: list[Fill]) -> dict[int, list[int]]:
+    """user_id -> [base, quote] credited by a batch of fills.
+
+    Both sides were escrowed when their orders were placed, so settlement
+    only ever credits. A taking buy fills at the resting ask's price and
+    gets back the difference from its own limit.
+    """
+    credits: dict[int, list[int]] = {}
+    for fill in fills:
+        buyer, seller = (fill.taker, fill.maker) if fill.taker.side == BUY else (fill.maker, fill.taker)
+        buyer_credit = credits.setdefault(buyer.user_id, [0, 0])
+        buyer_credit[0] += fill.quantity
+        buyer_credit[1] += (buyer.price - fill.price) * fill.quantity
+        credits.setdefault(seller.user_id, [0, 0])[1] += fill.price * fill.quantity
+    return credits
+
+
+class OrderBook:
+    """Bids and asks for one pair, each a heap ordered by price then age.
+
+    Order ids grow with time, so they double as the time priority and as
+    the heap tiebreak. Cancelled and filled orders are dropped from the
+    heaps lazily, when they surface at the top.
+    """
+
+    def __init__(self) -> None:
+        self._bids: list[tuple[int, int, Order]] = []
+        self._asks: list[tuple[int, int, Order]] = []
+        self.orders: dict[int, Order] = {}
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def _heap(self, side: str) -> list[tuple[int, int, Order]]:
+        return self._bids if side == BUY else self._asks
+
+    def _push(self, order: Order) -> None:
+        key = -order.price if order.side == BUY else order.price
+        heapq.heappush(self._heap(order.side), (key, order.order_id, order))
+        self.orders[order.order_id] = order
+
+    def best(self, side: str) -> Order | None:
+        """Highest bid or lowest ask still open"""
+        heap = self._heap(side)
+        while heap and heap[0][2].order_id not in self.orders:
+            heapq.heappop(heap)
+        return heap[0][2] if heap else None
+
+    def add(self, order: Order) -> list[Fill]:
+        """Match an incoming order, rest any remainder, return the fills.
+
+        A user's own resting orders are stepped over, never filled, so
+        nobody can trade with themselves.
+        """
+        fills = []
+        opposite = SELL if order.side == BUY else BUY
+        own = []
+        while order.quantity:
+            maker = self.best(opposite)
+            if maker is None:
+                break
+            if order.side == BUY and maker.price > order.price:
+                break
+            if order.side == SELL and maker.price < order.price:
+                break
+            if maker.user_id == order.user_id:
+                own.append(heapq.heappop(self._heap(opposite)))
+                continue
+            quantity = min(order.quantity, maker.quantity)
+            fills.append(Fill(maker, order, maker.price, quantity))
+            order.quantity -= quantity
+            maker.quantity -= quantity
+            if not maker.quantity:
+                del self.orders[maker.order_id]
+                heapq.heappop(self._heap(opposite))
+        for entry in own:
+            heapq.heappush(self._heap(opposite), entry)
+        if order.quantity:
+            self._push(order)
+        return fills
+
+    def load(self, order: Order) -> None:
+        """Rest an order without matching, e.g. when restoring a saved book"""
+        self._push(order)
+
+    def cancel(self, order_id: int) -> Order | None:
+        return self.orders.pop(order_id, None)
+
+    def levels(self, side: str, depth: int) -> list[tuple[int, int]]:
+        """Best depth price levels as (price, total quantity)"""
+        totals: dict[int, int] = {}
+        resting = [(key, order) for key, _, order in self._heap(side) if order.order_id in self.orders]
+        for _, order in sorted(resting, key=lambda entry: entry[0]):
+            if order.price not in totals and len(totals) == depth:
+                break
+            totals[order.price] = totals.get(order.price, 0) + order.quantity
+        return list(totals.items())
@@ -0,0 +1,84 @@
+"""Per-channel outbound message queue: priority lanes, embed coalescing and rate buckets"""
+from __future__ import annotations
+
+import heapq
+import itertools
+from typing import Any
+
+# Priority lanes, most urgent first
+URGENT, NORMAL, FLAVOR = 0, 1, 2
+
+MAX_EMBEDS = 10  # Discord's limit per message
+
+
+class Outgoing:
+    """One queued message. future is whatever the sender resolves once it is delivered"""
+    __slots__ = ('coalesce', 'content', 'embed', 'future', 'priority', 'reactions')
+
+    def __init__(self, priority: int, content: str | None = None, embed: Any = None,
+                 reactions: tuple[str, ...] = (), coalesce: bool = True, future: Any = None) -> None:
+        self.priority = priority
+        self.content = content
+        self.embed = embed
+        self.reactions = reactions
+        self.coalesce = coalesce
+        self.future = future
+
+    def merges_with(self, other: Outgoing) -> bool:
+        """Whether both can be sent as embeds of one message"""
+        return (
+            self.coalesce and other.coalesce
+            and self.content is None and other.content is None
+            and self.embed is not None and other.embed is not None
+            and self.reactions == other.reactions
+        )
+
+
+class OutboundQueue:
+    """Messages waiting for one channel: lowest lane first, FIFO within a lane"""
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[int, int, Outgoing]] = []
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, item: Outgoing) -> None:
+        heapq.heappush(self._heap, (item.priority, next(self._seq), item))
+
+    def take_batch(self, limit: int = MAX_EMBEDS) -> list[Outgoing]:
+        """The next message to send, plus whatever queued right behind it can ride along as extra embeds"""
+        batch = [heapq.heappop(self._heap)[2]]
+        while self._heap and len(batch) < limit and batch[0].merges_with(self._heap[0][2]):
+            batch.append(heapq.heappop(self._heap)[2])
+        return batch
+
+
+class TokenBucket:
+    """capacity sends per period, refilled continuously"""
+
+    def __init__(self, capacity: int, period: float) -> None:
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated: float | None = None
+
+    def _refill(self, now: float) -> None:
+        if self.updated is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until a send is allowed, 0 if one is allowed now"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def full(self, now: float) -> bool:
+        """Whether the bucket has refilled, so dropping it and starting afresh changes nothing"""
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
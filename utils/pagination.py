@@ -0,0 +1,57 @@
+"""Keyset pagination helpers for the per-guild Seth roster"""
+
+# (generation, health, seth_id) of a roster row — the keyset cursor
+RosterKey = tuple[int, int, int]
+
+# Age in minutes is computed by SQLite from the epoch birth column
+ROSTER_COLUMNS = (
+    "s.seth_id, s.name, s.generation, s.health, s.hunger, "
+    "(CAST(strftime('%s', 'now') AS INTEGER) - s.birth_ts) / 60, u.discord_name"
+)
+
+# Roster order is generation DESC, health DESC, seth_id ASC; walking
+# backwards flips every direction and the page is reversed afterwards.
+_FORWARD_ORDER = "s.generation DESC, s.health DESC, s.seth_id ASC"
+_BACKWARD_ORDER = "s.generation ASC, s.health ASC, s.seth_id DESC"
+
+_AFTER_KEY = (
+    "AND (s.generation < ? OR (s.generation = ? AND "
+    "(s.health < ? OR (s.health = ? AND s.seth_id > ?))))"
+)
+_BEFORE_KEY = (
+    "AND (s.generation > ? OR (s.generation = ? AND "
+    "(s.health > ? OR (s.health = ? AND s.seth_id < ?))))"
+)
+
+
+def roster_key(row: tuple) -> RosterKey:
+    """Extract the keyset cursor from a roster row"""
+    seth_id, _, generation, health = row[:4]
+    return generation, health, seth_id
+
+
+def roster_page_query(guild_id: int, key: RosterKey | None, forward: bool, limit: int) -> tuple[str, tuple]:
+    """Build the SQL for one roster page after (or before) a cursor"""
+    clause = ""
+    params: tuple = (guild_id,)
+    if key is not None:
+        generation, health, seth_id = key
+        clause = _AFTER_KEY if forward else _BEFORE_KEY
+        params += (generation, generation, health, health, seth_id)
+
+    sql = f"""SELECT {ROSTER_COLUMNS}
+        FROM seths s
+        JOIN users u ON s.user_id = u.user_id
+        WHERE s.guild_id = ? AND s.is_alive = 1 {clause}
+        ORDER BY {_FORWARD_ORDER if forward else _BACKWARD_ORDER}
+        LIMIT ?"""
+    return sql, params + (limit,)
+
+
+def split_page(rows: list[tuple], page_size: int, forward: bool) -> tuple[list[tuple], bool]:
+    """Trim the look-ahead row and restore roster order, returns (page, has_more)"""
+    has_more = len(rows) > page_size
+    page = list(rows[:page_size])
+    if not forward:
+        page.reverse()
+    return page, has_more
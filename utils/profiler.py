@@ -0,0 +1,111 @@
+"""Sampling profiler for the main thread, aggregated as folded stacks for flamegraphs"""
+from __future__ import annotations
+
+import os
+import signal
+import time
+from collections import Counter
+from types import FrameType
+from typing import Any
+
+# SIGPROF and its CPU-time timer only exist on Unix
+AVAILABLE = hasattr(signal, 'setitimer') and hasattr(signal, 'SIGPROF')
+
+
+def fold_stack(frame: FrameType | None) -> str:
+    """'file.py:outer;file.py:inner' - root first, as flamegraph.pl expects"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """Samples the main thread's stack on a CPU-time timer signal.
+
+    SIGPROF fires after every interval of CPU time the process uses and
+    its handler runs on the main thread between bytecodes, so a sample is
+    exactly what was executing; time spent idle in select() is never
+    sampled. The handler times itself and stretches the timer so sampling
+    never takes more than max_overhead of the CPU, and it stops by itself
+    after max_seconds. Start and stop it from the main thread.
+    """
+
+    def __init__(self, interval: float, max_overhead: float, max_seconds: float) -> None:
+        self.base_interval = interval
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.max_seconds = max_seconds
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.sampling_time = 0.0
+        self.running = False
+        self._started = (0.0, 0.0)  # (wall, CPU) clocks at start
+        self._stopped: tuple[float, float] | None = None
+        self._previous: Any = None
+
+    @property
+    def elapsed(self) -> float:
+        """Wall-clock seconds profiled"""
+        return (self._stopped or self._clocks())[0] - self._started[0]
+
+    @property
+    def cpu_time(self) -> float:
+        """CPU seconds the process used while profiled"""
+        return (self._stopped or self._clocks())[1] - self._started[1]
+
+    @property
+    def overhead(self) -> float:
+        """Share of that CPU time spent taking samples"""
+        return self.sampling_time / self.cpu_time if self.cpu_time else 0.0
+
+    @staticmethod
+    def _clocks() -> tuple[float, float]:
+        return time.perf_counter(), time.process_time()
+
+    def start(self) -> None:
+        self._started = self._clocks()
+        self._stopped = None
+        self._previous = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        self.running = True
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous)
+        self._stopped = self._clocks()
+        self.running = False
+
+    def _sample(self, signum: int, frame: FrameType | None) -> None:
+        start = time.perf_counter()
+        if start - self._started[0] >= self.max_seconds:
+            self.stop()
+            return
+        self.stacks[fold_stack(frame)] += 1
+        self.samples += 1
+
+        cost = time.perf_counter() - start
+        self.sampling_time += cost
+        interval = max(self.base_interval, cost / self.max_overhead)
+        if interval != self.interval:
+            self.interval = interval
+            signal.setitimer(signal.ITIMER_PROF, interval, interval)
+
+    def _snapshot(self) -> Counter[str]:
+        # dict() copies in one C call, which the handler cannot interrupt
+        return Counter(dict(self.stacks))
+
+    def folded(self) -> str:
+        """One 'stack count' line per distinct stack, most sampled first"""
+        return "".join(f"{stack} {count}\n" for stack, count in self._snapshot().most_common())
+
+    def hottest(self, limit: int) -> list[tuple[str, int]]:
+        """The functions most often on top of the stack, with their sample counts"""
+        leaves: Counter[str] = Counter()
+        for stack, count in self._snapshot().items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(limit)
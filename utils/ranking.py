@@ -0,0 +1,204 @@
+"""Composite Seth score and an order-statistic index for O(log n) rank lookups"""
+from __future__ import annotations
+
+import random
+from collections.abc import Iterator
+
+from config import AGE_SCORE_DIVISOR, GENERATION_SCORE_WEIGHT
+
+# One age point is earned per AGE_SCORE_DIVISOR minutes of life
+SECONDS_PER_AGE_POINT = 60 * AGE_SCORE_DIVISOR
+
+
+def composite_score(health: int, hunger: int, generation: int, age_minutes: int) -> int:
+    """Score used by !compare, !rank and !rankings"""
+    return health + (100 - hunger) + (generation * GENERATION_SCORE_WEIGHT) + (age_minutes // AGE_SCORE_DIVISOR)
+
+
+def static_score(health: int, hunger: int, generation: int) -> int:
+    """The part of the composite score that does not change with time"""
+    return health + (100 - hunger) + (generation * GENERATION_SCORE_WEIGHT)
+
+
+class _Node:
+    __slots__ = ('key', 'left', 'priority', 'right', 'size')
+
+    def __init__(self, key: tuple) -> None:
+        self.key = key
+        self.priority = random.random()
+        self.left: _Node | None = None
+        self.right: _Node | None = None
+        self.size = 1
+
+
+def _size(node: _Node | None) -> int:
+    return node.size if node else 0
+
+
+def _update(node: _Node) -> _Node:
+    node.size = 1 + _size(node.left) + _size(node.right)
+    return node
+
+
+def _split(node: _Node | None, key: tuple) -> tuple[_Node | None, _Node | None]:
+    """Split into (keys < key, keys >= key)"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        node.right, right = _split(node.right, key)
+        return _update(node), right
+    left, node.left = _split(node.left, key)
+    return left, _update(node)
+
+
+def _merge(left: _Node | None, right: _Node | None) -> _Node | None:
+    """Merge two treaps where every key in left is below every key in right"""
+    if left is None or right is None:
+        return left or right
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return _update(left)
+    right.left = _merge(left, right.left)
+    return _update(right)
+
+
+def _delete(node: _Node | None, key: tuple) -> _Node | None:
+    if node is None:
+        return None
+    if key == node.key:
+        return _merge(node.left, node.right)
+    if key < node.key:
+        node.left = _delete(node.left, key)
+    else:
+        node.right = _delete(node.right, key)
+    return _update(node)
+
+
+class OrderStatisticTree:
+    """Treap of unique keys with subtree sizes: insert, remove and rank in O(log n)"""
+
+    def __init__(self) -> None:
+        self._root: _Node | None = None
+
+    def __len__(self) -> int:
+        return _size(self._root)
+
+    def insert(self, key: tuple) -> None:
+        left, right = _split(self._root, key)
+        self._root = _merge(_merge(left, _Node(key)), right)
+
+    def remove(self, key: tuple) -> None:
+        self._root = _delete(self._root, key)
+
+    def rank(self, key: tuple) -> int:
+        """Number of keys strictly less than key"""
+        count = 0
+        node = self._root
+        while node:
+            if node.key < key:
+                count += _size(node.left) + 1
+                node = node.right
+            else:
+                node = node.left
+        return count
+
+    def select(self, index: int) -> tuple:
+        """The key at 0-based position index in sorted order"""
+        node = self._root
+        while node:
+            left = _size(node.left)
+            if index < left:
+                node = node.left
+            elif index == left:
+                return node.key
+            else:
+                index -= left + 1
+                node = node.right
+        raise IndexError(index)
+
+    def __iter__(self) -> Iterator[tuple]:
+        stack: list[_Node] = []
+        node = self._root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.key
+            node = node.right
+
+
+class RankIndex:
+    """Ranks living Seths by composite score without re-sorting on every call.
+
+    The age term grows for every Seth at the same rate, so ordering by
+    static_score * SECONDS_PER_AGE_POINT - birth_ts is the same as ordering by
+    score at any instant. Only feeds, heals, decay, births and deaths move a
+    Seth within the tree; the passage of time never does.
+    """
+
+    def __init__(self) -> None:
+        self._tree = OrderStatisticTree()
+        # seth_id -> (tree key, generation, health, hunger, birth_ts)
+        self._entries: dict[int, tuple[tuple, int, int, int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, seth_id: int) -> bool:
+        return seth_id in self._entries
+
+    @staticmethod
+    def _key(seth_id: int, generation: int, health: int, hunger: int, birth_ts: int) -> tuple:
+        # Best first: negate so that ascending tree order is descending score,
+        # ties broken by the older Seth (smaller seth_id)
+        return (-(static_score(health, hunger, generation) * SECONDS_PER_AGE_POINT - birth_ts), seth_id)
+
+    def upsert(self, seth_id: int, generation: int, health: int, hunger: int, birth_ts: int) -> None:
+        """Add a Seth or replace all of its ranked fields"""
+        self.remove(seth_id)
+        key = self._key(seth_id, generation, health, hunger, birth_ts)
+        self._tree.insert(key)
+        self._entries[seth_id] = (key, generation, health, hunger, birth_ts)
+
+    def update_vitals(self, seth_id: int, health: int, hunger: int) -> None:
+        """Move a Seth after its health or hunger changed"""
+        entry = self._entries.get(seth_id)
+        if entry is None:
+            return
+        key, generation, old_health, old_hunger, birth_ts = entry
+        if (health, hunger) == (old_health, old_hunger):
+            return
+        self._tree.remove(key)
+        key = self._key(seth_id, generation, health, hunger, birth_ts)
+        self._tree.insert(key)
+        self._entries[seth_id] = (key, generation, health, hunger, birth_ts)
+
+    def remove(self, seth_id: int) -> None:
+        entry = self._entries.pop(seth_id, None)
+        if entry is not None:
+            self._tree.remove(entry[0])
+
+    def rank(self, seth_id: int) -> int | None:
+        """1-based position among all indexed Seths, or None if not indexed"""
+        entry = self._entries.get(seth_id)
+        if entry is None:
+            return None
+        return self._tree.rank(entry[0]) + 1
+
+    def score(self, seth_id: int, now: float) -> int | None:
+        """Composite score of an indexed Seth at time now (epoch seconds)"""
+        entry = self._entries.get(seth_id)
+        if entry is None:
+            return None
+        _, generation, health, hunger, birth_ts = entry
+        return composite_score(health, hunger, generation, int((now - birth_ts) / 60))
+
+    def top(self, count: int) -> list[int]:
+        """seth_ids of the best count Seths, best first"""
+        result = []
+        for _, seth_id in self._tree:
+            if len(result) >= count:
+                break
+            result.append(seth_id)
+        return result
@@ -0,0 +1,97 @@
+"""LRU cache of living Seth records keyed by owner"""
+from __future__ import annotations
+
+from collections import OrderedDict
+
+
+class SethRecord:
+    """The columns commands read from a living Seth"""
+    __slots__ = ('birth_ts', 'generation', 'guild_id', 'health', 'hunger', 'name', 'seth_id', 'user_id', 'version')
+
+    # Column order of a SELECT that builds a record
+    COLUMNS = "seth_id, user_id, name, generation, health, hunger, birth_ts, guild_id, version"
+
+    def __init__(self, seth_id: int, user_id: int, name: str, generation: int,
+                 health: int, hunger: int, birth_ts: int, guild_id: int | None, version: int = 0) -> None:
+        self.seth_id = seth_id
+        self.user_id = user_id
+        self.name = name
+        self.generation = generation
+        self.health = health
+        self.hunger = hunger
+        self.birth_ts = birth_ts
+        self.guild_id = guild_id
+        self.version = version
+
+    def with_vitals(self, health: int, hunger: int, version: int) -> SethRecord:
+        """A copy carrying newly written vitals"""
+        return SethRecord(self.seth_id, self.user_id, self.name, self.generation,
+                          health, hunger, self.birth_ts, self.guild_id, version)
+
+
+class _Missing:
+    def __repr__(self) -> str:
+        return "MISSING"
+
+
+MISSING = _Missing()
+
+
+class SethCache:
+    """Living Seths by user_id, least recently used evicted first.
+
+    A cached None means the user is known to have no living Seth. Writers
+    update or drop entries right after they commit; put() only accepts a
+    record read before the last such change if no change happened since,
+    so a slow read can't reinstate data a writer just replaced.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._records: OrderedDict[int, SethRecord | None] = OrderedDict()
+        self._changes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, user_id: int) -> SethRecord | None | _Missing:
+        """The cached record, None if known to have none, or MISSING"""
+        try:
+            record = self._records[user_id]
+        except KeyError:
+            self.misses += 1
+            return MISSING
+        self._records.move_to_end(user_id)
+        self.hits += 1
+        return record
+
+    def token(self) -> int:
+        """Take before a read; hand back to put() with its result"""
+        return self._changes
+
+    def put(self, user_id: int, record: SethRecord | None, token: int | None = None) -> None:
+        if token is not None and token != self._changes:
+            return
+        self._records[user_id] = record
+        self._records.move_to_end(user_id)
+        if len(self._records) > self.capacity:
+            self._records.popitem(last=False)
+
+    def born(self, record: SethRecord) -> None:
+        self._changes += 1
+        self.put(record.user_id, record)
+
+    def discard(self, user_id: int) -> None:
+        self._changes += 1
+        self._records.pop(user_id, None)
+
+    def update_vitals(self, user_id: int, health: int, hunger: int, version: int) -> None:
+        """Apply a committed health/hunger change to a cached record"""
+        self._changes += 1
+        record = self._records.get(user_id)
+        if record is not None:
+            record.health = health
+            record.hunger = hunger
+            record.version = version
@@ -0,0 +1,25 @@
+"""Grouping of guilds by the gateway shard that owns them"""
+from __future__ import annotations
+
+from typing import Any
+
+
+def guilds_by_shard(bot: Any) -> dict[int, list[Any]]:
+    """The bot's guilds grouped by shard id.
+
+    Shards that are reconnecting are kept: messages go out over REST, not
+    the gateway, so their guilds can still be sent to.
+    """
+    shards: dict[int, list[Any]] = {}
+    for guild in bot.guilds:
+        shards.setdefault(guild.shard_id, []).append(guild)
+    return shards
+
+
+def parse_shard_ids(spec: str) -> list[int]:
+    """'0-3,8' -> [0, 1, 2, 3, 8]"""
+    shard_ids: set[int] = set()
+    for part in spec.split(','):
+        first, _, last = part.strip().partition('-')
+        shard_ids.update(range(int(first), int(last or first) + 1))
+    return sorted(shard_ids)
@@ -0,0 +1,142 @@
+"""Mergeable streaming summaries for the !census command"""
+from __future__ import annotations
+
+import math
+import struct
+from array import array
+
+
+class FixedHistogram:
+    """Integer histogram over [lo, hi] with one bucket per value"""
+
+    def __init__(self, lo: int, hi: int) -> None:
+        self.lo = lo
+        self.hi = hi
+        self.counts = array('I', [0]) * (hi - lo + 1)
+        self.total = 0
+
+    def _bucket(self, value: int) -> int:
+        return min(self.hi, max(self.lo, value)) - self.lo
+
+    def add(self, value: int) -> None:
+        self.counts[self._bucket(value)] += 1
+        self.total += 1
+
+    def remove(self, value: int) -> None:
+        bucket = self._bucket(value)
+        if self.counts[bucket]:
+            self.counts[bucket] -= 1
+            self.total -= 1
+
+    def move(self, old: int, new: int) -> None:
+        """Shift one observation from old to new"""
+        if old != new:
+            self.remove(old)
+            self.add(new)
+
+    def quantile(self, q: float) -> int | None:
+        """Smallest value with at least q of the observations at or below it"""
+        if not self.total:
+            return None
+        target = max(1, math.ceil(q * self.total))
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.lo + i
+        return self.hi
+
+    def count_between(self, start: int, end: int) -> int:
+        """Number of observations with start <= value <= end"""
+        return sum(self.counts[self._bucket(start):self._bucket(end) + 1])
+
+    def merge(self, other: FixedHistogram) -> None:
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.total += other.total
+
+
+class QuantileSketch:
+    """Log-bucketed quantile sketch with bounded relative error (DDSketch style).
+
+    Values are mapped to buckets whose bounds grow geometrically, so any
+    quantile is answered within relative_accuracy of the true value and two
+    sketches with the same accuracy merge by adding bucket counts.
+    """
+
+    _HEADER = struct.Struct('<dI')
+
+    def __init__(self, relative_accuracy: float = 0.02) -> None:
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        return 2 * self._gamma ** index / (self._gamma + 1)
+
+    def add(self, value: float) -> None:
+        if value < 1:
+            self.zero_count += 1
+        else:
+            index = self._index(value)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+
+    def remove(self, value: float) -> None:
+        if value < 1:
+            if self.zero_count:
+                self.zero_count -= 1
+                self.count -= 1
+            return
+        index = self._index(value)
+        remaining = self.buckets.get(index, 0) - 1
+        if remaining < 0:
+            return
+        if remaining:
+            self.buckets[index] = remaining
+        else:
+            del self.buckets[index]
+        self.count -= 1
+
+    def quantile(self, q: float) -> float | None:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return self._value(index)
+        return self._value(max(self.buckets))
+
+    def merge(self, other: QuantileSketch) -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def to_bytes(self) -> bytes:
+        pairs = array('i')
+        for index, count in sorted(self.buckets.items()):
+            pairs.extend((index, count))
+        return self._HEADER.pack(self.relative_accuracy, self.zero_count) + pairs.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> QuantileSketch:
+        accuracy, zero_count = cls._HEADER.unpack_from(data)
+        sketch = cls(accuracy)
+        pairs = array('i', data[cls._HEADER.size:])
+        sketch.buckets = dict(zip(pairs[0::2], pairs[1::2]))
+        sketch.zero_count = zero_count
+        sketch.count = zero_count + sum(sketch.buckets.values())
+        return sketch
@@ -0,0 +1,39 @@
+"""One-query view of a user's living Seth, resources and lifetime stats"""
+from __future__ import annotations
+
+from utils.seth_cache import SethRecord
+
+
+class UserSnapshot:
+    """Everything a command usually shows about one user"""
+    __slots__ = ('max_generation', 'resources', 'seth', 'total_seths', 'user_id')
+
+    def __init__(self, user_id: int, seth: SethRecord | None,
+                 resources: tuple[int, int, int] | None, total_seths: int, max_generation: int) -> None:
+        self.user_id = user_id
+        self.seth = seth
+        self.resources = resources
+        self.total_seths = total_seths
+        self.max_generation = max_generation
+
+
+def snapshot_query(count: int) -> str:
+    """SQL returning one row per user for `count` user_id parameters"""
+    wanted = ", ".join("(?)" for _ in range(count))
+    return f"""WITH wanted (user_id) AS (VALUES {wanted})
+        SELECT w.user_id,
+            s.seth_id, s.name, s.generation, s.health, s.hunger, s.birth_ts, s.guild_id, s.version,
+            r.food, r.medicine, r.coal,
+            (SELECT COUNT(*) FROM seths WHERE user_id = w.user_id),
+            (SELECT MAX(generation) FROM seths WHERE user_id = w.user_id)
+        FROM wanted w
+        LEFT JOIN seths s ON s.user_id = w.user_id AND s.is_alive = 1
+        LEFT JOIN resources r ON r.user_id = w.user_id"""
+
+
+def snapshot_from_row(row: tuple) -> UserSnapshot:
+    user_id, seth_id, name, generation, health, hunger, birth_ts, guild_id, version, *rest = row
+    food, medicine, coal, total, max_gen = rest
+    seth = SethRecord(seth_id, user_id, name, generation, health, hunger, birth_ts, guild_id, version) if seth_id else None
+    resources = (food, medicine, coal) if food is not None else None
+    return UserSnapshot(user_id, seth, resources, total, max_gen or 0)
@@ -0,0 +1,82 @@
+"""Per-statement SQL timings and row counts for !dbstats and the slow-query log"""
+from __future__ import annotations
+
+import functools
+import re
+
+from utils.sketches import QuantileSketch
+
+_SPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\?(?:, \?)+\)")
+_REPEATS = re.compile(r"(\(\?(?:, \.\.\.)?\))(?:, \1)+")
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize(sql: str) -> str:
+    """One shape per statement: literals become ?, lists of ? collapse to '?, ...'
+
+    'SELECT * FROM t WHERE id IN (?, ?, ?) AND kind = 'x'' and the same
+    with four ids both come out as 'SELECT * FROM t WHERE id IN (?, ...) AND kind = ?'.
+    """
+    sql = _SPACE.sub(" ", sql).strip().rstrip(";").rstrip()
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = re.sub(r"\s*,\s*", ", ", sql)
+    sql = re.sub(r"\(\s+", "(", re.sub(r"\s+\)", ")", sql))
+    sql = _LIST.sub("(?, ...)", sql)
+    return _REPEATS.sub(r"\1, ...", sql)
+
+
+class StatementStats:
+    """Everything recorded about one normalized statement"""
+    __slots__ = ('calls', 'latencies', 'plan', 'rows', 'seconds', 'slow', 'sql')
+
+    def __init__(self, sql: str) -> None:
+        self.sql = sql
+        self.calls = 0
+        self.seconds = 0.0  # in total, fetching included
+        self.rows = 0
+        self.slow = 0
+        self.plan: str | None = None  # EXPLAIN QUERY PLAN, once it ran slow
+        self.latencies = QuantileSketch()  # microseconds per call
+
+    def called(self, seconds: float) -> None:
+        self.calls += 1
+        self.latencies.add(seconds * 1_000_000)
+
+    def p99(self) -> float:
+        """Seconds; within the sketch's 2% of the true 99th percentile"""
+        return (self.latencies.quantile(0.99) or 0.0) / 1_000_000
+
+
+class SqlStats:
+    """Statement stats keyed by normalized SQL"""
+
+    def __init__(self) -> None:
+        self.statements: dict[str, StatementStats] = {}
+
+    def statement(self, sql: str) -> StatementStats:
+        key = normalize(sql)
+        stats = self.statements.get(key)
+        if stats is None:
+            stats = self.statements[key] = StatementStats(key)
+        return stats
+
+    def top(self, limit: int, key: str = 'seconds') -> list[StatementStats]:
+        """The statements with the most total seconds, calls, rows or slow runs"""
+        return sorted(self.statements.values(), key=lambda stats: getattr(stats, key), reverse=True)[:limit]
+
+    def reset(self) -> None:
+        self.statements.clear()
+
+
+def format_plan(rows: list[tuple]) -> str:
+    """EXPLAIN QUERY PLAN rows (id, parent, notused, detail) as an indented tree"""
+    depth = {0: -1}
+    lines = []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node] + detail)
+    return "\n".join(lines)
@@ -0,0 +1,135 @@
+"""Event loop stalls: callbacks that held the loop too long, and how late it runs"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import deque
+from collections.abc import Callable
+from contextvars import ContextVar
+from types import FrameType
+from typing import Any
+
+# The command the current task is running; set by the bot before every invoke
+current_command: ContextVar[str | None] = ContextVar('current_command', default=None)
+
+# Project files, as opposed to the standard library and installed packages
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Stall:
+    """One callback that ran longer than the threshold"""
+    __slots__ = ('at', 'command', 'seconds', 'where')
+
+    def __init__(self, seconds: float, where: str, command: str | None, at: float) -> None:
+        self.seconds = seconds
+        self.where = where
+        self.command = command
+        self.at = at
+
+
+class StallLog:
+    """The most recent stalls, in a ring buffer of fixed size"""
+
+    def __init__(self, capacity: int) -> None:
+        self.stalls: deque[Stall] = deque(maxlen=capacity)
+        self.total = 0
+
+    def record(self, stall: Stall) -> None:
+        self.stalls.append(stall)
+        self.total += 1
+
+    def worst(self, limit: int) -> list[Stall]:
+        return sorted(self.stalls, key=lambda stall: stall.seconds, reverse=True)[:limit]
+
+
+def _coroutine_frames(coro: Any) -> list[FrameType]:
+    """The frames of a suspended coroutine and everything it awaits, outermost first"""
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, 'cr_frame', None) or getattr(coro, 'gi_frame', None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, 'cr_await', None) or getattr(coro, 'gi_yieldfrom', None)
+    return frames
+
+
+def _is_ours(filename: str) -> bool:
+    return filename.startswith(ROOT) and 'site-packages' not in filename
+
+
+def describe_callback(callback: Callable[..., Any]) -> str:
+    """Where a callback's time went, as 'cogs/decay.py:88 in decay_task'.
+
+    Task steps are named after the innermost project frame the task's
+    coroutine is now suspended in, which is just past the code that
+    blocked. Other callbacks are named after themselves.
+    """
+    task = getattr(callback, '__self__', None)
+    if not isinstance(task, asyncio.Task):
+        return getattr(callback, '__qualname__', repr(callback))
+    coro = task.get_coro()
+    frames = _coroutine_frames(coro)
+    if not frames:
+        return f"{getattr(coro, '__qualname__', task.get_name())} (finished)"
+    ours = [frame for frame in frames if _is_ours(frame.f_code.co_filename)]
+    frame = (ours or frames)[-1]
+    path = os.path.relpath(frame.f_code.co_filename, ROOT) if ours else os.path.basename(frame.f_code.co_filename)
+    return f"{path}:{frame.f_lineno} in {frame.f_code.co_name}"
+
+
+class CallbackTimer:
+    """Times every callback the event loop runs and reports the slow ones.
+
+    This is the check asyncio's debug mode makes against
+    loop.slow_callback_duration, without the traceback debug mode
+    captures on every call_soon; the cost is two clock reads per
+    callback. The slow callback's task and command are looked up only
+    once it has proved slow.
+
+    install() replaces asyncio.Handle._run for the whole process, so it
+    times every asyncio event loop, not one loop. Loops that do not run
+    their callbacks through asyncio.Handle, such as uvloop's, are not
+    timed at all; covers() tells whether a loop is.
+    """
+
+    def __init__(self, threshold: float, report: Callable[[Stall], None]) -> None:
+        self.threshold = threshold
+        self.report = report
+        self._original: Callable[[asyncio.Handle], None] | None = None
+
+    def install(self) -> None:
+        if self._original is not None:
+            return
+        original = self._original = asyncio.Handle._run
+        threshold, report = self.threshold, self.report
+
+        def _run(handle: asyncio.Handle) -> None:
+            start = time.perf_counter()
+            original(handle)
+            seconds = time.perf_counter() - start
+            if seconds >= threshold:
+                report(Stall(seconds, describe_callback(handle._callback),
+                             handle._context.get(current_command), time.time()))
+
+        asyncio.Handle._run = _run
+
+    def uninstall(self) -> None:
+        if self._original is not None:
+            asyncio.Handle._run = self._original
+            self._original = None
+
+    @staticmethod
+    def covers(loop: asyncio.AbstractEventLoop) -> bool:
+        """Whether loop runs its callbacks as asyncio.Handles, and so is timed"""
+        return isinstance(loop, asyncio.BaseEventLoop)
+
+
+async def measure_lag(interval: float, record: Callable[[float], None]) -> None:
+    """Sleep for interval over and over, recording how late each wake-up is"""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        record(max(0.0, loop.time() - start - interval))
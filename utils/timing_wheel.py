@@ -0,0 +1,64 @@
+"""Hashed timing wheel for cheap expiry of short-lived keys"""
+from __future__ import annotations
+
+from collections.abc import Hashable
+
+
+class TimingWheel:
+    """Keys with deadlines, bucketed by tick so expiry never scans live keys.
+
+    schedule, cancel and lookups are O(1). advance(now) visits only the
+    slots whose ticks have passed since the previous call, dropping the
+    keys that are due and returning them. Deadlines further out than one
+    turn of the wheel simply stay in their slot until a later lap.
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 64) -> None:
+        self.tick = tick
+        self._slots: list[set[Hashable]] = [set() for _ in range(slots)]
+        self._deadlines: dict[Hashable, float] = {}
+        self._current: int | None = None
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines
+
+    def _slot(self, deadline: float) -> set[Hashable]:
+        return self._slots[int(deadline // self.tick) % len(self._slots)]
+
+    def get(self, key: Hashable) -> float | None:
+        """Deadline of key, or None if it is not scheduled"""
+        return self._deadlines.get(key)
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        """Add key, replacing any earlier deadline"""
+        self.cancel(key)
+        self._deadlines[key] = deadline
+        self._slot(deadline).add(key)
+
+    def cancel(self, key: Hashable) -> None:
+        deadline = self._deadlines.pop(key, None)
+        if deadline is not None:
+            self._slot(deadline).discard(key)
+
+    def advance(self, now: float) -> list[Hashable]:
+        """Remove and return every key whose deadline is at or before now"""
+        target = int(now // self.tick)
+        if self._current is None:
+            self._current = target - len(self._slots)
+
+        expired = []
+        # A long gap only needs one full lap: every slot gets checked once
+        start = max(self._current + 1, target - len(self._slots) + 1)
+        for tick in range(start, target + 1):
+            slot = self._slots[tick % len(self._slots)]
+            due = [key for key in slot if self._deadlines[key] <= now]
+            for key in due:
+                slot.discard(key)
+                del self._deadlines[key]
+            expired.extend(due)
+        # The current tick may still hold keys due later within it
+        self._current = target - 1
+        return expired
@@ -0,0 +1,44 @@
+"""Parsing and display helpers for resource bundles"""
+from config import MAX_TRADE_AMOUNT
+
+RESOURCES = ('food', 'medicine', 'coal')
+RESOURCE_EMOJIS = {'food': '🍖', 'medicine': '💊', 'coal': '⚫'}
+
+
+class BundleError(ValueError):
+    """A trade bundle that cannot be offered; the message is user-facing"""
+
+
+def parse_bundle(tokens: list[str]) -> dict[str, int]:
+    """Parse ['food', '3', 'coal', '2'] into {'food': 3, 'coal': 2}"""
+    if not tokens or len(tokens) % 2:
+        raise BundleError("❌ Usage: `!trade @user [food/medicine/coal] [amount] ...`")
+
+    bundle: dict[str, int] = {}
+    for resource, raw_amount in zip(tokens[0::2], tokens[1::2]):
+        resource = resource.lower()
+        if resource not in RESOURCES:
+            raise BundleError("❌ Invalid resource! Choose: `food`, `medicine`, or `coal`")
+        try:
+            amount = int(raw_amount)
+        except ValueError:
+            raise BundleError("❌ Usage: `!trade @user [food/medicine/coal] [amount] ...`") from None
+        if amount <= 0:
+            raise BundleError("❌ Amount must be positive!")
+        bundle[resource] = bundle.get(resource, 0) + amount
+        if bundle[resource] > MAX_TRADE_AMOUNT:
+            raise BundleError(f"❌ That's too much! Trade max {MAX_TRADE_AMOUNT} at a time.")
+    return bundle
+
+
+def bundle_amounts(bundle: dict[str, int]) -> tuple[int, int, int]:
+    """(food, medicine, coal) amounts of a bundle, zero where absent"""
+    return tuple(bundle.get(resource, 0) for resource in RESOURCES)
+
+
+def format_bundle(bundle: dict[str, int]) -> str:
+    """'🍖 **3** Food + ⚫ **2** Coal'"""
+    return " + ".join(
+        f"{RESOURCE_EMOJIS[resource]} **{amount}** {resource.capitalize()}"
+        for resource, amount in bundle.items()
+    )